@@ -1,13 +1,26 @@
 import os
-from flask import Flask, render_template
+import requests
+from flask import Flask, Response, render_template
 
 app = Flask(__name__)
 
+# the bot runs as its own process and serves its metrics on this local port
+METRICS_URL = f"http://127.0.0.1:{os.environ.get('METRICS_PORT', 9100)}/metrics"
+
 @app.route("/")
 def welcome():
     # Render the welcome page with animated "Team SPY" text
     return render_template("welcome.html")
 
+@app.route("/metrics")
+def metrics():
+    # Relay the bot's Prometheus metrics on the public port
+    try:
+        response = requests.get(METRICS_URL, timeout=5)
+    except requests.RequestException as e:
+        return Response(f"# bot metrics unavailable: {e}\n", status=503, mimetype="text/plain")
+    return Response(response.content, status=response.status_code, content_type=response.headers.get("Content-Type", "text/plain"))
+
 if __name__ == "__main__":
     # Default to port 5000 if PORT is not set in the environment
     port = int(os.environ.get("PORT", 8080))
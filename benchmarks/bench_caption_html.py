@@ -0,0 +1,67 @@
+# ---------------------------------------------------
+# File Name: bench_caption_html.py
+# Description: Timings of the single-pass caption converter in
+#              devgagan/core/html_caption.py against the old ten-pass re.sub version;
+#              its golden outputs are in tests/test_html_caption.py.
+# Usage: python benchmarks/bench_caption_html.py
+# ---------------------------------------------------
+
+import os
+import re
+import sys
+import time
+import types
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+# devgagan/__init__.py logs the bot clients in on import, the core modules don't need it
+_package = types.ModuleType("devgagan")
+_package.__path__ = [os.path.join(ROOT, "devgagan")]
+sys.modules.setdefault("devgagan", _package)
+
+from devgagan.core.html_caption import markdown_to_html  # noqa: E402
+
+ROUNDS = 2000
+
+
+def legacy_to_html(caption):
+    # get_func.format_caption_to_html before the single-pass converter
+    caption = re.sub(r"^> (.*)", r"<blockquote>\1</blockquote>", caption, flags=re.MULTILINE)
+    caption = re.sub(r"```(.*?)```", r"<pre>\1</pre>", caption, flags=re.DOTALL)
+    caption = re.sub(r"`(.*?)`", r"<code>\1</code>", caption)
+    caption = re.sub(r"\*\*(.*?)\*\*", r"<b>\1</b>", caption)
+    caption = re.sub(r"\*(.*?)\*", r"<b>\1</b>", caption)
+    caption = re.sub(r"__(.*?)__", r"<i>\1</i>", caption)
+    caption = re.sub(r"_(.*?)_", r"<i>\1</i>", caption)
+    caption = re.sub(r"~~(.*?)~~", r"<s>\1</s>", caption)
+    caption = re.sub(r"\|\|(.*?)\|\|", r"<details>\1</details>", caption)
+    caption = re.sub(r"\[(.*?)\]\((.*?)\)", r'<a href="\2">\1</a>', caption)
+    return caption.strip() if caption else None
+
+
+SAMPLE = (
+    "> **Lecture 12** - __Thermodynamics__\n"
+    "📚 Batch: `PHY_2025` | ~~old~~ new\n"
+    "🔗 [Join](https://t.me/some_channel_name) for more\n"
+    "||answer key inside|| **Powered by** __@ProToppers__\n"
+) * 4
+
+
+def timed(func, caption):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        func(caption)
+    return (time.perf_counter() - start) / ROUNDS * 1e6
+
+
+# Typical run on the 700-char sample: re.sub x10 108us, single pass 89us, memoised 0.2us.
+def main():
+    legacy_us = timed(legacy_to_html, SAMPLE)
+    uncached_us = timed(markdown_to_html.__wrapped__, SAMPLE)
+    cached_us = timed(markdown_to_html, SAMPLE)
+    print(f"{len(SAMPLE)}-char caption: re.sub x10 {legacy_us:.1f}us, "
+          f"single pass {uncached_us:.1f}us, memoised {cached_us:.2f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# ---------------------------------------------------
+# File Name: bench_probe.py
+# Description: Compares the header probe in devgagan/core/probe.py with the old
+#              cv2.VideoCapture metadata path.
+# Usage: python benchmarks/bench_probe.py [video ...]
+#        Without arguments synthetic MP4/MKV headers are generated. The cv2 column
+#        needs opencv-python-headless, which the bot itself no longer installs.
+# ---------------------------------------------------
+
+import asyncio
+import os
+import struct
+import sys
+import tempfile
+import time
+import types
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+# devgagan/__init__.py logs the bot clients in on import, the core modules don't need it
+_package = types.ModuleType("devgagan")
+_package.__path__ = [os.path.join(ROOT, "devgagan")]
+sys.modules.setdefault("devgagan", _package)
+
+from devgagan.core.probe import read_headers, probe  # noqa: E402
+
+ROUNDS = 50
+
+
+def _box(kind, payload):
+    return struct.pack(">I4s", 8 + len(payload), kind) + payload
+
+
+def _tkhd(width, height):
+    return _box(b"tkhd", b"\x00\x00\x00\x07" + bytes(20) + bytes(52) + struct.pack(">II", width << 16, height << 16))
+
+
+def synthetic_mp4(path, width=1280, height=720, seconds=125, media_mb=64):
+    mvhd = _box(b"mvhd", b"\x00\x00\x00\x00" + bytes(8) + struct.pack(">II", 1000, seconds * 1000) + bytes(80))
+    moov = _box(b"moov", mvhd + _box(b"trak", _tkhd(0, 0)) + _box(b"trak", _tkhd(width, height)))
+    with open(path, "wb") as f:
+        f.write(_box(b"ftyp", b"isom\x00\x00\x02\x00isomiso2mp41"))
+        f.write(struct.pack(">I4s", 8 + media_mb * 1024 * 1024, b"mdat"))
+        f.write(bytes(media_mb * 1024 * 1024))
+        f.write(moov)  # moov after mdat, the layout of most unoptimised uploads
+
+
+def _ebml(element_id, payload):
+    # sizes always use the 8-byte vint form, 0x01 marker then 7 bytes
+    element = element_id.to_bytes((element_id.bit_length() + 7) // 8, "big")
+    return element + b"\x01" + len(payload).to_bytes(7, "big") + payload
+
+
+def synthetic_mkv(path, width=1920, height=1080, seconds=125, media_mb=64):
+    info = _ebml(0x1549A966, _ebml(0x2AD7B1, (1000000).to_bytes(3, "big")) + _ebml(0x4489, struct.pack(">d", seconds * 1000.0)))
+    audio = _ebml(0xAE, _ebml(0x83, b"\x02"))
+    video = _ebml(0xAE, _ebml(0x83, b"\x01") + _ebml(0xE0, _ebml(0xB0, width.to_bytes(2, "big")) + _ebml(0xBA, height.to_bytes(2, "big"))))
+    tracks = _ebml(0x1654AE6B, audio + video)
+    cluster = _ebml(0x1F43B675, bytes(media_mb * 1024 * 1024))
+    with open(path, "wb") as f:
+        f.write(_ebml(0x1A45DFA3, _ebml(0x4282, b"matroska")))
+        f.write(_ebml(0x18538067, info + tracks + cluster))
+
+
+def cv2_metadata(path):
+    import cv2
+    vcap = cv2.VideoCapture(path)
+    width = round(vcap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = round(vcap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    fps = vcap.get(cv2.CAP_PROP_FPS)
+    frames = vcap.get(cv2.CAP_PROP_FRAME_COUNT)
+    vcap.release()
+    return {'width': width, 'height': height, 'duration': round(frames / fps) if fps > 0 else 1}
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        result = func(*args)
+    return (time.perf_counter() - start) / ROUNDS * 1000, result
+
+
+async def timed_probe(path):
+    start = time.perf_counter()
+    first = await probe(path)
+    cold = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        await probe(path)
+    return cold, (time.perf_counter() - start) / ROUNDS * 1000, first
+
+
+def main():
+    paths = sys.argv[1:]
+    tmp = None
+    if not paths:
+        tmp = tempfile.mkdtemp()
+        paths = [os.path.join(tmp, "sample.mp4"), os.path.join(tmp, "sample.mkv")]
+        synthetic_mp4(paths[0])
+        synthetic_mkv(paths[1])
+    try:
+        import cv2  # noqa: F401
+        have_cv2 = True
+    except ImportError:
+        have_cv2 = False
+    print(f"{'file':<24}{'headers ms':>12}{'probe cold':>12}{'probe warm':>12}{'cv2 ms':>10}  result")
+    for path in paths:
+        header_ms, result = timed(read_headers, path)
+        cold_ms, warm_ms, probed = asyncio.run(timed_probe(path))
+        cv2_ms = f"{timed(cv2_metadata, path)[0]:.3f}" if have_cv2 else "n/a"
+        print(f"{os.path.basename(path):<24}{header_ms:>12.3f}{cold_ms:>12.3f}{warm_ms:>12.4f}{cv2_ms:>10}  {probed}")
+        assert result is None or result == probed
+    if tmp:
+        for path in paths:
+            os.remove(path)
+        os.rmdir(tmp)
+
+
+if __name__ == "__main__":
+    main()
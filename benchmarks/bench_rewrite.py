@@ -0,0 +1,78 @@
+# ---------------------------------------------------
+# File Name: bench_rewrite.py
+# Description: Sequential str.replace rules vs the compiled RuleSet from
+#              devgagan/core/rewrite.py, at 5, 10, 100 and 1000 rules.
+# Usage: python benchmarks/bench_rewrite.py
+# Typical run on a 1KB caption where a fifth of the words are rules:
+#   5 rules 5.7us naive, 14us compiled; 10 rules 9us, 9.3us;
+#   100 rules 57us, 13us (4.5x); 1000 rules 580us, 85us (7x).
+# ---------------------------------------------------
+
+import os
+import random
+import string
+import sys
+import time
+import types
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+# devgagan/__init__.py logs the bot clients in on import, the core modules don't need it
+_package = types.ModuleType("devgagan")
+_package.__path__ = [os.path.join(ROOT, "devgagan")]
+sys.modules.setdefault("devgagan", _package)
+
+from devgagan.core.rewrite import RuleSet  # noqa: E402
+
+ROUNDS = 200
+
+
+def naive(text, delete_words, replacements, deleted):
+    # what format_caption and build_file_name did before
+    for word in delete_words:
+        text = text.replace(word, deleted)
+    for word, replace_word in replacements.items():
+        text = text.replace(word, replace_word)
+    return text
+
+
+def random_word(rng):
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 10)))
+
+
+def caption(rng, words, length=1024):
+    parts = []
+    while sum(len(p) + 1 for p in parts) < length:
+        parts.append(rng.choice(words) if rng.random() < 0.2 else random_word(rng))
+    return " ".join(parts)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        func(*args)
+    return (time.perf_counter() - start) / ROUNDS * 1e6
+
+
+def main():
+    rng = random.Random(7)
+    print(f"{'rules':>6}{'naive us':>12}{'compiled us':>14}{'compile ms':>12}{'speedup':>9}")
+    for count in (5, 10, 100, 1000):
+        # prefix-free rule words, so both engines agree on the output
+        words = sorted({"@" + random_word(rng) + "#" for _ in range(count)})
+        delete_words = set(words[: count // 2])
+        replacements = {word: random_word(rng) for word in words[count // 2:]}
+        text = caption(rng, words)
+
+        start = time.perf_counter()
+        rules = RuleSet(delete_words, replacements)
+        compile_ms = (time.perf_counter() - start) * 1000
+        assert rules.rewrite(text, "  ") == naive(text, delete_words, replacements, "  ")
+
+        naive_us = timed(naive, text, delete_words, replacements, "  ")
+        compiled_us = timed(rules.rewrite, text, "  ")
+        print(f"{count:>6}{naive_us:>12.1f}{compiled_us:>14.1f}{compile_ms:>12.2f}{naive_us / compiled_us:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -28,3 +28,62 @@ STRING = getenv("STRING", "BQEKjbEAtQhq7FYVGrBkaa4_YG7Ywc2IUbWxxFOBGPgTeBk-xtgy2
 YT_COOKIES = getenv("YT_COOKIES", YTUB_COOKIES)
 DEFAULT_SESSION = getenv("DEFAUL_SESSION", "BQEKjbEAtQhq7FYVGrBkaa4_YG7Ywc2IUbWxxFOBGPgTeBk-xtgy2l2vZn9Ago7l4LyRIPSkl4hgSqFixEX6W0AbgpwIGX1EeeCxRu1rFFjzd_J2zH-eyHKp-JOQdEBKRNIosloxMwm4ge7cx3T25B2kDW7v3RIhcpwJk2yGrD74scEC17e4Z-95TNnHfzaXOeT6brdeba5J_gPlkOS4KRaD89QP3ow_MbR_Z8mI28SSzJN-tc09brNX7vhq0dDx-x5Ahn60SAtxWJUqwZZyOvcQD7f1gDH4uoJhjepNLP-KcK6H2oqxpU7PpCrujCbwu1E4NaOI9kgFUHTpHxZMwJG9xPk83gAAAAGmklF5AA")  # added old method of invite link joining
 INSTA_COOKIES = getenv("INSTA_COOKIES", INST_COOKIES)
+SETTINGS_CACHE_SIZE = int(getenv("SETTINGS_CACHE_SIZE", "5000"))
+SETTINGS_CACHE_TTL = int(getenv("SETTINGS_CACHE_TTL", "600"))
+CHANNEL_REFRESH_INTERVAL = int(getenv("CHANNEL_REFRESH_INTERVAL", "300"))
+PREMIUM_REFRESH_INTERVAL = int(getenv("PREMIUM_REFRESH_INTERVAL", "60"))
+USERS_FLUSH_INTERVAL = int(getenv("USERS_FLUSH_INTERVAL", "5"))
+EXPIRY_MAX_SLEEP = int(getenv("EXPIRY_MAX_SLEEP", "3600"))
+EXPIRY_NOTIFY_RATE = int(getenv("EXPIRY_NOTIFY_RATE", "20"))
+USERBOT_POOL_SIZE = int(getenv("USERBOT_POOL_SIZE", "100"))
+USERBOT_IDLE_TIMEOUT = int(getenv("USERBOT_IDLE_TIMEOUT", "900"))
+USERBOT_EXPIRED_CACHE_SIZE = int(getenv("USERBOT_EXPIRED_CACHE_SIZE", "10000"))
+USERBOT_EXPIRED_TTL = int(getenv("USERBOT_EXPIRED_TTL", "3600"))
+BATCH_WORKERS_FREE = int(getenv("BATCH_WORKERS_FREE", "1"))
+BATCH_WORKERS_PREMIUM = int(getenv("BATCH_WORKERS_PREMIUM", "3"))
+BATCH_PREFETCH = int(getenv("BATCH_PREFETCH", "50"))
+BATCH_MAX_RETRIES = int(getenv("BATCH_MAX_RETRIES", "3"))
+STREAM_UPLOADS = getenv("STREAM_UPLOADS", "False").lower() == "true"
+STREAM_BUFFER_PARTS = int(getenv("STREAM_BUFFER_PARTS", "8"))
+STREAM_UPLOAD_WORKERS = int(getenv("STREAM_UPLOAD_WORKERS", "2"))
+MEDIA_CACHE_TTL = int(getenv("MEDIA_CACHE_TTL", str(30 * 86400)))
+PROGRESS_UPDATE_INTERVAL = int(getenv("PROGRESS_UPDATE_INTERVAL", "5"))
+PROGRESS_MAX_TRANSFERS = int(getenv("PROGRESS_MAX_TRANSFERS", "1000"))
+API_BOT_RATE = int(getenv("API_BOT_RATE", "25"))
+API_USER_RATE = int(getenv("API_USER_RATE", "5"))
+API_PRIVATE_CHAT_RATE = int(getenv("API_PRIVATE_CHAT_RATE", "1"))
+API_GROUP_CHAT_RATE = int(getenv("API_GROUP_CHAT_RATE", "20"))
+API_MAX_RETRIES = int(getenv("API_MAX_RETRIES", "3"))
+API_MAX_FLOOD_WAIT = int(getenv("API_MAX_FLOOD_WAIT", "300"))
+API_MAX_TRACKED_CHATS = int(getenv("API_MAX_TRACKED_CHATS", "10000"))
+PROBE_WORKERS = int(getenv("PROBE_WORKERS", "4"))
+PROBE_FFPROBE_CONCURRENCY = int(getenv("PROBE_FFPROBE_CONCURRENCY", "2"))
+PROBE_CACHE_SIZE = int(getenv("PROBE_CACHE_SIZE", "512"))
+THUMB_WORKERS = int(getenv("THUMB_WORKERS", "2"))
+THUMB_CACHE_SIZE = int(getenv("THUMB_CACHE_SIZE", "256"))
+THUMB_DIR = getenv("THUMB_DIR", "thumbs")
+THUMB_TIMEOUT = int(getenv("THUMB_TIMEOUT", "30"))
+JOB_STORE = getenv("JOB_STORE", "mongo")
+JOB_WORKERS = int(getenv("JOB_WORKERS", "50"))
+JOB_LEASE = int(getenv("JOB_LEASE", "60"))
+JOB_HEARTBEAT = int(getenv("JOB_HEARTBEAT", "15"))
+JOB_POLL_INTERVAL = int(getenv("JOB_POLL_INTERVAL", "2"))
+JOB_MAX_ATTEMPTS = int(getenv("JOB_MAX_ATTEMPTS", "5"))
+PROCESS_ROLE = getenv("PROCESS_ROLE", "all")  # all, ingress or worker
+WORKER_ID = getenv("WORKER_ID", getenv("DYNO", ""))
+PARALLEL_DOWNLOAD_MIN_SIZE = int(getenv("PARALLEL_DOWNLOAD_MIN_SIZE", str(20 * 1024 * 1024)))
+PARALLEL_DOWNLOAD_MAX_SESSIONS = int(getenv("PARALLEL_DOWNLOAD_MAX_SESSIONS", "8"))
+DOWNLOAD_CONNECTIONS_FREE = int(getenv("DOWNLOAD_CONNECTIONS_FREE", "2"))
+DOWNLOAD_CONNECTIONS_PREMIUM = int(getenv("DOWNLOAD_CONNECTIONS_PREMIUM", "6"))
+UPLOADER_SESSIONS = getenv("UPLOADER_SESSIONS", "").split()
+UPLOAD_CONNECTIONS = int(getenv("UPLOAD_CONNECTIONS", "4"))
+LOG_MIRROR_RATE = int(getenv("LOG_MIRROR_RATE", "20"))  # forward calls per minute
+LOG_MIRROR_SAMPLE = float(getenv("LOG_MIRROR_SAMPLE", "1.0"))
+LOG_MIRROR_BACKLOG = int(getenv("LOG_MIRROR_BACKLOG", "10000"))
+LOG_MIRROR_INTERVAL = int(getenv("LOG_MIRROR_INTERVAL", "3"))
+BROADCAST_CONCURRENCY = int(getenv("BROADCAST_CONCURRENCY", "20"))
+BROADCAST_CURSOR_BATCH = int(getenv("BROADCAST_CURSOR_BATCH", "1000"))
+BROADCAST_REPORT_INTERVAL = int(getenv("BROADCAST_REPORT_INTERVAL", "10"))
+METRICS_PORT = int(getenv("METRICS_PORT", "9100"))
+LOOP_LAG_INTERVAL = float(getenv("LOOP_LAG_INTERVAL", "0.5"))
+STATS_PUBLISH_INTERVAL = int(getenv("STATS_PUBLISH_INTERVAL", "30"))
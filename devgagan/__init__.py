@@ -1,11 +1,15 @@
 import asyncio
 import logging
+import os
 import time
 from pyrogram import Client
 from pyrogram.enums import ParseMode 
-from config import API_ID, API_HASH, BOT_TOKEN, STRING, MONGO_DB, DEFAULT_SESSION
+from config import API_ID, API_HASH, BOT_TOKEN, STRING, MONGO_DB, DEFAULT_SESSION, API_BOT_RATE, API_USER_RATE, PROCESS_ROLE, WORKER_ID
 from telethon.sync import TelegramClient
 from motor.motor_asyncio import AsyncIOMotorClient
+# imported before any Mongo client exists so its command listener sees all of them
+from devgagan.core import metrics
+from devgagan.core.scheduler import schedule_pyrogram, schedule_telethon
 
 loop = asyncio.new_event_loop()
 asyncio.set_event_loop(loop)
@@ -17,16 +21,31 @@ logging.basicConfig(
 
 botStartTime = time.time()
 
+if PROCESS_ROLE not in ("all", "ingress", "worker"):
+    raise SystemExit(f"Unknown PROCESS_ROLE {PROCESS_ROLE!r}, use all, ingress or worker")
+
+# ingress processes answer commands and enqueue jobs, worker processes only run the
+# transfers; "all" does both in one process like before
+handles_updates = PROCESS_ROLE != "worker"
+runs_jobs = PROCESS_ROLE != "ingress"
+
+# every worker logs the bot in with its own session files, several may share a host
+if PROCESS_ROLE == "worker":
+    session_suffix = f"-{WORKER_ID or os.getpid()}"
+else:
+    session_suffix = ""
+
 app = Client(
-    "pyrobot",
+    f"pyrobot{session_suffix}",
     api_id=API_ID,
     api_hash=API_HASH,
     bot_token=BOT_TOKEN,
     workers=50,
-    parse_mode=ParseMode.MARKDOWN
+    parse_mode=ParseMode.MARKDOWN,
+    no_updates=not handles_updates
 )
 
-sex = TelegramClient('sexrepo', API_ID, API_HASH).start(bot_token=BOT_TOKEN)
+sex = TelegramClient(f'sexrepo{session_suffix}', API_ID, API_HASH, receive_updates=handles_updates).start(bot_token=BOT_TOKEN)
 
 if STRING:
     pro = Client("ggbot", api_id=API_ID, api_hash=API_HASH, session_string=STRING)
@@ -39,7 +58,17 @@ if DEFAULT_SESSION:
 else:
     userrbot = None
 
-telethon_client = TelegramClient('telethon_session', API_ID, API_HASH).start(bot_token=BOT_TOKEN)
+telethon_client = TelegramClient(f'telethon_session{session_suffix}', API_ID, API_HASH, receive_updates=handles_updates).start(bot_token=BOT_TOKEN)
+
+# every outbound write goes through the per-account token buckets; both Telethon
+# clients log in with the same bot token as app, so the three share the "bot" scheduler
+schedule_pyrogram(app, "bot", API_BOT_RATE)
+schedule_telethon(sex, "bot", API_BOT_RATE)
+schedule_telethon(telethon_client, "bot", API_BOT_RATE)
+if pro:
+    schedule_pyrogram(pro, pro.name, API_USER_RATE)
+if userrbot:
+    schedule_pyrogram(userrbot, userrbot.name, API_USER_RATE)
 
 # MongoDB setup
 tclient = AsyncIOMotorClient(MONGO_DB)
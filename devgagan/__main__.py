@@ -1,24 +1,28 @@
 import asyncio
 import importlib
-import gc
 from pyrogram import idle
+from config import JOB_STORE, PROCESS_ROLE
+from devgagan import app, handles_updates, runs_jobs, pro
 from devgagan.modules import ALL_MODULES
-from devgagan.core.mongo.plans_db import check_and_remove_expired_users
-from aiojobs import create_scheduler
+from devgagan.core.mongo.plans_db import load_premium_index, refresh_premium_index
+from devgagan.core.expiry import expiry_scheduler
+from devgagan.core.userbot_pool import evict_idle_userbots
+from devgagan.core.mongo.users_db import load_known_users, flush_users, flush_users_loop
+from devgagan.core.mongo.media_cache_db import create_indexes as create_media_cache_indexes
+from devgagan.core.mongo.channels_db import load_protected_channels, refresh_protected_channels
+from devgagan.core.jobs import run_workers
+from devgagan.core.uploaders import start as start_uploaders
+from devgagan.core import log_mirror, metrics, process_stats
+from devgagan.core.broadcast import resume_broadcasts
 
 # ----------------------------Bot-Start---------------------------- #
 
 loop = asyncio.get_event_loop()
 
-# Function to schedule expiry checks
-async def schedule_expiry_check():
-    scheduler = await create_scheduler()
-    while True:
-        await scheduler.spawn(check_and_remove_expired_users())
-        await asyncio.sleep(60)  # Check every hour
-        gc.collect()
-
 async def devggn_boot():
+    if PROCESS_ROLE != "all" and JOB_STORE == "memory":
+        raise SystemExit("PROCESS_ROLE ingress/worker needs the shared mongo job store, unset JOB_STORE=memory")
+    # the plugins also register the job handlers, so workers import them too
     for all_module in ALL_MODULES:
         importlib.import_module("devgagan.modules." + all_module)
     print("""
@@ -37,9 +41,32 @@ async def devggn_boot():
 ---------------------------------------------------
 """)
 
-    asyncio.create_task(schedule_expiry_check())
-    print("Auto removal started ...")
+    await load_protected_channels()
+    await load_premium_index()
+    await load_known_users()
+    await create_media_cache_indexes()
+    asyncio.create_task(flush_users_loop())
+    asyncio.create_task(refresh_protected_channels())
+    asyncio.create_task(evict_idle_userbots())
+    asyncio.create_task(log_mirror.run(app))
+    asyncio.create_task(metrics.watch_loop_lag())
+    asyncio.create_task(process_stats.publish_loop())
+    await metrics.start_server()
+    if handles_updates:
+        # one scheduler per deployment, workers would send every reminder again
+        asyncio.create_task(expiry_scheduler())
+        print("Auto removal started ...")
+        await resume_broadcasts()
+    else:
+        # /add and /rem are handled by the ingress process
+        asyncio.create_task(refresh_premium_index())
+    if runs_jobs:
+        await start_uploaders(pro)
+        asyncio.create_task(run_workers())
+        print(f"Transfer worker started ({PROCESS_ROLE}) ...")
     await idle()
+    await flush_users()
+    await log_mirror.flush(app)
     print("Bot stopped...")
 
 
@@ -0,0 +1,134 @@
+# ---------------------------------------------------
+# File Name: batch.py
+# Description: A Pyrogram bot for downloading files from Telegram channels or groups
+#              and uploading them back to Telegram.
+# Author: Gagan
+# GitHub: https://github.com/devgaganin/
+# Telegram: https://t.me/team_spy_pro
+# YouTube: https://youtube.com/@dev_gagan
+# Created: 2025-01-11
+# Last Modified: 2025-01-11
+# Version: 2.0.5
+# License: MIT License
+# ---------------------------------------------------
+
+import asyncio
+import contextvars
+import time
+from pyrogram.errors import FloodWait
+from config import BATCH_PREFETCH, BATCH_MAX_RETRIES
+from devgagan.core.scheduler import bulk
+
+# (engine, index) of the batch item the current task is working on, None outside batches
+_current_item = contextvars.ContextVar("batch_item", default=None)
+
+
+class BatchEngine:
+    """Runs batch items on a few workers while keeping their delivery order.
+
+    Items download concurrently; each one calls `wait_turn()` right before it sends
+    anything to the target chat, so item N+1 downloads while item N uploads and the
+    output still lands in link order.
+    """
+
+    def __init__(self, workers=1):
+        self.workers = max(1, workers)
+        self.done = 0
+        # indexes of items given up on after BATCH_MAX_RETRIES FloodWaits
+        self.failed = []
+        self._next_turn = 0
+        self._finished = set()
+        self._turn_changed = asyncio.Condition()
+        self._messages = {}
+        self._prefetch_lock = asyncio.Lock()
+        self._paused_until = 0
+
+    @property
+    def delivered(self):
+        """Number of leading items that are finished, i.e. the resume point of the batch."""
+        return self._next_turn
+
+    async def wait_turn(self, index):
+        async with self._turn_changed:
+            await self._turn_changed.wait_for(lambda: self._next_turn >= index)
+
+    async def _finish(self, index):
+        async with self._turn_changed:
+            self._finished.add(index)
+            while self._next_turn in self._finished:
+                self._finished.discard(self._next_turn)
+                self._next_turn += 1
+            self._turn_changed.notify_all()
+
+    async def get_message(self, userbot, chat, msg_id):
+        key = (chat, msg_id)
+        if key not in self._messages:
+            async with self._prefetch_lock:
+                if key not in self._messages:
+                    try:
+                        ids = list(range(msg_id, msg_id + BATCH_PREFETCH))
+                        for msg in await userbot.get_messages(chat, ids):
+                            self._messages[(chat, msg.id)] = msg
+                    except Exception as e:
+                        print(f"Error prefetching messages: {e}")
+        msg = self._messages.pop(key, None)
+        return msg if msg is not None else await userbot.get_messages(chat, msg_id)
+
+    async def _pace(self):
+        # every worker of the batch honours the longest FloodWait seen so far
+        delay = self._paused_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def _run_item(self, index, link, process):
+        for attempt in range(BATCH_MAX_RETRIES + 1):
+            await self._pace()
+            try:
+                return await process(link)
+            except FloodWait as fw:
+                print(f"FloodWait of {fw.value}s on batch item {index}")
+                self._paused_until = max(self._paused_until, time.monotonic() + fw.value)
+        print(f"Giving up batch item {index} after {BATCH_MAX_RETRIES} retries")
+        self.failed.append(index)
+
+    async def run(self, links, process, should_continue, on_done=None):
+        items = enumerate(links)
+
+        async def worker():
+            with bulk():
+                await work()
+
+        async def work():
+            # workers share one iterator, so items are handed out strictly in order
+            for index, link in items:
+                if not should_continue():
+                    break
+                token = _current_item.set((self, index))
+                try:
+                    await self._run_item(index, link, process)
+                except Exception as e:
+                    print(f"Error in batch item {index}: {e}")
+                finally:
+                    _current_item.reset(token)
+                    await self._finish(index)
+                    self.done += 1
+                if on_done:
+                    await on_done(self.done)
+
+        await asyncio.gather(*(worker() for _ in range(self.workers)))
+        self._messages.clear()
+
+
+async def wait_turn():
+    """Block until every earlier item of the running batch has been delivered."""
+    item = _current_item.get()
+    if item:
+        engine, index = item
+        await engine.wait_turn(index)
+
+
+async def fetch_message(userbot, chat, msg_id):
+    item = _current_item.get()
+    if item:
+        return await item[0].get_message(userbot, chat, msg_id)
+    return await userbot.get_messages(chat, msg_id)
@@ -0,0 +1,192 @@
+# ---------------------------------------------------
+# File Name: broadcast.py
+# Description: A Pyrogram bot for downloading files from Telegram channels or groups
+#              and uploading them back to Telegram.
+# Author: Gagan
+# GitHub: https://github.com/devgaganin/
+# Telegram: https://t.me/team_spy_pro
+# YouTube: https://youtube.com/@dev_gagan
+# Created: 2025-01-11
+# Last Modified: 2025-01-11
+# Version: 2.0.5
+# License: MIT License
+# ---------------------------------------------------
+
+import asyncio
+import time
+from collections import deque
+from pyrogram.errors import FloodWait, InputUserDeactivated, UserIsBlocked
+from config import BROADCAST_CONCURRENCY, BROADCAST_REPORT_INTERVAL
+from devgagan import app
+from devgagan.core.mongo import broadcast_db, users_db
+from devgagan.core.scheduler import bulk
+
+# broadcast id -> Broadcast running in this process
+running = {}
+
+
+class Broadcast:
+    """One /gcast or /acast run; recipients stream from Mongo in ascending user id.
+
+    Sends finish out of order, so the checkpoint is the highest user id below which every
+    recipient is settled; a resumed run starts right after it. The counters saved with it
+    cover exactly those recipients, so a resumed run neither loses nor recounts a send.
+    """
+
+    def __init__(self, doc):
+        self.doc = doc
+        self.id = doc["_id"]
+        self.sent = doc["sent"]
+        self.failed = doc["failed"]
+        self.inactive = doc["inactive"]
+        self.last_user = doc["last_user"]
+        # counts up to last_user, what a checkpoint stores
+        self.settled = {"sent": self.sent, "failed": self.failed, "inactive": self.inactive}
+        self.total = None
+        self._dispatched = deque()
+        # user id -> outcome, for users settled after one still in flight
+        self._settled = {}
+        # user id -> reason, written to users_db with the next checkpoint
+        self._unreachable = {}
+        self._started = time.monotonic()
+        self._sent_at_start = self.sent
+        self._last_report = 0
+
+    def rate(self):
+        elapsed = time.monotonic() - self._started
+        return (self.sent - self._sent_at_start) / elapsed if elapsed > 0 else 0.0
+
+    def _settle(self, user, outcome):
+        self._settled[user] = outcome
+        while self._dispatched and self._dispatched[0] in self._settled:
+            self.last_user = self._dispatched.popleft()
+            self.settled[self._settled.pop(self.last_user)] += 1
+
+    async def _send(self, user):
+        doc = self.doc
+        if doc["mode"] == "forward":
+            await app.forward_messages(user, doc["from_chat_id"], doc["message_id"])
+            return
+        sent = await app.copy_message(user, doc["from_chat_id"], doc["message_id"])
+        if doc.get("pin"):
+            try:
+                await sent.pin()
+            except Exception:
+                try:
+                    await sent.pin(both_sides=True)
+                except Exception:
+                    pass
+
+    async def _deliver(self, user, slots):
+        outcome = "failed"
+        try:
+            for attempt in range(2):
+                try:
+                    await self._send(user)
+                    self.sent += 1
+                    outcome = "sent"
+                    return
+                except FloodWait as e:
+                    # the scheduler already paced and retried; this is a long wait, sit it out once
+                    await asyncio.sleep(e.value)
+                except UserIsBlocked:
+                    self._unreachable[user] = "blocked"
+                    self.inactive += 1
+                    outcome = "inactive"
+                    return
+                except InputUserDeactivated:
+                    self._unreachable[user] = "deactivated"
+                    self.inactive += 1
+                    outcome = "inactive"
+                    return
+                except Exception as e:
+                    print(f"Error broadcasting to {user}: {e}")
+                    break
+            self.failed += 1
+        finally:
+            self._settle(user, outcome)
+            slots.release()
+
+    def summary(self, final=False):
+        title = "**sᴜᴄᴄᴇssғᴜʟʟʏ ʙʀᴏᴀᴅᴄᴀsᴛɪɴɢ ✅**" if final else "**ʙʀᴏᴀᴅᴄᴀsᴛɪɴɢ...**"
+        done = self.sent + self.failed + self.inactive
+        return (
+            f"{title}\n\n"
+            f"**Progress:** `{done}/{self.total or '?'}`\n"
+            f"**Sent:** `{self.sent}`\n"
+            f"**Failed:** `{self.failed}`\n"
+            f"**Blocked/Deleted:** `{self.inactive}`\n"
+            f"**Rate:** `{self.rate():.1f}/s`"
+        )
+
+    async def report(self, final=False):
+        self._last_report = time.monotonic()
+        unreachable, self._unreachable = self._unreachable, {}
+        try:
+            await users_db.mark_inactive(unreachable)
+            await broadcast_db.checkpoint(
+                self.id, self.last_user, self.settled["sent"], self.settled["failed"], self.settled["inactive"]
+            )
+        except Exception as e:
+            self._unreachable.update(unreachable)
+            print(f"Error saving broadcast checkpoint: {e}")
+        try:
+            await app.edit_message_text(self.doc["status_chat_id"], self.doc["status_msg_id"], self.summary(final))
+        except Exception:
+            pass
+
+    async def run(self):
+        self.total = self.sent + self.failed + self.inactive + await users_db.count_users(self.last_user)
+        slots = asyncio.Semaphore(BROADCAST_CONCURRENCY)
+        tasks = set()
+        # queued behind interactive traffic in the account scheduler
+        with bulk():
+            async for user in users_db.iter_users(self.last_user):
+                await slots.acquire()
+                self._dispatched.append(user)
+                task = asyncio.create_task(self._deliver(user, slots))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                if time.monotonic() - self._last_report >= BROADCAST_REPORT_INTERVAL:
+                    await self.report()
+            if tasks:
+                await asyncio.gather(*tasks)
+        await self.report(final=True)
+        await broadcast_db.finish(self.id)
+
+
+async def _run(broadcast):
+    running[broadcast.id] = broadcast
+    try:
+        await broadcast.run()
+    except Exception as e:
+        print(f"Error in broadcast {broadcast.id}: {e}")
+    finally:
+        running.pop(broadcast.id, None)
+
+
+async def start(mode, from_chat_id, message_id, status_msg, pin=False):
+    """Record a broadcast and run it in the background; `mode` is "copy" or "forward"."""
+    doc = await broadcast_db.create({
+        "mode": mode,
+        "from_chat_id": from_chat_id,
+        "message_id": message_id,
+        "pin": pin,
+        "status_chat_id": status_msg.chat.id,
+        "status_msg_id": status_msg.id
+    })
+    asyncio.create_task(_run(Broadcast(doc)))
+
+
+async def resume_broadcasts():
+    """Continue broadcasts a previous process left unfinished, from their checkpoints."""
+    for doc in await broadcast_db.unfinished():
+        print(f"Resuming broadcast {doc['_id']} after user {doc['last_user']}")
+        asyncio.create_task(_run(Broadcast(doc)))
+
+
+def stats():
+    return {str(broadcast.id): {"sent": broadcast.sent, "failed": broadcast.failed,
+                                "inactive": broadcast.inactive, "total": broadcast.total,
+                                "rate": broadcast.rate()}
+            for broadcast in running.values()}
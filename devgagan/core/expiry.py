@@ -0,0 +1,86 @@
+# ---------------------------------------------------
+# File Name: expiry.py
+# Description: A Pyrogram bot for downloading files from Telegram channels or groups
+#              and uploading them back to Telegram.
+# Author: Gagan
+# GitHub: https://github.com/devgaganin/
+# Telegram: https://t.me/team_spy_pro
+# YouTube: https://youtube.com/@dev_gagan
+# Created: 2025-01-11
+# Last Modified: 2025-01-11
+# Version: 2.0.5
+# License: MIT License
+# ---------------------------------------------------
+
+import asyncio
+import datetime
+import gc
+from pyrogram.errors import FloodWait
+from devgagan import app
+from devgagan.core.mongo import plans_db
+from devgagan.core.scheduler import bulk
+from config import EXPIRY_MAX_SLEEP, EXPIRY_NOTIFY_RATE
+
+GET_USERS_CHUNK = 200
+
+
+async def resolve_names(user_ids):
+    """Look up first names with one get_users call per chunk instead of one per user."""
+    names = {}
+    user_ids = list(user_ids)
+    for i in range(0, len(user_ids), GET_USERS_CHUNK):
+        try:
+            users = await app.get_users(user_ids[i:i + GET_USERS_CHUNK])
+        except Exception as e:
+            print(f"Error resolving users: {e}")
+            continue
+        for user in users:
+            names[user.id] = user.first_name
+    return names
+
+
+async def notify_expired(user_ids, names):
+    with bulk():
+        await _notify(user_ids, names)
+
+
+async def _notify(user_ids, names):
+    for user_id in user_ids:
+        name = names.get(user_id, "there")
+        try:
+            await app.send_message(user_id, text=f"Hello {name}, your premium subscription has expired.")
+        except FloodWait as fw:
+            await asyncio.sleep(fw.value)
+        except Exception:
+            pass
+        await asyncio.sleep(1 / EXPIRY_NOTIFY_RATE)
+
+
+async def run_expiry_check():
+    """Remove every due plan and notify its owner in the background; returns (removed ids, names)."""
+    removed = await plans_db.check_and_remove_expired_users()
+    names = {}
+    if removed:
+        names = await resolve_names(removed)
+        asyncio.create_task(notify_expired(removed, names))
+    return removed, names
+
+
+async def expiry_scheduler():
+    while True:
+        try:
+            await run_expiry_check()
+        except Exception as e:
+            print(f"Error while removing expired users: {e}")
+        gc.collect()
+
+        # sleep until the earliest deadline, or until a new plan with an earlier one is added
+        plans_db.expiry_changed.clear()
+        timeout = EXPIRY_MAX_SLEEP
+        deadline = plans_db.next_expiry()
+        if deadline:
+            timeout = min(max((deadline - datetime.datetime.now()).total_seconds(), 0), EXPIRY_MAX_SLEEP)
+        try:
+            await asyncio.wait_for(plans_db.expiry_changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
@@ -16,15 +16,16 @@ import math
 import time , re
 from pyrogram import enums
 from config import CHANNEL_ID, OWNER_ID 
-from devgagan.core.mongo.plans_db import premium_users
+from devgagan.core.mongo.plans_db import is_premium
+from devgagan.core.progress import report, sample_rate
+from devgagan.core.probe import probe
+from devgagan.core import thumbnails, metrics
 from pyrogram.types import InlineKeyboardButton, InlineKeyboardMarkup
-import cv2
 from pyrogram.errors import FloodWait, InviteHashInvalid, InviteHashExpired, UserAlreadyParticipant, UserNotParticipant
 from datetime import datetime as dt
 import asyncio, subprocess, re, os, time
 async def chk_user(message, user_id):
-    user = await premium_users()
-    if user_id in user or user_id in OWNER_ID:
+    if is_premium(user_id) or user_id in OWNER_ID:
         return 0
     else:
         return 1
@@ -88,38 +89,31 @@ PROGRESS_BAR = """\n
 │ **__ETA:__** {4}
 ╰─────────────────────╯
 """
-async def progress_bar(current, total, ud_type, message, start):
-
-    now = time.time()
-    diff = now - start
-    if round(diff % 10.00) == 0 or current == total:
-
-        percentage = current * 100 / total
-        speed = current / diff
-        elapsed_time = round(diff) * 1000
-        time_to_completion = round((total - current) / speed) * 1000
-        estimated_total_time = elapsed_time + time_to_completion
-
-        elapsed_time = TimeFormatter(milliseconds=elapsed_time)
-        estimated_total_time = TimeFormatter(milliseconds=estimated_total_time)
-
-        progress = "{0}{1}".format(
-            ''.join(["█" for i in range(math.floor(percentage / 10))]),
-            ''.join(["▒" for i in range(10 - math.floor(percentage / 10))]))
-
-        tmp = progress + PROGRESS_BAR.format( 
-            round(percentage, 2),
-            humanbytes(current),
-            humanbytes(total),
-            humanbytes(speed),
+def render_progress(current, total, ud_type, start):
+    diff = max(time.time() - start, 0.001)
+    percentage = current * 100 / total
+    speed = current / diff
+    elapsed_time = round(diff) * 1000
+    time_to_completion = round((total - current) / speed) * 1000 if speed else 0
+    estimated_total_time = TimeFormatter(milliseconds=elapsed_time + time_to_completion)
+
+    progress = "{0}{1}".format(
+        ''.join(["█" for i in range(math.floor(percentage / 10))]),
+        ''.join(["▒" for i in range(10 - math.floor(percentage / 10))]))
+
+    tmp = progress + PROGRESS_BAR.format( 
+        round(percentage, 2),
+        humanbytes(current),
+        humanbytes(total),
+        humanbytes(speed),
+
+        estimated_total_time if estimated_total_time != '' else "0 s"
+    )
+    return "{}\n│ {}".format(ud_type, tmp)
 
-            estimated_total_time if estimated_total_time != '' else "0 s"
-        )
-        try:
-            await message.edit(
-                text="{}\n│ {}".format(ud_type, tmp),)             
-        except:
-            pass
+async def progress_bar(current, total, ud_type, message, start):
+    # frames are coalesced per chat by the progress service, rendering happens only when sent
+    report(message, lambda: render_progress(current, total, ud_type, start), final=current == total)
 
 def humanbytes(size):
     if not size:
@@ -174,75 +168,68 @@ def get_link(string):
             return False
     except Exception:
         return False
-def video_metadata(file):
-    default_values = {'width': 1, 'height': 1, 'duration': 1}
-    try:
-        vcap = cv2.VideoCapture(file)
-        if not vcap.isOpened():
-            return default_values  
-
-        width = round(vcap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = round(vcap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        fps = vcap.get(cv2.CAP_PROP_FPS)
-        frame_count = vcap.get(cv2.CAP_PROP_FRAME_COUNT)
-
-        if fps <= 0:
-            return default_values  
-
-        duration = round(frame_count / fps)
-        if duration <= 0:
-            return default_values  
-
-        vcap.release()
-        return {'width': width, 'height': height, 'duration': duration}
-
-    except Exception as e:
-        print(f"Error in video_metadata: {e}")
-        return default_values
+async def video_metadata(file):
+    # container headers are parsed in a worker thread, ffprobe only when they are not enough
+    with metrics.timed("probe"):
+        return await probe(file)
 
 def hhmmss(seconds):
     return time.strftime('%H:%M:%S',time.gmtime(seconds))
 
-async def screenshot(video, duration, sender):
-    if os.path.exists(f'{sender}.jpg'):
-        return f'{sender}.jpg'
-    time_stamp = hhmmss(int(duration)/2)
-    out = dt.now().isoformat("_", "seconds") + ".jpg"
-    cmd = ["ffmpeg",
-           "-ss",
-           f"{time_stamp}", 
-           "-i",
-           f"{video}",
-           "-frames:v",
-           "1", 
-           f"{out}",
-           "-y"
-          ]
-    process = await asyncio.create_subprocess_exec(
-        *cmd,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE
-    )
-    stdout, stderr = await process.communicate()
-    x = stderr.decode().strip()
-    y = stdout.decode().strip()
-    if os.path.isfile(out):
-        return out
-    else:
-        None  
-last_update_time = time.time()
-async def progress_callback(current, total, progress_message):
+async def screenshot(video, duration, sender, key=None):
+    thumb_path = await thumbnails.custom(sender)
+    if thumb_path:
+        return thumb_path
+    with metrics.timed("thumbnail"):
+        return await thumbnails.generate(video, duration, key)
+
+def source_metadata(msg):
+    """Width, height and duration the source video message already carries, None when incomplete."""
+    media = msg.video or msg.animation
+    if media and media.width and media.height and media.duration:
+        return {'width': media.width, 'height': media.height, 'duration': media.duration}
+    return None
+
+async def source_thumbnail(client, msg):
+    # the largest stored thumb is a few KB, far cheaper than decoding a frame
+    media = msg.video or msg.document or msg.audio or msg.animation
+    thumbs = getattr(media, "thumbs", None)
+    if not thumbs:
+        return None
+    thumb = max(thumbs, key=lambda t: (t.width or 0) * (t.height or 0))
+    return await client.download_media(thumb.file_id, file_name=f"thumb_{thumb.file_unique_id}_{msg.id}.jpg")
+
+async def media_attributes(file, sender, source=None):
+    """(metadata, thumb_path) for an upload; `source` is the (client, message) the file came from.
+
+    Whatever the source message carries is used as is, the file itself is only probed
+    or screenshotted for the parts that are missing.
+    """
+    client, msg = source or (None, None)
+    metadata = source_metadata(msg) if msg else None
+    if metadata is None:
+        metadata = await video_metadata(file)
+    thumb_path = await thumbnails.custom(sender)
+    if thumb_path is None and msg:
+        try:
+            thumb_path = await source_thumbnail(client, msg)
+        except Exception as e:
+            print(f"Error downloading source thumbnail: {e}")
+    if thumb_path is None:
+        try:
+            media = msg and (msg.video or msg.document or msg.animation)
+            thumb_path = await screenshot(file, metadata['duration'], sender, getattr(media, "file_unique_id", None))
+        except Exception:
+            thumb_path = None
+    return metadata, thumb_path
+def render_upload_progress(current, total):
     percent = (current / total) * 100
-    global last_update_time
-    current_time = time.time()
-
-    if current_time - last_update_time >= 10 or percent % 10 == 0:
-        completed_blocks = int(percent // 10)
-        remaining_blocks = 10 - completed_blocks
-        progress_bar = "█" * completed_blocks + "▒" * remaining_blocks
-        current_mb = current / (1024 * 1024)  
-        total_mb = total / (1024 * 1024)      
-        await progress_message.edit(
+    completed_blocks = int(percent // 10)
+    remaining_blocks = 10 - completed_blocks
+    progress_bar = "█" * completed_blocks + "▒" * remaining_blocks
+    current_mb = current / (1024 * 1024)  
+    total_mb = total / (1024 * 1024)      
+    return (
     f"╭──────────────────╮\n"
     f"│        **__Uploading...__**       \n"
     f"├──────────\n"
@@ -251,39 +238,30 @@ async def progress_callback(current, total, progress_message):
     f"│ **__Uploaded:__** {current_mb:.2f} MB / {total_mb:.2f} MB\n"
     f"╰──────────────────╯\n\n"
     f"**__Powered by @ProToppers__**"
-        )
-
-        last_update_time = current_time
-async def prog_bar(current, total, ud_type, message, start):
-
-    now = time.time()
-    diff = now - start
-    if round(diff % 10.00) == 0 or current == total:
-
-        percentage = current * 100 / total
-        speed = current / diff
-        elapsed_time = round(diff) * 1000
-        time_to_completion = round((total - current) / speed) * 1000
-        estimated_total_time = elapsed_time + time_to_completion
-
-        elapsed_time = TimeFormatter(milliseconds=elapsed_time)
-        estimated_total_time = TimeFormatter(milliseconds=estimated_total_time)
-
-        progress = "{0}{1}".format(
-            ''.join(["█" for i in range(math.floor(percentage / 10))]),
-            ''.join(["▒" for i in range(10 - math.floor(percentage / 10))]))
-
-        tmp = progress + PROGRESS_BAR.format( 
-            round(percentage, 2),
-            humanbytes(current),
-            humanbytes(total),
-            humanbytes(speed),
-
-            estimated_total_time if estimated_total_time != '' else "0 s"
-        )
-        try:
-            await message.edit_text(
-                text="{}\n│ {}".format(ud_type, tmp),)             
-
-        except:
-            pass
+    )
+async def progress_callback(current, total, progress_message):
+    report(progress_message, lambda: render_upload_progress(current, total), final=current == total)
+prog_bar = progress_bar
+def render_transfer(done, total, key, title, eta_label="ETA"):
+    """SpyLib-style frame; speed comes from the previous frame of the same transfer."""
+    percent = (done / total) * 100
+    completed_blocks = int(percent // 10)
+    remaining_blocks = 10 - completed_blocks
+    progress_bar = "█" * completed_blocks + "▒" * remaining_blocks
+    done_mb = done / (1024 * 1024)
+    total_mb = total / (1024 * 1024)
+    speed_bps = sample_rate(key, done, total)
+    speed_mbps = (speed_bps * 8) / (1024 * 1024)
+    remaining_time_min = ((total - done) / speed_bps) / 60 if speed_bps > 0 else 0
+    return (
+        f"╭──────────────────╮\n"
+        f"│     {title}       \n"
+        f"├──────────\n"
+        f"│ {progress_bar}\n\n"
+        f"│ **__Progress:__** {percent:.2f}%\n"
+        f"│ **__Done:__** {done_mb:.2f} MB / {total_mb:.2f} MB\n"
+        f"│ **__Speed:__** {speed_mbps:.2f} Mbps\n"
+        f"│ **__{eta_label}:__** {remaining_time_min:.2f} min\n"
+        f"╰──────────────────╯\n\n"
+        f"**__Powered by @ProToppers__**"
+    )
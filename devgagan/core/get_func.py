@@ -20,76 +20,57 @@ import os
 import re
 from typing import Callable
 from devgagan import app
-import aiofiles
 from devgagan import sex as gf
 from telethon.tl.types import DocumentAttributeVideo, Message
 from telethon.sessions import StringSession
-import pymongo
 from pyrogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from pyrogram.errors import ChannelBanned, ChannelInvalid, ChannelPrivate, ChatIdInvalid, ChatInvalid
 from pyrogram.enums import MessageMediaType, ParseMode
 from devgagan.core.func import *
-from pyrogram.errors import RPCError
+from pyrogram.errors import RPCError, FloodWait
 from pyrogram.types import Message
-from config import MONGO_DB as MONGODB_CONNECTION_STRING, LOG_GROUP, OWNER_ID, STRING, API_ID, API_HASH
+from config import MONGO_DB as MONGODB_CONNECTION_STRING, LOG_GROUP, OWNER_ID, STRING, API_ID, API_HASH, STREAM_UPLOADS, DOWNLOAD_CONNECTIONS_FREE, DOWNLOAD_CONNECTIONS_PREMIUM
 from devgagan.core.mongo import db as odb
+from devgagan.core.mongo import settings_db, media_cache_db
+from devgagan.core import userbot_pool
+from devgagan.core.batch import wait_turn, fetch_message
+from devgagan.core.split import file_parts
+from devgagan.core.stream import stream_upload, can_stream
+from devgagan.core.progress import ThrottledMessage, finish
+from devgagan.core import thumbnails, rewrite, parallel_download, uploaders, log_mirror, metrics
+from devgagan.core.html_caption import markdown_to_html
+from devgagan.core.mongo.channels_db import is_protected, add_protected_channel
 from telethon import TelegramClient, events, Button
 from devgagantools import fast_upload
 
-def thumbnail(sender):
-    return f'{sender}.jpg' if os.path.exists(f'{sender}.jpg') else None
-
-# MongoDB database name and collection name
-DB_NAME = "smart_users"
-COLLECTION_NAME = "super_user"
+async def thumbnail(sender):
+    return await thumbnails.custom(sender)
 
 VIDEO_EXTENSIONS = ['mp4', 'mov', 'avi', 'mkv', 'flv', 'wmv', 'webm', 'mpg', 'mpeg', '3gp', 'ts', 'm4v', 'f4v', 'vob']
 DOCUMENT_EXTENSIONS = ['pdf', 'docs']
 
-mongo_app = pymongo.MongoClient(MONGODB_CONNECTION_STRING)
-db = mongo_app[DB_NAME]
-collection = db[COLLECTION_NAME]
-
-if STRING:
-    from devgagan import pro
-    print("App imported from devgagan.")
-else:
-    pro = None
-    print("STRING is not available. 'app' is set to None.")
     
 async def fetch_upload_method(user_id):
     """Fetch the user's preferred upload method."""
-    user_data = collection.find_one({"user_id": user_id})
-    return user_data.get("upload_method", "Pyrogram") if user_data else "Pyrogram"
+    return await load_user_data(user_id, "upload_method", "Pyrogram")
 
 async def format_caption_to_html(caption: str) -> str:
-    caption = re.sub(r"^> (.*)", r"<blockquote>\1</blockquote>", caption, flags=re.MULTILINE)
-    caption = re.sub(r"```(.*?)```", r"<pre>\1</pre>", caption, flags=re.DOTALL)
-    caption = re.sub(r"`(.*?)`", r"<code>\1</code>", caption)
-    caption = re.sub(r"\*\*(.*?)\*\*", r"<b>\1</b>", caption)
-    caption = re.sub(r"\*(.*?)\*", r"<b>\1</b>", caption)
-    caption = re.sub(r"__(.*?)__", r"<i>\1</i>", caption)
-    caption = re.sub(r"_(.*?)_", r"<i>\1</i>", caption)
-    caption = re.sub(r"~~(.*?)~~", r"<s>\1</s>", caption)
-    caption = re.sub(r"\|\|(.*?)\|\|", r"<details>\1</details>", caption)
-    caption = re.sub(r"\[(.*?)\]\((.*?)\)", r'<a href="\2">\1</a>', caption)
-    return caption.strip() if caption else None
-    
+    return markdown_to_html(caption)
+
 
 
-async def upload_media(sender, target_chat_id, file, caption, edit, topic_id):
+async def upload_media(sender, target_chat_id, file, caption, edit, topic_id, source=None):
+    dm = None
+    thumb_path = None
     try:
         upload_method = await fetch_upload_method(sender)  # Fetch the upload method (Pyrogram or Telethon)
-        metadata = video_metadata(file)
+        metadata, thumb_path = await media_attributes(file, sender, source)
         width, height, duration = metadata['width'], metadata['height'], metadata['duration']
-        try:
-            thumb_path = await screenshot(file, duration, sender)
-        except Exception:
-            thumb_path = None
 
         video_formats = {'mp4', 'mkv', 'avi', 'mov'}
         document_formats = {'pdf', 'docx', 'txt', 'epub'}
         image_formats = {'jpg', 'png', 'jpeg'}
+        started = time.monotonic()
 
         # Pyrogram upload
         if upload_method == "Pyrogram":
@@ -107,7 +88,7 @@ async def upload_media(sender, target_chat_id, file, caption, edit, topic_id):
                     progress=progress_bar,
                     progress_args=("╭─────────────────────╮\n│      **__Pyro Uploader__**\n├─────────────────────", edit, time.time())
                 )
-                await dm.copy(LOG_GROUP)
+                log_mirror.mirror(dm)
                 
             elif file.split('.')[-1].lower() in image_formats:
                 dm = await app.send_photo(
@@ -119,7 +100,7 @@ async def upload_media(sender, target_chat_id, file, caption, edit, topic_id):
                     reply_to_message_id=topic_id,
                     progress_args=("╭─────────────────────╮\n│      **__Pyro Uploader__**\n├─────────────────────", edit, time.time())
                 )
-                await dm.copy(LOG_GROUP)
+                log_mirror.mirror(dm)
             else:
                 dm = await app.send_document(
                     chat_id=target_chat_id,
@@ -131,8 +112,7 @@ async def upload_media(sender, target_chat_id, file, caption, edit, topic_id):
                     parse_mode=ParseMode.MARKDOWN,
                     progress_args=("╭─────────────────────╮\n│      **__Pyro Uploader__**\n├─────────────────────", edit, time.time())
                 )
-                await asyncio.sleep(2)
-                await dm.copy(LOG_GROUP)
+                log_mirror.mirror(dm)
 
         # Telethon upload
         elif upload_method == "Telethon":
@@ -141,11 +121,12 @@ async def upload_media(sender, target_chat_id, file, caption, edit, topic_id):
             caption = await format_caption_to_html(caption)
             uploaded = await fast_upload(
                 gf, file,
-                reply=progress_message,
+                reply=ThrottledMessage(progress_message),
                 name=None,
-                progress_bar_function=lambda done, total: progress_callback(done, total, sender),
+                progress_bar_function=lambda done, total: progress_callback(done, total, (sender, progress_message.id)),
                 user_id=sender
             )
+            finish(progress_message)
             await progress_message.delete()
 
             attributes = [
@@ -157,7 +138,7 @@ async def upload_media(sender, target_chat_id, file, caption, edit, topic_id):
                 )
             ] if file.split('.')[-1].lower() in video_formats else []
 
-            await gf.send_file(
+            sent = await gf.send_file(
                 target_chat_id,
                 uploaded,
                 caption=caption,
@@ -166,33 +147,28 @@ async def upload_media(sender, target_chat_id, file, caption, edit, topic_id):
                 parse_mode='html',
                 thumb=thumb_path
             )
-            await gf.send_file(
-                LOG_GROUP,
-                uploaded,
-                caption=caption,
-                attributes=attributes,
-                parse_mode='html',
-                thumb=thumb_path
-            )
+            log_mirror.mirror(sent)
 
+        elapsed = time.monotonic() - started
+        metrics.observe_stage("upload", elapsed)
+        metrics.record_transfer("upload", os.path.getsize(file), elapsed, "app" if upload_method == "Pyrogram" else "sex")
         os.remove(file)
     except Exception as e:
         await app.send_message(LOG_GROUP, f"**Upload Failed:** {str(e)}")
         print(f"Error during media upload: {e}")
 
     finally:
-        if thumb_path and os.path.exists(thumb_path):
-            if os.path.basename(thumb_path) != f"{sender}.jpg":  # Check if the filename is not {sender}.jpg
-                os.remove(thumb_path)
+        thumbnails.discard(thumb_path, sender)
         gc.collect()
+    return dm
 
 
 async def get_msg(userbot, sender, edit_id, msg_link, i, message):
+    resolve_started = time.monotonic()
     try:
         # Sanitize the message link
         msg_link = msg_link.split("?single")[0]
         chat, msg_id = None, None
-        saved_channel_ids = load_saved_channel_ids()
         size_limit = 2 * 1024 * 1024 * 1024  # 1.99 GB size limit
         file = ''
         edit = ''
@@ -206,7 +182,7 @@ async def get_msg(userbot, sender, edit_id, msg_link, i, message):
                 chat = int('-100' + parts[parts.index('c') + 1])
                 msg_id = int(parts[-1]) + i
 
-            if chat in saved_channel_ids:
+            if is_protected(chat):
                 await app.edit_message_text(
                     message.chat.id, edit_id,
                     "Sorry! This channel is protected by **__@UncleChipssBot__**."
@@ -237,63 +213,79 @@ async def get_msg(userbot, sender, edit_id, msg_link, i, message):
             await edit.delete(2)
             return
             
+        metrics.observe_stage("resolve", time.monotonic() - resolve_started)
         # Fetch the target message
-        msg = await userbot.get_messages(chat, msg_id)
+        with metrics.timed("fetch"):
+            msg = await fetch_message(userbot, chat, msg_id)
         if msg.service or msg.empty:
             await app.delete_messages(sender, edit_id)
             return
 
-        target_chat_id = user_chat_ids.get(message.chat.id, message.chat.id)
+        target_chat_id = await get_user_chat_id(message.chat.id)
         topic_id = None
         if '/' in str(target_chat_id):
             target_chat_id, topic_id = map(int, target_chat_id.split('/', 1))
 
         # Handle different message types
         if msg.media == MessageMediaType.WEB_PAGE_PREVIEW:
-            await clone_message(app, msg, target_chat_id, topic_id, edit_id, LOG_GROUP)
+            await wait_turn()
+            await clone_message(app, msg, target_chat_id, topic_id, edit_id)
             return
 
         if msg.text:
-            await clone_text_message(app, msg, target_chat_id, topic_id, edit_id, LOG_GROUP)
+            await wait_turn()
+            await clone_text_message(app, msg, target_chat_id, topic_id, edit_id)
             return
 
         if msg.sticker:
-            await handle_sticker(app, msg, target_chat_id, topic_id, edit_id, LOG_GROUP)
+            await wait_turn()
+            await handle_sticker(app, msg, target_chat_id, topic_id, edit_id)
             return
 
         
         # Handle file media (photo, document, video)
         file_size = get_message_file_size(msg)
 
-        # if file_size and file_size > size_limit and pro is None:
+        # if file_size and file_size > size_limit and not uploaders.available():
         #     await app.edit_message_text(sender, edit_id, "**❌ 4GB Uploader not found**")
         #     return
 
         file_name = await get_media_filename(msg)
+
+        # Same source file already uploaded by the bot: resend it by file_id
+        cache_key = await media_cache_key(msg, file_name, sender)
+        if cache_key and await deliver_from_cache(cache_key, msg, sender, target_chat_id, topic_id):
+            return
+
         edit = await app.edit_message_text(sender, edit_id, "**Downloading...**")
 
+        # Pass-through: upload while downloading when size and metadata are known up front
+        if STREAM_UPLOADS and can_stream(msg, file_size, size_limit) and await fetch_upload_method(sender) == "Pyrogram":
+            if await stream_media_message(userbot, msg, sender, target_chat_id, file_name, edit, topic_id, cache_key):
+                return
+
         # Download media
-        file = await userbot.download_media(
-            msg,
-            file_name=file_name,
-            progress=progress_bar,
-            progress_args=("╭─────────────────────╮\n│      **__Downloading__...**\n├─────────────────────", edit, time.time())
-        )
+        free_check = await chk_user(message, sender)
+        file = await download_message_media(userbot, msg, file_size, free_check, edit, file_name)
         
         caption = await get_final_caption(msg, sender)
 
         # Rename file
-        file = await rename_file(file, sender)
+        with metrics.timed("rename"):
+            file = await rename_file(file, sender)
+        await wait_turn()
         if msg.audio:
             result = await app.send_audio(target_chat_id, file, caption=caption, reply_to_message_id=topic_id)
-            await result.copy(LOG_GROUP)
+            await remember_upload(cache_key, result)
+            log_mirror.mirror(result)
             await edit.delete(2)
             os.remove(file)
             return
         
         if msg.voice:
             result = await app.send_voice(target_chat_id, file, reply_to_message_id=topic_id)
-            await result.copy(LOG_GROUP)
+            await remember_upload(cache_key, result)
+            log_mirror.mirror(result)
             await edit.delete(2)
             os.remove(file)
             return
@@ -301,31 +293,35 @@ async def get_msg(userbot, sender, edit_id, msg_link, i, message):
 
         if msg.video_note:
             result = await app.send_video_note(target_chat_id, file, reply_to_message_id=topic_id)
-            await result.copy(LOG_GROUP)
+            await remember_upload(cache_key, result)
+            log_mirror.mirror(result)
             await edit.delete(2)
             os.remove(file)
             return
 
         if msg.photo:
             result = await app.send_photo(target_chat_id, file, caption=caption, reply_to_message_id=topic_id)
-            await result.copy(LOG_GROUP)
+            await remember_upload(cache_key, result)
+            log_mirror.mirror(result)
             await edit.delete(2)
             os.remove(file)
             return
 
         # Upload media
         # await edit.edit("**Checking file...**")
-        if file_size > size_limit and (free_check == 1 or pro is None):
+        if file_size > size_limit and (free_check == 1 or not uploaders.available()):
             await edit.delete()
             await split_and_upload_file(app, sender, target_chat_id, file, caption, topic_id)
             return
         elif file_size > size_limit:
-            await handle_large_file(file, sender, edit, caption)
+            await remember_upload(cache_key, await handle_large_file(file, sender, edit, caption, (userbot, msg)))
         else:
-            await upload_media(sender, target_chat_id, file, caption, edit, topic_id)
+            await remember_upload(cache_key, await upload_media(sender, target_chat_id, file, caption, edit, topic_id, (userbot, msg)))
 
     except (ChannelBanned, ChannelInvalid, ChannelPrivate, ChatIdInvalid, ChatInvalid):
         await app.edit_message_text(sender, edit_id, "Have you joined the channel?")
+    except FloodWait:
+        raise
     except Exception as e:
         # await app.edit_message_text(sender, edit_id, f"Failed to save: `{msg_link}`\n\nError: {str(e)}")
         print(f"Error: {e}")
@@ -336,23 +332,127 @@ async def get_msg(userbot, sender, edit_id, msg_link, i, message):
         if edit:
             await edit.delete(2)
         
-async def clone_message(app, msg, target_chat_id, topic_id, edit_id, log_group):
+async def download_message_media(userbot, msg, file_size, free_check, edit, file_name=None):
+    """Fetch large documents over parallel media connections, the rest with download_media."""
+    progress_args = ("╭─────────────────────╮\n│      **__Downloading__...**\n├─────────────────────", edit, time.time())
+    started = time.monotonic()
+    file = None
+    if parallel_download.can_download(msg, file_size):
+        connections = DOWNLOAD_CONNECTIONS_FREE if free_check == 1 else DOWNLOAD_CONNECTIONS_PREMIUM
+        try:
+            file = await parallel_download.download(userbot, msg, file_name, connections, progress_bar, progress_args)
+        except FloodWait:
+            raise
+        except Exception as e:
+            print(f"Error in parallel download, retrying with a single connection: {e}")
+    if file is None and file_name:
+        file = await userbot.download_media(msg, file_name=file_name, progress=progress_bar, progress_args=progress_args)
+    elif file is None:
+        file = await userbot.download_media(msg, progress=progress_bar, progress_args=progress_args)
+    elapsed = time.monotonic() - started
+    metrics.observe_stage("download", elapsed)
+    metrics.record_transfer("download", file_size, elapsed, "userbot")
+    return file
+
+
+async def media_cache_key(msg, file_name, sender):
+    media = getattr(msg, msg.media.value, None) if msg.media else None
+    if not file_name or not media or not getattr(media, "file_unique_id", None):
+        return None
+    new_file_name = os.path.basename(await build_file_name(file_name, sender))
+    return media_cache_db.cache_key(media.file_unique_id, new_file_name, sender if await thumbnail(sender) else None)
+
+
+async def remember_upload(cache_key, result):
+    if not cache_key or result is None:
+        return
+    try:
+        await media_cache_db.store(cache_key, result)
+    except Exception as e:
+        print(f"Error caching upload: {e}")
+
+
+async def send_cached_media(entry, target_chat_id, caption, topic_id):
+    media_type = entry["media_type"]
+    kwargs = {"reply_to_message_id": topic_id}
+    if media_type not in ("voice", "video_note"):
+        kwargs["caption"] = caption
+    send = getattr(app, f"send_{media_type}")
+    return await send(target_chat_id, entry["file_id"], **kwargs)
+
+
+async def deliver_from_cache(cache_key, msg, sender, target_chat_id, topic_id):
+    """Zero-byte delivery of an already uploaded copy, False on a miss or a stale file_id."""
+    try:
+        entry = await media_cache_db.lookup(cache_key)
+    except Exception as e:
+        print(f"Error reading media cache: {e}")
+        return False
+    if not entry:
+        return False
+    caption = await get_final_caption(msg, sender)
+    await wait_turn()
+    try:
+        result = await send_cached_media(entry, target_chat_id, caption, topic_id)
+    except FloodWait:
+        raise
+    except Exception as e:
+        print(f"Cached file_id rejected, uploading again: {e}")
+        await media_cache_db.forget(cache_key)
+        return False
+    log_mirror.mirror(result)
+    return True
+
+
+async def stream_media_message(userbot, msg, sender, target_chat_id, file_name, edit, topic_id, cache_key=None):
+    """Stream msg's media straight to the target chat, False means fall back to the disk path."""
+    thumb_path = await thumbnail(sender)
+    source_thumb = None
+    try:
+        if not thumb_path and msg.video and msg.video.thumbs:
+            source_thumb = thumb_path = await userbot.download_media(msg.video.thumbs[0].file_id)
+        caption = await get_final_caption(msg, sender)
+        new_file_name = await build_file_name(file_name, sender)
+        started = time.monotonic()
+        result = await stream_upload(
+            userbot, app, msg, target_chat_id, new_file_name, caption, topic_id, thumb_path,
+            before_send=wait_turn,
+            progress=progress_bar,
+            progress_args=("╭─────────────────────╮\n│      **__Stream Uploader__**\n├─────────────────────", edit, time.time())
+        )
+    except FloodWait:
+        raise
+    except Exception as e:
+        print(f"Streaming failed, falling back to download: {e}")
+        return False
+    finally:
+        if source_thumb and os.path.exists(source_thumb):
+            os.remove(source_thumb)
+    # both directions ran at once over the same bytes
+    elapsed = time.monotonic() - started
+    metrics.record_transfer("download", get_message_file_size(msg), elapsed, "userbot")
+    metrics.record_transfer("upload", get_message_file_size(msg), elapsed)
+    await remember_upload(cache_key, result)
+    log_mirror.mirror(result)
+    return True
+
+async def clone_message(app, msg, target_chat_id, topic_id, edit_id):
     edit = await app.edit_message_text(target_chat_id, edit_id, "Cloning...")
     devgaganin = await app.send_message(target_chat_id, msg.text.markdown, reply_to_message_id=topic_id)
-    await devgaganin.copy(log_group)
+    log_mirror.mirror(devgaganin)
     await edit.delete()
 
-async def clone_text_message(app, msg, target_chat_id, topic_id, edit_id, log_group):
+async def clone_text_message(app, msg, target_chat_id, topic_id, edit_id):
     edit = await app.edit_message_text(target_chat_id, edit_id, "Cloning text message...")
     devgaganin = await app.send_message(target_chat_id, msg.text.markdown, reply_to_message_id=topic_id)
-    await devgaganin.copy(log_group)
+    log_mirror.mirror(devgaganin)
     await edit.delete()
 
 
-async def handle_sticker(app, msg, target_chat_id, topic_id, edit_id, log_group):
+async def handle_sticker(app, msg, target_chat_id, topic_id, edit_id):
     edit = await app.edit_message_text(target_chat_id, edit_id, "Handling sticker...")
     result = await app.send_sticker(target_chat_id, msg.sticker.file_id, reply_to_message_id=topic_id)
-    await result.copy(log_group)
+    log_mirror.mirror(result)
     await edit.delete()
 
 
@@ -381,12 +481,10 @@ async def get_final_caption(msg, sender):
     else:
         original_caption = ""
     
-    custom_caption = get_user_caption_preference(sender)
+    custom_caption = await get_user_caption_preference(sender)
     final_caption = f"{original_caption}\n\n{custom_caption}" if custom_caption else original_caption
-    replacements = load_replacement_words(sender)
-    for word, replace_word in replacements.items():
-        final_caption = final_caption.replace(word, replace_word)
-        
+    final_caption = (await load_rules(sender)).replace(final_caption)
+
     return final_caption if final_caption else None
 
 
@@ -420,15 +518,15 @@ async def download_user_stories(userbot, chat_id, msg_id, edit, sender):
         await edit.edit(f"Error: {e}")
         
 async def copy_message_with_chat_id(app, userbot, sender, chat_id, message_id, edit):
-    target_chat_id = user_chat_ids.get(sender, sender)
+    target_chat_id = await get_user_chat_id(sender)
     file = None
     result = None
     size_limit = 2 * 1024 * 1024 * 1024  # 2 GB size limit
 
     try:
         msg = await app.get_messages(chat_id, message_id)
-        custom_caption = get_user_caption_preference(sender)
-        final_caption = format_caption(msg.caption or '', sender, custom_caption)
+        custom_caption = await get_user_caption_preference(sender)
+        final_caption = await format_caption(msg.caption or '', sender, custom_caption)
 
         # Parse target_chat_id and topic_id
         topic_id = None
@@ -437,9 +535,11 @@ async def copy_message_with_chat_id(app, userbot, sender, chat_id, message_id, e
 
         # Handle different media types
         if msg.media:
+            await wait_turn()
             result = await send_media_message(app, target_chat_id, msg, final_caption, topic_id)
             return
         elif msg.text:
+            await wait_turn()
             result = await app.copy_message(target_chat_id, chat_id, message_id, reply_to_message_id=topic_id)
             return
 
@@ -458,30 +558,28 @@ async def copy_message_with_chat_id(app, userbot, sender, chat_id, message_id, e
                 return
 
             if msg.text:
+                await wait_turn()
                 await app.send_message(target_chat_id, msg.text.markdown, reply_to_message_id=topic_id)
                 return
 
-            final_caption = format_caption(msg.caption.markdown if msg.caption else "", sender, custom_caption)
-            file = await userbot.download_media(
-                msg,
-                progress=progress_bar,
-                progress_args=("╭─────────────────────╮\n│      **__Downloading__...**\n├─────────────────────", edit, time.time())
-            )
+            final_caption = await format_caption(msg.caption.markdown if msg.caption else "", sender, custom_caption)
+            file = await download_message_media(userbot, msg, get_message_file_size(msg), await chk_user(chat_id, sender), edit)
             file = await rename_file(file, sender)
+            await wait_turn()
 
             if msg.photo:
                 result = await app.send_photo(target_chat_id, file, caption=final_caption, reply_to_message_id=topic_id)
             elif msg.video or msg.document:
                 freecheck = await chk_user(chat_id, sender)
                 file_size = get_message_file_size(msg)
-                if file_size > size_limit and (freecheck == 1 or pro is None):
+                if file_size > size_limit and (freecheck == 1 or not uploaders.available()):
                     await edit.delete()
                     await split_and_upload_file(app, sender, target_chat_id, file, caption, topic_id)
                     return       
                 elif file_size > size_limit:
-                    await handle_large_file(file, sender, edit, final_caption)
+                    await handle_large_file(file, sender, edit, final_caption, (userbot, msg))
                     return
-                await upload_media(sender, target_chat_id, file, final_caption, edit, topic_id)
+                await upload_media(sender, target_chat_id, file, final_caption, edit, topic_id, (userbot, msg))
             elif msg.audio:
                 result = await app.send_audio(target_chat_id, file, caption=final_caption, reply_to_message_id=topic_id)
             elif msg.voice:
@@ -491,6 +589,8 @@ async def copy_message_with_chat_id(app, userbot, sender, chat_id, message_id, e
             else:
                 await edit.edit("Unsupported media type.")
 
+    except FloodWait:
+        raise
     except Exception as e:
         print(f"Error : {e}")
         pass
@@ -518,15 +618,9 @@ async def send_media_message(app, target_chat_id, msg, caption, topic_id):
     return await app.copy_message(target_chat_id, msg.chat.id, msg.id, reply_to_message_id=topic_id)
     
 
-def format_caption(original_caption, sender, custom_caption):
-    delete_words = load_delete_words(sender)
-    replacements = load_replacement_words(sender)
-
+async def format_caption(original_caption, sender, custom_caption):
     # Remove and replace words in the caption
-    for word in delete_words:
-        original_caption = original_caption.replace(word, '  ')
-    for word, replace_word in replacements.items():
-        original_caption = original_caption.replace(word, replace_word)
+    original_caption = (await load_rules(sender)).rewrite(original_caption, '  ')
 
     # Append custom caption if available
     return f"{original_caption}\n\n__**{custom_caption}**__" if custom_caption else original_caption
@@ -534,67 +628,70 @@ def format_caption(original_caption, sender, custom_caption):
     
 # ------------------------ Button Mode Editz FOR SETTINGS ----------------------------
 
-# Define a dictionary to store user chat IDs
-user_chat_ids = {}
-
-def load_user_data(user_id, key, default_value=None):
+async def load_user_data(user_id, key, default_value=None):
     try:
-        user_data = collection.find_one({"_id": user_id})
-        return user_data.get(key, default_value) if user_data else default_value
+        return await settings_db.get_setting(user_id, key, default_value)
     except Exception as e:
         print(f"Error loading {key}: {e}")
         return default_value
 
-def load_saved_channel_ids():
-    saved_channel_ids = set()
+async def save_user_data(user_id, key, value):
     try:
-        # Retrieve channel IDs from MongoDB collection
-        for channel_doc in collection.find({"channel_id": {"$exists": True}}):
-            saved_channel_ids.add(channel_doc["channel_id"])
+        await settings_db.set_setting(user_id, key, value)
     except Exception as e:
-        print(f"Error loading saved channel IDs: {e}")
-    return saved_channel_ids
+        print(f"Error saving {key}: {e}")
 
-def save_user_data(user_id, key, value):
+
+# Delete and replacement word functions
+async def load_rules(user_id):
     try:
-        collection.update_one(
-            {"_id": user_id},
-            {"$set": {key: value}},
-            upsert=True
-        )
+        return await rewrite.get_rules(user_id)
     except Exception as e:
-        print(f"Error saving {key}: {e}")
+        print(f"Error loading rewrite rules: {e}")
+        return rewrite.RuleSet()
 
+async def load_delete_words(user_id):
+    return set(await load_user_data(user_id, "delete_words", []))
 
-# Delete and replacement word functions
-load_delete_words = lambda user_id: set(load_user_data(user_id, "delete_words", []))
-save_delete_words = lambda user_id, words: save_user_data(user_id, "delete_words", list(words))
+async def save_delete_words(user_id, words):
+    await save_user_data(user_id, "delete_words", list(words))
+
+async def load_replacement_words(user_id):
+    return dict(await load_user_data(user_id, "replacement_words", {}))
 
-load_replacement_words = lambda user_id: load_user_data(user_id, "replacement_words", {})
-save_replacement_words = lambda user_id, replacements: save_user_data(user_id, "replacement_words", replacements)
+async def save_replacement_words(user_id, replacements):
+    await save_user_data(user_id, "replacement_words", replacements)
 
 # User session functions
-def load_user_session(user_id):
-    return load_user_data(user_id, "session")
+async def load_user_session(user_id):
+    return await load_user_data(user_id, "session")
 
 # Upload preference functions
-set_dupload = lambda user_id, value: save_user_data(user_id, "dupload", value)
-get_dupload = lambda user_id: load_user_data(user_id, "dupload", False)
+async def set_dupload(user_id, value):
+    await save_user_data(user_id, "dupload", value)
 
-# User preferences storage
-user_rename_preferences = {}
-user_caption_preferences = {}
+async def get_dupload(user_id):
+    return await load_user_data(user_id, "dupload", False)
+
+# Target chat, rename and caption preferences live in settings_db, so a job run by
+# any process delivers with the settings the user made through the bot
+async def set_user_chat_id(user_id, chat_id):
+    await save_user_data(user_id, "chat_id", chat_id)
+
+async def get_user_chat_id(user_id):
+    return await load_user_data(user_id, "chat_id", user_id)
 
-# Rename and caption preference functions
 async def set_rename_command(user_id, custom_rename_tag):
-    user_rename_preferences[str(user_id)] = custom_rename_tag
+    await save_user_data(user_id, "rename_tag", custom_rename_tag)
 
-get_user_rename_preference = lambda user_id: user_rename_preferences.get(str(user_id), '@ProToppers')
+async def get_user_rename_preference(user_id):
+    return await load_user_data(user_id, "rename_tag", '@ProToppers')
 
 async def set_caption_command(user_id, custom_caption):
-    user_caption_preferences[str(user_id)] = custom_caption
+    await save_user_data(user_id, "caption", custom_caption)
 
-get_user_caption_preference = lambda user_id: user_caption_preferences.get(str(user_id), '')
+async def get_user_caption_preference(user_id):
+    return await load_user_data(user_id, "caption", '')
 
 # Initialize the dictionary to store user sessions
 
@@ -662,6 +759,7 @@ async def callback_query_handler(event):
         
     elif event.data == b'logout':
         await odb.remove_session(user_id)
+        await userbot_pool.discard(user_id)
         user_data = await odb.get_data(user_id)
         if user_data and user_data.get("session") is None:
             await event.respond("Logged out and deleted session successfully.")
@@ -678,8 +776,7 @@ async def callback_query_handler(event):
 
     elif event.data == b'uploadmethod':
         # Retrieve the user's current upload method (default to Pyrogram)
-        user_data = collection.find_one({'user_id': user_id})
-        current_method = user_data.get('upload_method', 'Pyrogram') if user_data else 'Pyrogram'
+        current_method = await fetch_upload_method(user_id)
         pyrogram_check = " ✅" if current_method == "Pyrogram" else ""
         telethon_check = " ✅" if current_method == "Telethon" else ""
 
@@ -691,51 +788,26 @@ async def callback_query_handler(event):
         await event.edit("Choose your preferred upload method:\n\n__**Note:** **SpyLib ⚡**, built on Telethon(base), by Team SPY still in beta.__", buttons=buttons)
 
     elif event.data == b'pyrogram':
-        save_user_upload_method(user_id, "Pyrogram")
+        await save_user_upload_method(user_id, "Pyrogram")
         await event.edit("Upload method set to **Pyrogram** ✅")
 
     elif event.data == b'telethon':
-        save_user_upload_method(user_id, "Telethon")
+        await save_user_upload_method(user_id, "Telethon")
         await event.edit("Upload method set to **SpyLib ⚡\n\nThanks for choosing this library as it will help me to analyze the error raise issues on github.** ✅")        
         
     elif event.data == b'reset':
         try:
-            user_id_str = str(user_id)
-            
-            collection.update_one(
-                {"_id": user_id},
-                {"$unset": {
-                    "delete_words": "",
-                    "replacement_words": "",
-                    "watermark_text": "",
-                    "duration_limit": ""
-                }}
-            )
-            
-            collection.update_one(
-                {"user_id": user_id},
-                {"$unset": {
-                    "delete_words": "",
-                    "replacement_words": "",
-                    "watermark_text": "",
-                    "duration_limit": ""
-                }}
-            )            
-            user_chat_ids.pop(user_id, None)
-            user_rename_preferences.pop(user_id_str, None)
-            user_caption_preferences.pop(user_id_str, None)
-            thumbnail_path = f"{user_id}.jpg"
-            if os.path.exists(thumbnail_path):
-                os.remove(thumbnail_path)
+            # also clears the chat id, rename tag, caption and thumbnail
+            await settings_db.reset_settings(user_id)
+            await thumbnails.remove_custom(user_id)
             await event.respond("✅ Reset successfully, to logout click /logout")
         except Exception as e:
             await event.respond(f"Error clearing delete list: {e}")
     
     elif event.data == b'remthumb':
-        try:
-            os.remove(f'{user_id}.jpg')
+        if await thumbnails.remove_custom(user_id):
             await event.respond('Thumbnail removed successfully!')
-        except FileNotFoundError:
+        else:
             await event.respond("No thumbnail found to remove.")
     
 
@@ -744,10 +816,9 @@ async def save_thumbnail(event):
     user_id = event.sender_id  # Use event.sender_id as user_id
 
     if event.photo:
-        temp_path = await event.download_media()
-        if os.path.exists(f'{user_id}.jpg'):
-            os.remove(f'{user_id}.jpg')
-        os.rename(temp_path, f'./{user_id}.jpg')
+        # kept in Mongo, every host that uploads for the user copies it from there
+        data = await event.download_media(file=bytes)
+        await settings_db.set_thumbnail(user_id, data)
         await event.respond('Thumbnail saved successfully!')
 
     else:
@@ -756,13 +827,9 @@ async def save_thumbnail(event):
     # Remove user from pending photos dictionary in both cases
     pending_photos.pop(user_id, None)
 
-def save_user_upload_method(user_id, method):
+async def save_user_upload_method(user_id, method):
     # Save or update the user's preferred upload method
-    collection.update_one(
-        {'user_id': user_id},  # Query
-        {'$set': {'upload_method': method}},  # Update
-        upsert=True  # Create a new document if one doesn't exist
-    )
+    await settings_db.set_upload_method(user_id, method)
 
 @gf.on(events.NewMessage)
 async def handle_user_input(event):
@@ -773,7 +840,7 @@ async def handle_user_input(event):
         if session_type == 'setchat':
             try:
                 chat_id = event.text
-                user_chat_ids[user_id] = chat_id
+                await set_user_chat_id(user_id, chat_id)
                 await event.respond("Chat ID set successfully!")
             except ValueError:
                 await event.respond("Invalid chat ID!")
@@ -794,13 +861,13 @@ async def handle_user_input(event):
                 await event.respond("Usage: 'WORD(s)' 'REPLACEWORD'")
             else:
                 word, replace_word = match.groups()
-                delete_words = load_delete_words(user_id)
+                delete_words = await load_delete_words(user_id)
                 if word in delete_words:
                     await event.respond(f"The word '{word}' is in the delete set and cannot be replaced.")
                 else:
-                    replacements = load_replacement_words(user_id)
+                    replacements = await load_replacement_words(user_id)
                     replacements[word] = replace_word
-                    save_replacement_words(user_id, replacements)
+                    await save_replacement_words(user_id, replacements)
                     await event.respond(f"Replacement saved: '{word}' will be replaced with '{replace_word}'")
 
         elif session_type == 'addsession':
@@ -810,9 +877,9 @@ async def handle_user_input(event):
                 
         elif session_type == 'deleteword':
             words_to_delete = event.message.text.split()
-            delete_words = load_delete_words(user_id)
+            delete_words = await load_delete_words(user_id)
             delete_words.update(words_to_delete)
-            save_delete_words(user_id, delete_words)
+            await save_delete_words(user_id, delete_words)
             await event.respond(f"Words added to delete list: {', '.join(words_to_delete)}")
                
             
@@ -832,38 +899,35 @@ async def lock_command_handler(event):
     
     # Save the channel ID to the MongoDB database
     try:
-        # Insert the channel ID into the collection
-        collection.insert_one({"channel_id": channel_id})
+        # Insert the channel ID into the collection and the in-memory index
+        await add_protected_channel(channel_id)
         await event.respond(f"Channel ID {channel_id} locked successfully.")
     except Exception as e:
         await event.respond(f"Error occurred while locking channel ID: {str(e)}")
 
 
-async def handle_large_file(file, sender, edit, caption):
-    if pro is None:
+async def handle_large_file(file, sender, edit, caption, source=None):
+    if not uploaders.available():
         await edit.edit('**__ ❌ 4GB trigger not found__**')
         os.remove(file)
         gc.collect()
         return
     
     dm = None
+    result = None
     
     print("4GB connector found.")
     await edit.edit('**__ ✅ 4GB trigger connected...__**\n\n')
     
-    target_chat_id = user_chat_ids.get(sender, sender)
+    target_chat_id = await get_user_chat_id(sender)
     file_extension = str(file).split('.')[-1].lower()
-    metadata = video_metadata(file)
+    metadata, thumb_path = await media_attributes(file, sender, source)
     duration = metadata['duration']
     width = metadata['width']
     height = metadata['height']
-    try:
-        thumb_path = await screenshot(file, duration, sender)
-    except Exception:
-        thumb_path = None
-    try:
+    async def send(uploader):
         if file_extension in VIDEO_EXTENSIONS:
-            dm = await pro.send_video(
+            return await uploader.send_video(
                 LOG_GROUP,
                 video=file,
                 caption=caption,
@@ -878,20 +942,23 @@ async def handle_large_file(file, sender, edit, caption):
                     time.time()
                 )
             )
-        else:
-            # Send as document
-            dm = await pro.send_document(
-                LOG_GROUP,
-                document=file,
-                caption=caption,
-                thumb=thumb_path,
-                progress=progress_bar,
-                progress_args=(
-                    "╭─────────────────────╮\n│      **__4GB Uploader ⚡__**\n├─────────────────────",
-                    edit,
-                    time.time()
-                )
+        # Send as document
+        return await uploader.send_document(
+            LOG_GROUP,
+            document=file,
+            caption=caption,
+            thumb=thumb_path,
+            progress=progress_bar,
+            progress_args=(
+                "╭─────────────────────╮\n│      **__4GB Uploader ⚡__**\n├─────────────────────",
+                edit,
+                time.time()
             )
+        )
+
+    try:
+        # goes to whichever premium session is expected to finish it first
+        dm = await uploaders.upload(send, os.path.getsize(file))
 
         from_chat = dm.chat.id
         msg_id = dm.id
@@ -902,7 +969,7 @@ async def handle_large_file(file, sender, edit, caption):
                     [InlineKeyboardButton("💎 Get Premium to Forward", url="https://t.me/kingofpatal")]
                 ]
             )
-            await app.copy_message(
+            result = await app.copy_message(
                 target_chat_id,
                 from_chat,
                 msg_id,
@@ -911,7 +978,7 @@ async def handle_large_file(file, sender, edit, caption):
             )
         else:
             # Simple copy without protect_content or reply_markup
-            await app.copy_message(
+            result = await app.copy_message(
                 target_chat_id,
                 from_chat,
                 msg_id
@@ -923,13 +990,19 @@ async def handle_large_file(file, sender, edit, caption):
     finally:
         await edit.delete()
         os.remove(file)
+        thumbnails.discard(thumb_path, sender)
         gc.collect()
-        return
+        return result
 
 async def rename_file(file, sender):
-    delete_words = load_delete_words(sender)
-    custom_rename_tag = get_user_rename_preference(sender)
-    replacements = load_replacement_words(sender)
+    new_file_name = await build_file_name(file, sender)
+    await asyncio.to_thread(os.rename, file, new_file_name)
+    return new_file_name
+
+
+async def build_file_name(file, sender):
+    rules = await load_rules(sender)
+    custom_rename_tag = await get_user_rename_preference(sender)
     
     last_dot_index = str(file).rfind('.')
     
@@ -950,15 +1023,9 @@ async def rename_file(file, sender):
         original_file_name = str(file)
         file_extension = 'mp4'
         
-    for word in delete_words:
-        original_file_name = original_file_name.replace(word, "")
+    original_file_name = rules.rewrite(original_file_name)
 
-    for word, replace_word in replacements.items():
-        original_file_name = original_file_name.replace(word, replace_word)
-
-    new_file_name = f"{original_file_name} {custom_rename_tag}.{file_extension}"
-    await asyncio.to_thread(os.rename, file, new_file_name)
-    return new_file_name
+    return f"{original_file_name} {custom_rename_tag}.{file_extension}"
 
 
 async def sanitize(file_name: str) -> str:
@@ -977,132 +1044,12 @@ async def is_file_size_exceeding(file_path, size_limit):
         return False
 
 
-user_progress = {}
-
-def progress_callback(done, total, user_id):
-    # Check if this user already has progress tracking
-    if user_id not in user_progress:
-        user_progress[user_id] = {
-            'previous_done': 0,
-            'previous_time': time.time()
-        }
-    
-    # Retrieve the user's tracking data
-    user_data = user_progress[user_id]
-    
-    # Calculate the percentage of progress
-    percent = (done / total) * 100
-    
-    # Format the progress bar
-    completed_blocks = int(percent // 10)
-    remaining_blocks = 10 - completed_blocks
-    progress_bar = "█" * completed_blocks + "▒" * remaining_blocks
-    
-    # Convert done and total to MB for easier reading
-    done_mb = done / (1024 * 1024)  # Convert bytes to MB
-    total_mb = total / (1024 * 1024)
-    
-    # Calculate the upload speed (in bytes per second)
-    speed = done - user_data['previous_done']
-    elapsed_time = time.time() - user_data['previous_time']
-    
-    if elapsed_time > 0:
-        speed_bps = speed / elapsed_time  # Speed in bytes per second
-        speed_mbps = (speed_bps * 8) / (1024 * 1024)  # Speed in Mbps
-    else:
-        speed_mbps = 0
-    
-    # Estimated time remaining (in seconds)
-    if speed_bps > 0:
-        remaining_time = (total - done) / speed_bps
-    else:
-        remaining_time = 0
-    
-    # Convert remaining time to minutes
-    remaining_time_min = remaining_time / 60
-    
-    # Format the final output as needed
-    final = (
-        f"╭──────────────────╮\n"
-        f"│     **__SpyLib ⚡ Uploader__**       \n"
-        f"├──────────\n"
-        f"│ {progress_bar}\n\n"
-        f"│ **__Progress:__** {percent:.2f}%\n"
-        f"│ **__Done:__** {done_mb:.2f} MB / {total_mb:.2f} MB\n"
-        f"│ **__Speed:__** {speed_mbps:.2f} Mbps\n"
-        f"│ **__ETA:__** {remaining_time_min:.2f} min\n"
-        f"╰──────────────────╯\n\n"
-        f"**__Powered by @ProToppers__**"
-    )
-    
-    # Update tracking variables for the user
-    user_data['previous_done'] = done
-    user_data['previous_time'] = time.time()
-    
-    return final
+def progress_callback(done, total, key):
+    return render_transfer(done, total, key, "**__SpyLib ⚡ Uploader__**")
 
 
-def dl_progress_callback(done, total, user_id):
-    # Check if this user already has progress tracking
-    if user_id not in user_progress:
-        user_progress[user_id] = {
-            'previous_done': 0,
-            'previous_time': time.time()
-        }
-    
-    # Retrieve the user's tracking data
-    user_data = user_progress[user_id]
-    
-    # Calculate the percentage of progress
-    percent = (done / total) * 100
-    
-    # Format the progress bar
-    completed_blocks = int(percent // 10)
-    remaining_blocks = 10 - completed_blocks
-    progress_bar = "█" * completed_blocks + "▒" * remaining_blocks
-    
-    # Convert done and total to MB for easier reading
-    done_mb = done / (1024 * 1024)  # Convert bytes to MB
-    total_mb = total / (1024 * 1024)
-    
-    # Calculate the upload speed (in bytes per second)
-    speed = done - user_data['previous_done']
-    elapsed_time = time.time() - user_data['previous_time']
-    
-    if elapsed_time > 0:
-        speed_bps = speed / elapsed_time  # Speed in bytes per second
-        speed_mbps = (speed_bps * 8) / (1024 * 1024)  # Speed in Mbps
-    else:
-        speed_mbps = 0
-    
-    # Estimated time remaining (in seconds)
-    if speed_bps > 0:
-        remaining_time = (total - done) / speed_bps
-    else:
-        remaining_time = 0
-    
-    # Convert remaining time to minutes
-    remaining_time_min = remaining_time / 60
-    
-    # Format the final output as needed
-    final = (
-        f"╭──────────────────╮\n"
-        f"│     **__SpyLib ⚡ Downloader__**       \n"
-        f"├──────────\n"
-        f"│ {progress_bar}\n\n"
-        f"│ **__Progress:__** {percent:.2f}%\n"
-        f"│ **__Done:__** {done_mb:.2f} MB / {total_mb:.2f} MB\n"
-        f"│ **__Speed:__** {speed_mbps:.2f} Mbps\n"
-        f"│ **__ETA:__** {remaining_time_min:.2f} min\n"
-        f"╰──────────────────╯\n\n"
-        f"**__Powered by @ProToppers__**"
-    )
-    
-    # Update tracking variables for the user
-    user_data['previous_done'] = done
-    user_data['previous_time'] = time.time()
-    
-    return final
+def dl_progress_callback(done, total, key):
+    return render_transfer(done, total, key, "**__SpyLib ⚡ Downloader__**")
 
 # split function .... ?( to handle gareeb bot coder jo string n lga paaye)
 
@@ -1113,34 +1060,17 @@ async def split_and_upload_file(app, sender, target_chat_id, file_path, caption,
 
     file_size = os.path.getsize(file_path)
     start = await app.send_message(sender, f"ℹ️ File size: {file_size / (1024 * 1024):.2f} MB")
-    PART_SIZE =  1.9 * 1024 * 1024 * 1024
-
-    part_number = 0
-    async with aiofiles.open(file_path, mode="rb") as f:
-        while True:
-            chunk = await f.read(PART_SIZE)
-            if not chunk:
-                break
 
-            # Create part filename
-            base_name, file_ext = os.path.splitext(file_path)
-            part_file = f"{base_name}.part{str(part_number).zfill(3)}{file_ext}"
-
-            # Write part to file
-            async with aiofiles.open(part_file, mode="wb") as part_f:
-                await part_f.write(chunk)
-
-            # Uploading part
+    # Each part is streamed straight from its offset in the original file
+    for part_number, part in file_parts(file_path):
+        with part:
             edit = await app.send_message(target_chat_id, f"⬆️ Uploading part {part_number + 1}...")
             part_caption = f"{caption} \n\n**Part : {part_number + 1}**"
-            await app.send_document(target_chat_id, document=part_file, caption=part_caption, reply_to_message_id=topic_id,
+            await app.send_document(target_chat_id, document=part, file_name=part.name, caption=part_caption, reply_to_message_id=topic_id,
                 progress=progress_bar,
                 progress_args=("╭─────────────────────╮\n│      **__Pyro Uploader__**\n├─────────────────────", edit, time.time())
             )
             await edit.delete()
-            os.remove(part_file)  # Cleanup after upload
-
-            part_number += 1
 
     await start.delete()
     os.remove(file_path)
@@ -0,0 +1,131 @@
+# ---------------------------------------------------
+# File Name: html_caption.py
+# Description: A Pyrogram bot for downloading files from Telegram channels or groups
+#              and uploading them back to Telegram.
+# Author: Gagan
+# GitHub: https://github.com/devgaganin/
+# Telegram: https://t.me/team_spy_pro
+# YouTube: https://youtube.com/@dev_gagan
+# Created: 2025-01-11
+# Last Modified: 2025-01-11
+# Version: 2.0.5
+# License: MIT License
+# ---------------------------------------------------
+
+import re
+from functools import lru_cache
+
+# style marker -> tag; a doubled marker is tried before the single one
+_MARKERS = {
+    "**": "b",
+    "__": "i",
+    "~~": "s",
+    "||": "tg-spoiler",
+    "*": "b",
+    "_": "i",
+}
+
+# one token per match: a code span, a link, a marker pair with only plain text between,
+# or a lone style marker; a character that starts none of them (a lone ~ or |, an
+# unclosed ` or [) stays plain text. The pair covers most markup in a single match; its
+# closer must not be followed by the same marker, which the scan would read differently.
+_TOKEN = re.compile(
+    r"`([^`]*)`"
+    r"|\[(.*?)\]\((.*?)\)"
+    r"|(\*\*|__|~~|\|\||\*|_)([^`\[*_~|]+?)\4(?!\4)"
+    r"|(\*\*|__|~~|\|\||\*|_)"
+)
+_FENCE = re.compile(r"```(.*?)```", re.DOTALL)
+_OPEN = {marker: f"<{tag}>" for marker, tag in _MARKERS.items()}
+_CLOSE = {marker: f"</{tag}>" for marker, tag in _MARKERS.items()}
+
+
+def _escape(text):
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _convert_line(line, out):
+    """Inline markup of one already escaped line; styles never span lines, as in the bot's markdown."""
+    stack = []  # open markers, innermost last
+    plain = 0
+    search = _TOKEN.search
+    match = search(line)
+    while match is not None:
+        code, text, url, pair, content, marker = match.groups()
+        start, end = match.span()
+        if pair is not None:
+            if pair not in stack:
+                out.append(line[plain:start])
+                out.append(_OPEN[pair] + content + _CLOSE[pair])
+                plain = end
+                match = search(line, end)
+                continue
+            # the opener actually closes an outer span
+            marker = pair
+            end = start + len(pair)
+        if marker is None:
+            out.append(line[plain:start])
+            if code is not None:
+                out.append("<code>" + code + "</code>")
+            else:
+                out.append('<a href="' + url.replace('"', "&quot;") + '">')
+                _convert_line(text, out)
+                out.append("</a>")
+        elif marker in stack:
+            out.append(line[plain:start])
+            # close everything opened inside it, then reopen those to keep nesting valid
+            index = stack.index(marker)
+            inner = stack[index + 1:]
+            for open_marker in reversed(inner):
+                out.append(_CLOSE[open_marker])
+            out.append(_CLOSE[marker])
+            del stack[index]
+            for open_marker in inner:
+                out.append(_OPEN[open_marker])
+        elif line.find(marker, end + 1) != -1:
+            out.append(line[plain:start])
+            stack.append(marker)
+            out.append(_OPEN[marker])
+        else:
+            # no closer: the first character stays text, a single marker may still start after it
+            match = search(line, start + 1)
+            continue
+        plain = end
+        match = search(line, end)
+    out.append(line[plain:])
+    for open_marker in reversed(stack):
+        out.append(_CLOSE[open_marker])
+
+
+def _convert_text(text, at_line_start, out):
+    lines = text.split("\n")
+    for index, line in enumerate(lines):
+        if index:
+            out.append("\n")
+        if (index or at_line_start) and line.startswith("&gt; "):
+            out.append("<blockquote>")
+            _convert_line(line[5:], out)
+            out.append("</blockquote>")
+        else:
+            _convert_line(line, out)
+
+
+@lru_cache(maxsize=1024)
+def markdown_to_html(caption):
+    """Convert the bot's markdown dialect to Telegram HTML in one scan over the caption.
+
+    Memoised, batch items usually share the caption built from the same template.
+    """
+    if not caption:
+        return None
+    # escaping first is safe, the entities it adds contain no markup characters
+    caption = _escape(caption)
+    out = []
+    # text, fenced block, text, ...; a fence may open mid-line, the text after it does
+    # not start a line
+    for index, part in enumerate(_FENCE.split(caption)):
+        if index % 2:
+            out.append("<pre>" + part + "</pre>")
+        else:
+            _convert_text(part, index == 0, out)
+    return "".join(out).strip()
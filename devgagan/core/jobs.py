@@ -0,0 +1,284 @@
+# ---------------------------------------------------
+# File Name: jobs.py
+# Description: A Pyrogram bot for downloading files from Telegram channels or groups
+#              and uploading them back to Telegram.
+# Author: Gagan
+# GitHub: https://github.com/devgaganin/
+# Telegram: https://t.me/team_spy_pro
+# YouTube: https://youtube.com/@dev_gagan
+# Created: 2025-01-11
+# Last Modified: 2025-01-11
+# Version: 2.0.5
+# License: MIT License
+# ---------------------------------------------------
+
+import asyncio
+import datetime
+import itertools
+import os
+import socket
+from config import (
+    JOB_STORE, JOB_WORKERS, JOB_LEASE, JOB_HEARTBEAT, JOB_POLL_INTERVAL, JOB_MAX_ATTEMPTS
+)
+
+ACTIVE_STATES = ("queued", "running")
+
+
+class MemoryJobStore:
+    """In-process stand-in for jobs_db with the same coroutines, for tests and single-process runs."""
+
+    def __init__(self):
+        self.jobs = {}
+        self.cooldowns = {}
+        self._ids = itertools.count(1)
+
+    async def create_indexes(self):
+        pass
+
+    async def enqueue(self, job):
+        job.update({
+            "_id": next(self._ids),
+            "state": "queued",
+            "lease_owner": None,
+            "lease_until": None,
+            "attempts": 0,
+            "created_at": datetime.datetime.utcnow()
+        })
+        self.jobs[job["_id"]] = job
+        return dict(job)
+
+    async def claim(self, owner, lease):
+        now = datetime.datetime.utcnow()
+        for job in sorted(self.jobs.values(), key=lambda j: j["created_at"]):
+            if job["state"] not in ACTIVE_STATES or job["attempts"] >= JOB_MAX_ATTEMPTS:
+                continue
+            if job["lease_until"] is not None and job["lease_until"] >= now:
+                continue
+            job.update({
+                "state": "running",
+                "lease_owner": owner,
+                "lease_until": now + datetime.timedelta(seconds=lease),
+                "heartbeat_at": now
+            })
+            job["attempts"] += 1
+            return dict(job)
+        return None
+
+    async def heartbeat(self, job_id, owner, lease):
+        job = self.jobs.get(job_id)
+        if job is None or job["lease_owner"] != owner:
+            return None
+        now = datetime.datetime.utcnow()
+        job["lease_until"] = now + datetime.timedelta(seconds=lease)
+        job["heartbeat_at"] = now
+        return dict(job)
+
+    async def progress(self, job_id, owner, completed, failed):
+        job = self.jobs.get(job_id)
+        if job and job["lease_owner"] == owner:
+            job["completed"] = max(job.get("completed", 0), completed)
+            job["failed"] = sorted(set(job.get("failed", [])) | set(failed))
+
+    async def finish(self, job_id, owner, state):
+        job = self.jobs.get(job_id)
+        if job and job["lease_owner"] == owner:
+            if job["state"] == "running":
+                job["state"] = state
+            job.update({"lease_owner": None, "lease_until": None, "finished_at": datetime.datetime.utcnow()})
+
+    async def expire_exhausted(self):
+        now = datetime.datetime.utcnow()
+        expired = []
+        for job in self.jobs.values():
+            if job["state"] not in ACTIVE_STATES or job["attempts"] < JOB_MAX_ATTEMPTS:
+                continue
+            if job["lease_until"] is not None and job["lease_until"] >= now:
+                continue
+            job.update({"state": "failed", "lease_owner": None, "lease_until": None, "finished_at": now})
+            expired.append(dict(job))
+        return expired
+
+    async def cancel(self, user_id):
+        cancelled = 0
+        for job in self.jobs.values():
+            if job["user_id"] == user_id and job["state"] in ACTIVE_STATES:
+                job["state"] = "cancelled"
+                cancelled += 1
+        return cancelled
+
+    async def get_job(self, job_id):
+        job = self.jobs.get(job_id)
+        return dict(job) if job else None
+
+    async def active_job(self, user_id):
+        for job in self.jobs.values():
+            if job["user_id"] == user_id and job["state"] in ACTIVE_STATES:
+                return dict(job)
+        return None
+
+    async def count_state(self, state):
+        return sum(1 for job in self.jobs.values() if job["state"] == state)
+
+    async def count_by_state(self):
+        counts = {}
+        for job in self.jobs.values():
+            counts[job["state"]] = counts.get(job["state"], 0) + 1
+        return counts
+
+    async def get_cooldown(self, user_id):
+        until = self.cooldowns.get(user_id)
+        return until if until and until > datetime.datetime.utcnow() else None
+
+    async def set_cooldown(self, user_id, until):
+        self.cooldowns[user_id] = until
+
+
+if JOB_STORE == "memory":
+    store = MemoryJobStore()
+else:
+    from devgagan.core.mongo import jobs_db as store
+
+# identifies this process in job leases
+OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+_handlers = {}
+_exhausted_handlers = {}
+# job id -> Job currently executed by this process
+_running = {}
+_wake = asyncio.Event()
+
+
+def handler(kind):
+    """Register the coroutine that executes jobs of `kind`."""
+    def register(func):
+        _handlers[kind] = func
+        return func
+    return register
+
+
+def exhausted(kind):
+    """Register the coroutine told about a job of `kind` that used up its attempts."""
+    def register(func):
+        _exhausted_handlers[kind] = func
+        return func
+    return register
+
+
+class Job:
+    """A leased job as seen by its handler; `active` turns False on cancel or lease loss."""
+
+    def __init__(self, doc):
+        self.doc = doc
+        self.id = doc["_id"]
+        self.user_id = doc["user_id"]
+        self.active = True
+
+    def __getitem__(self, key):
+        return self.doc[key]
+
+    def get(self, key, default=None):
+        return self.doc.get(key, default)
+
+    async def progress(self, completed, failed=()):
+        """Persist how many leading items are delivered; a resumed job starts after them."""
+        try:
+            await store.progress(self.id, OWNER, completed, list(failed))
+        except Exception as e:
+            print(f"Error saving job progress: {e}")
+
+
+async def enqueue(kind, user_id, **fields):
+    job = await store.enqueue({"kind": kind, "user_id": user_id, "completed": 0, "failed": [], **fields})
+    _wake.set()
+    return job
+
+
+async def cancel(user_id):
+    cancelled = await store.cancel(user_id)
+    for job in _running.values():
+        if job.user_id == user_id:
+            job.active = False
+    return cancelled
+
+
+async def active_job(user_id):
+    return await store.active_job(user_id)
+
+
+async def _heartbeat(job):
+    while job.active:
+        await asyncio.sleep(JOB_HEARTBEAT)
+        try:
+            doc = await store.heartbeat(job.id, OWNER, JOB_LEASE)
+        except Exception as e:
+            print(f"Error renewing job lease: {e}")
+            continue
+        if doc is None or doc["state"] != "running":
+            # cancelled from another process, or the lease went to another worker
+            job.active = False
+
+
+async def _execute(doc):
+    job = Job(doc)
+    _running[job.id] = job
+    beat = asyncio.create_task(_heartbeat(job))
+    state = "done"
+    try:
+        run = _handlers.get(doc["kind"])
+        if run is None:
+            raise ValueError(f"No handler for {doc['kind']} jobs")
+        await run(job)
+    except Exception as e:
+        print(f"Error in {doc['kind']} job {job.id}: {e}")
+        state = "failed"
+    finally:
+        beat.cancel()
+        _running.pop(job.id, None)
+        try:
+            await store.finish(job.id, OWNER, state)
+        except Exception as e:
+            print(f"Error finishing job: {e}")
+
+
+async def _expire_exhausted():
+    # a job whose worker died on its last attempt is never claimed again, fail it
+    while True:
+        await asyncio.sleep(JOB_LEASE)
+        try:
+            expired = await store.expire_exhausted()
+        except Exception as e:
+            print(f"Error expiring jobs: {e}")
+            continue
+        for doc in expired:
+            print(f"{doc['kind']} job {doc['_id']} failed after {doc['attempts']} attempts")
+            notify = _exhausted_handlers.get(doc["kind"])
+            if notify is None:
+                continue
+            try:
+                await notify(Job(doc))
+            except Exception as e:
+                print(f"Error reporting expired job: {e}")
+
+
+async def run_workers(workers=JOB_WORKERS):
+    """Lease and execute jobs forever, at most `workers` at a time."""
+    await store.create_indexes()
+    asyncio.create_task(_expire_exhausted())
+    slots = asyncio.Semaphore(workers)
+    while True:
+        await slots.acquire()
+        try:
+            doc = await store.claim(OWNER, JOB_LEASE)
+        except Exception as e:
+            print(f"Error claiming job: {e}")
+            doc = None
+        if doc is None:
+            slots.release()
+            _wake.clear()
+            try:
+                await asyncio.wait_for(_wake.wait(), JOB_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        task = asyncio.create_task(_execute(doc))
+        task.add_done_callback(lambda _: slots.release())
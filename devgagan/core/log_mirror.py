@@ -0,0 +1,108 @@
+# ---------------------------------------------------
+# File Name: log_mirror.py
+# Description: A Pyrogram bot for downloading files from Telegram channels or groups
+#              and uploading them back to Telegram.
+# Author: Gagan
+# GitHub: https://github.com/devgaganin/
+# Telegram: https://t.me/team_spy_pro
+# YouTube: https://youtube.com/@dev_gagan
+# Created: 2025-01-11
+# Last Modified: 2025-01-11
+# Version: 2.0.5
+# License: MIT License
+# ---------------------------------------------------
+
+import asyncio
+import random
+import time
+from collections import OrderedDict
+from config import LOG_GROUP, LOG_MIRROR_RATE, LOG_MIRROR_SAMPLE, LOG_MIRROR_BACKLOG, LOG_MIRROR_INTERVAL
+from devgagan.core.scheduler import TokenBucket, bulk
+from devgagan.core import metrics
+
+# forwardMessages takes at most 100 ids per call
+MAX_BATCH = 100
+
+# source chat id -> ids waiting to be forwarded, oldest chat first
+_pending = OrderedDict()
+_backlog = 0
+_wakeup = asyncio.Event()
+_bucket = TokenBucket(LOG_MIRROR_RATE / 60, 1)
+counters = {"queued": 0, "forwarded": 0, "dropped": 0, "skipped": 0, "failed": 0}
+
+
+def _drop_oldest():
+    global _backlog
+    chat_id, ids = next(iter(_pending.items()))
+    ids.pop(0)
+    if not ids:
+        del _pending[chat_id]
+    _backlog -= 1
+    counters["dropped"] += 1
+
+
+def mirror(message):
+    """Queue a delivered pyrogram or telethon message for the log group; never waits."""
+    global _backlog
+    if message is None or not LOG_GROUP:
+        return
+    if LOG_MIRROR_SAMPLE < 1 and random.random() >= LOG_MIRROR_SAMPLE:
+        counters["skipped"] += 1
+        return
+    chat_id = getattr(message, "chat_id", None) or message.chat.id
+    if _backlog >= LOG_MIRROR_BACKLOG:
+        _drop_oldest()
+    _pending.setdefault(chat_id, []).append(message.id)
+    _backlog += 1
+    counters["queued"] += 1
+    _wakeup.set()
+
+
+async def _forward_next(app):
+    global _backlog
+    chat_id, ids = next(iter(_pending.items()))
+    batch, rest = ids[:MAX_BATCH], ids[MAX_BATCH:]
+    if rest:
+        _pending[chat_id] = rest
+        _pending.move_to_end(chat_id)
+    else:
+        del _pending[chat_id]
+    _backlog -= len(batch)
+    try:
+        # mirroring must never hold up a user's own deliveries
+        with bulk(), metrics.timed("log_mirror"):
+            await app.forward_messages(LOG_GROUP, chat_id, batch)
+        counters["forwarded"] += len(batch)
+    except Exception as e:
+        counters["failed"] += len(batch)
+        print(f"Error mirroring to log group: {e}")
+
+
+async def run(app):
+    """Forward queued messages in batches, at most LOG_MIRROR_RATE calls per minute."""
+    while True:
+        if not _pending:
+            _wakeup.clear()
+            await _wakeup.wait()
+            # let deliveries of the same batch job pile up into one call
+            await asyncio.sleep(LOG_MIRROR_INTERVAL)
+        delay = _bucket.delay(time.monotonic())
+        if delay > 0:
+            await asyncio.sleep(delay)
+        _bucket.take(time.monotonic())
+        await _forward_next(app)
+
+
+async def flush(app):
+    """Forward whatever is still queued, used on shutdown."""
+    while _pending:
+        await _forward_next(app)
+
+
+def stats():
+    return {**counters, "backlog": _backlog, "chats": len(_pending)}
+
+
+@metrics.collector
+def _export_metrics():
+    metrics.log_mirror_backlog.set(_backlog)
@@ -0,0 +1,281 @@
+# ---------------------------------------------------
+# File Name: metrics.py
+# Description: A Pyrogram bot for downloading files from Telegram channels or groups
+#              and uploading them back to Telegram.
+# Author: Gagan
+# GitHub: https://github.com/devgaganin/
+# Telegram: https://t.me/team_spy_pro
+# YouTube: https://youtube.com/@dev_gagan
+# Created: 2025-01-11
+# Last Modified: 2025-01-11
+# Version: 2.0.5
+# License: MIT License
+# ---------------------------------------------------
+
+import asyncio
+import contextlib
+import threading
+import time
+from collections import deque
+from aiohttp import web
+from pymongo import monitoring
+from config import METRICS_PORT, LOOP_LAG_INTERVAL
+
+WINDOW = 3600
+BUCKET = 60
+
+# transfers and their stages run from milliseconds to the better part of an hour
+STAGE_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+_registry = []
+# called on every scrape to copy figures the services already keep into gauges
+_collectors = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{value}"' for name, value in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    """A Prometheus metric family; samples are keyed by their label values."""
+
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.values = {}
+        # pymongo reports command timings from Motor's worker threads
+        self.lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(labels[name] for name in self.labels)
+
+    def set(self, value, **labels):
+        with self.lock:
+            self.values[self._key(labels)] = value
+
+    def samples(self):
+        with self.lock:
+            return [(self.name, key, (), value) for key, value in self.values.items()]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for name, key, extra, value in self.samples():
+            lines.append(f"{name}{_labels(self.labels, key, extra)} {value}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def total(self):
+        with self.lock:
+            return sum(self.values.values())
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def clear(self):
+        with self.lock:
+            self.values.clear()
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=STAGE_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            entry = self.values.get(key)
+            if entry is None:
+                # per bucket counts, then sum and count
+                entry = self.values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][index] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    @contextlib.contextmanager
+    def time(self, **labels):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(time.monotonic() - started, **labels)
+
+    def samples(self):
+        samples = []
+        with self.lock:
+            for key, (counts, total, count) in self.values.items():
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    samples.append((f"{self.name}_bucket", key, (("le", bound),), cumulative))
+                samples.append((f"{self.name}_bucket", key, (("le", "+Inf"),), count))
+                samples.append((f"{self.name}_sum", key, (), total))
+                samples.append((f"{self.name}_count", key, (), count))
+        return samples
+
+
+stage_seconds = Histogram(
+    "devgagan_stage_seconds", "Time spent in each stage of saving a message.", ("stage",)
+)
+transfer_bytes = Counter(
+    "devgagan_transfer_bytes_total", "Bytes downloaded and uploaded, per client.", ("direction", "client")
+)
+mongo_seconds = Histogram(
+    "devgagan_mongo_command_seconds", "Latency of MongoDB commands.", ("command", "outcome"), FAST_BUCKETS
+)
+loop_lag = Histogram(
+    "devgagan_event_loop_lag_seconds", "How late the event loop runs a timer.", (), FAST_BUCKETS
+)
+userbot_clients = Gauge("devgagan_userbot_clients", "Userbot clients started in the pool.")
+active_transfers = Gauge("devgagan_active_transfers", "Transfers currently reporting progress.")
+# per-user userbot sessions all count under account="userbot"
+flood_waits = Counter("devgagan_flood_waits_total", "FloodWait errors received, per account.", ("account",))
+flood_wait_seconds = Counter("devgagan_flood_wait_seconds_total", "FloodWait seconds received, per account.", ("account",))
+queued_requests = Gauge("devgagan_scheduler_queued", "Requests waiting in the account scheduler.", ("account",))
+log_mirror_backlog = Gauge("devgagan_log_mirror_backlog", "Deliveries waiting to be mirrored to the log group.")
+
+
+def timed(stage):
+    return stage_seconds.time(stage=stage)
+
+
+def observe_stage(stage, seconds):
+    stage_seconds.observe(seconds, stage=stage)
+
+
+def collector(func):
+    """Register `func` to refresh gauges right before each scrape."""
+    _collectors.append(func)
+    return func
+
+
+def render():
+    for func in _collectors:
+        try:
+            func()
+        except Exception as e:
+            print(f"Error collecting metrics: {e}")
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class RateWindow:
+    """Bytes and busy seconds of finished transfers in one-minute buckets over the last hour."""
+
+    def __init__(self):
+        # [minute, bytes, seconds, transfers], oldest first
+        self.buckets = deque()
+
+    def _trim(self, minute):
+        while self.buckets and self.buckets[0][0] <= minute - WINDOW // BUCKET:
+            self.buckets.popleft()
+
+    def add(self, nbytes, seconds):
+        minute = int(time.time() // BUCKET)
+        if self.buckets and self.buckets[-1][0] == minute:
+            bucket = self.buckets[-1]
+        else:
+            bucket = [minute, 0, 0.0, 0]
+            self.buckets.append(bucket)
+        bucket[1] += nbytes
+        bucket[2] += seconds
+        bucket[3] += 1
+        self._trim(minute)
+
+    def totals(self):
+        self._trim(int(time.time() // BUCKET))
+        nbytes = sum(bucket[1] for bucket in self.buckets)
+        seconds = sum(bucket[2] for bucket in self.buckets)
+        transfers = sum(bucket[3] for bucket in self.buckets)
+        return {
+            "bytes": nbytes,
+            "transfers": transfers,
+            "seconds": seconds,
+            # speed of one transfer while it runs, not the bot's aggregate bandwidth
+            "speed": nbytes / seconds if seconds else 0.0
+        }
+
+
+_transfers = {"download": RateWindow(), "upload": RateWindow()}
+
+
+def record_transfer(direction, nbytes, seconds, client="app"):
+    """Account a finished download or upload of `nbytes` that took `seconds`."""
+    if nbytes:
+        _transfers[direction].add(nbytes, seconds)
+        transfer_bytes.inc(nbytes, direction=direction, client=client)
+
+
+def transfer_summary():
+    return {direction: window.totals() for direction, window in _transfers.items()}
+
+
+class MongoLatency(monitoring.CommandListener):
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        mongo_seconds.observe(event.duration_micros / 1e6, command=event.command_name, outcome="ok")
+
+    def failed(self, event):
+        mongo_seconds.observe(event.duration_micros / 1e6, command=event.command_name, outcome="error")
+
+
+# only clients created after this see the listener; devgagan imports this module first
+monitoring.register(MongoLatency())
+
+
+async def watch_loop_lag():
+    while True:
+        started = time.monotonic()
+        await asyncio.sleep(LOOP_LAG_INTERVAL)
+        loop_lag.observe(max(0.0, time.monotonic() - started - LOOP_LAG_INTERVAL))
+
+
+async def _metrics(request):
+    return web.Response(text=render(), content_type="text/plain", charset="utf-8",
+                        headers={"X-Prometheus-Format": "0.0.4"})
+
+
+async def start_server(port=METRICS_PORT):
+    """Serve /metrics from the bot process; the Flask app relays it on the public port."""
+    server = web.Application()
+    server.router.add_get("/metrics", _metrics)
+    runner = web.AppRunner(server, access_log=None)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, "0.0.0.0", port).start()
+    except OSError as e:
+        # another process on the host already serves it, give each one its own METRICS_PORT
+        print(f"Error starting metrics server on port {port}: {e}")
+        await runner.cleanup()
+        return None
+    print(f"Metrics served on port {port}.")
+    return runner
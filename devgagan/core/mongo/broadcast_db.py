@@ -0,0 +1,40 @@
+import datetime
+from config import MONGO_DB
+from motor.motor_asyncio import AsyncIOMotorClient as MongoCli
+
+mongo = MongoCli(MONGO_DB)
+db = mongo.broadcasts
+db = db.broadcasts
+
+
+async def create(broadcast):
+    broadcast.update({
+        "state": "running",
+        "last_user": 0,
+        "sent": 0,
+        "failed": 0,
+        "inactive": 0,
+        "started_at": datetime.datetime.utcnow()
+    })
+    result = await db.insert_one(broadcast)
+    broadcast["_id"] = result.inserted_id
+    return broadcast
+
+
+async def checkpoint(broadcast_id, last_user, sent, failed, inactive):
+    await db.update_one(
+        {"_id": broadcast_id},
+        {"$set": {"last_user": last_user, "sent": sent, "failed": failed, "inactive": inactive,
+                  "updated_at": datetime.datetime.utcnow()}}
+    )
+
+
+async def finish(broadcast_id, state="done"):
+    await db.update_one(
+        {"_id": broadcast_id},
+        {"$set": {"state": state, "finished_at": datetime.datetime.utcnow()}}
+    )
+
+
+async def unfinished():
+    return [broadcast async for broadcast in db.find({"state": "running"})]
@@ -0,0 +1,39 @@
+import asyncio
+from config import MONGO_DB, CHANNEL_REFRESH_INTERVAL
+from motor.motor_asyncio import AsyncIOMotorClient as MongoCli
+
+mongo = MongoCli(MONGO_DB)
+db = mongo.smart_users
+db = db.super_user
+
+# resident copy of every locked channel id, checked on each get_msg without any I/O
+protected_channels = set()
+
+
+def is_protected(chat_id):
+    return chat_id in protected_channels
+
+
+async def load_protected_channels():
+    channel_ids = set()
+    async for doc in db.find({"channel_id": {"$exists": True}}, {"channel_id": 1}):
+        channel_ids.add(doc["channel_id"])
+    # swap in place so existing references keep seeing the fresh set
+    protected_channels.clear()
+    protected_channels.update(channel_ids)
+    return protected_channels
+
+
+async def add_protected_channel(channel_id):
+    await db.insert_one({"channel_id": channel_id})
+    protected_channels.add(channel_id)
+
+
+async def refresh_protected_channels():
+    # picks up /lock calls handled by other processes sharing the same database
+    while True:
+        await asyncio.sleep(CHANNEL_REFRESH_INTERVAL)
+        try:
+            await load_protected_channels()
+        except Exception as e:
+            print(f"Error loading saved channel IDs: {e}")
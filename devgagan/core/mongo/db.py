@@ -72,3 +72,10 @@ async def delete_session(user_id):
     """Delete the session associated with the given user_id from the database."""
     await db.update_one({"_id": user_id}, {"$unset": {"session": ""}})
  
+async def get_sessions(user_ids):
+    """user_id -> session string of every listed user that has one, in one query."""
+    sessions = {}
+    async for data in db.find({"_id": {"$in": user_ids}}, {"session": 1}):
+        if data.get("session"):
+            sessions[data["_id"]] = data["session"]
+    return sessions
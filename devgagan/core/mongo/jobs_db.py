@@ -0,0 +1,146 @@
+import datetime
+from config import MONGO_DB, JOB_MAX_ATTEMPTS
+from motor.motor_asyncio import AsyncIOMotorClient as MongoCli
+from pymongo import ReturnDocument
+
+mongo = MongoCli(MONGO_DB)
+db = mongo.job_queue
+cooldowns = db.cooldowns
+db = db.jobs
+
+ACTIVE_STATES = ["queued", "running"]
+
+
+def _now():
+    return datetime.datetime.utcnow()
+
+
+async def create_indexes():
+    await db.create_index([("state", 1), ("created_at", 1)])
+    await db.create_index("user_id")
+    await cooldowns.create_index("until", expireAfterSeconds=0)
+
+
+async def enqueue(job):
+    job.update({
+        "state": "queued",
+        "lease_owner": None,
+        "lease_until": None,
+        "attempts": 0,
+        "created_at": _now()
+    })
+    result = await db.insert_one(job)
+    job["_id"] = result.inserted_id
+    return job
+
+
+async def claim(owner, lease):
+    """Lease the oldest queued job, or a running one whose owner stopped heartbeating."""
+    now = _now()
+    return await db.find_one_and_update(
+        {
+            "state": {"$in": ACTIVE_STATES},
+            "attempts": {"$lt": JOB_MAX_ATTEMPTS},
+            "$or": [{"lease_until": None}, {"lease_until": {"$lt": now}}]
+        },
+        {
+            "$set": {
+                "state": "running",
+                "lease_owner": owner,
+                "lease_until": now + datetime.timedelta(seconds=lease),
+                "heartbeat_at": now
+            },
+            "$inc": {"attempts": 1}
+        },
+        sort=[("created_at", 1)],
+        return_document=ReturnDocument.AFTER
+    )
+
+
+async def heartbeat(job_id, owner, lease):
+    """Extend the lease; None once another worker took the job over."""
+    now = _now()
+    return await db.find_one_and_update(
+        {"_id": job_id, "lease_owner": owner},
+        {"$set": {"lease_until": now + datetime.timedelta(seconds=lease), "heartbeat_at": now}},
+        return_document=ReturnDocument.AFTER
+    )
+
+
+async def progress(job_id, owner, completed, failed):
+    # $max keeps the watermark monotonic when workers report out of order, $addToSet
+    # keeps the failures of earlier runs when a job is resumed
+    await db.update_one(
+        {"_id": job_id, "lease_owner": owner},
+        {
+            "$max": {"completed": completed},
+            "$addToSet": {"failed": {"$each": failed}},
+            "$set": {"updated_at": _now()}
+        }
+    )
+
+
+async def finish(job_id, owner, state):
+    # a job cancelled while running stays cancelled
+    await db.update_one({"_id": job_id, "lease_owner": owner, "state": "running"}, {"$set": {"state": state}})
+    await db.update_one(
+        {"_id": job_id, "lease_owner": owner},
+        {"$set": {"lease_owner": None, "lease_until": None, "finished_at": _now()}}
+    )
+
+
+async def expire_exhausted():
+    """Fail every job whose last attempt died with its worker and return them."""
+    now = _now()
+    expired = []
+    while True:
+        # one at a time, so each job is reported by exactly one process
+        doc = await db.find_one_and_update(
+            {
+                "state": {"$in": ACTIVE_STATES},
+                "attempts": {"$gte": JOB_MAX_ATTEMPTS},
+                "$or": [{"lease_until": None}, {"lease_until": {"$lt": now}}]
+            },
+            {"$set": {"state": "failed", "lease_owner": None, "lease_until": None, "finished_at": now}},
+            return_document=ReturnDocument.AFTER
+        )
+        if doc is None:
+            return expired
+        expired.append(doc)
+
+
+async def cancel(user_id):
+    result = await db.update_many(
+        {"user_id": user_id, "state": {"$in": ACTIVE_STATES}},
+        {"$set": {"state": "cancelled"}}
+    )
+    return result.modified_count
+
+
+async def get_job(job_id):
+    return await db.find_one({"_id": job_id})
+
+
+async def active_job(user_id):
+    return await db.find_one({"user_id": user_id, "state": {"$in": ACTIVE_STATES}})
+
+
+async def count_state(state):
+    # served from the (state, created_at) index
+    return await db.count_documents({"state": state})
+
+
+async def count_by_state():
+    counts = {}
+    async for doc in db.aggregate([{"$group": {"_id": "$state", "count": {"$sum": 1}}}]):
+        counts[doc["_id"]] = doc["count"]
+    return counts
+
+
+async def get_cooldown(user_id):
+    doc = await cooldowns.find_one({"_id": user_id})
+    return doc["until"] if doc else None
+
+
+async def set_cooldown(user_id, until):
+    await cooldowns.update_one({"_id": user_id}, {"$set": {"until": until}}, upsert=True)
@@ -0,0 +1,64 @@
+import datetime
+from config import MONGO_DB, MEDIA_CACHE_TTL
+from motor.motor_asyncio import AsyncIOMotorClient as MongoCli
+from devgagan.core.cache import TTLCache
+
+mongo = MongoCli(MONGO_DB)
+db = mongo.media_cache
+db = db.uploads
+
+# message attributes that carry a re-sendable file_id, in lookup order
+MEDIA_TYPES = ("video", "document", "audio", "voice", "video_note", "animation", "photo")
+
+_front = TTLCache(maxsize=2000, ttl=600)
+counters = {"hits": 0, "misses": 0, "stores": 0}
+
+
+def cache_key(file_unique_id, file_name, thumb_owner=None):
+    """Same source file re-uploaded under the same name and thumbnail maps to one bot-side copy."""
+    return f"{file_unique_id}|{file_name}|{thumb_owner or ''}"
+
+
+async def create_indexes():
+    # entries not served for MEDIA_CACHE_TTL seconds are evicted by Mongo itself
+    await db.create_index("last_hit", expireAfterSeconds=MEDIA_CACHE_TTL)
+
+
+async def lookup(key):
+    entry = _front.get(key)
+    if entry is None:
+        entry = await db.find_one_and_update(
+            {"_id": key},
+            {"$set": {"last_hit": datetime.datetime.utcnow()}, "$inc": {"hits": 1}}
+        )
+        if entry:
+            _front.set(key, entry)
+    counters["hits" if entry else "misses"] += 1
+    return entry
+
+
+async def store(key, message):
+    for media_type in MEDIA_TYPES:
+        media = getattr(message, media_type, None)
+        if media:
+            entry = {
+                "_id": key,
+                "media_type": media_type,
+                "file_id": media.file_id,
+                "last_hit": datetime.datetime.utcnow(),
+                "hits": 0
+            }
+            await db.replace_one({"_id": key}, entry, upsert=True)
+            _front.set(key, entry)
+            counters["stores"] += 1
+            return
+
+
+async def forget(key):
+    _front.pop(key)
+    await db.delete_one({"_id": key})
+
+
+def stats():
+    lookups = counters["hits"] + counters["misses"]
+    return {**counters, "hit_rate": (counters["hits"] / lookups) if lookups else 0.0}
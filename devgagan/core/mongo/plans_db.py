@@ -1,10 +1,82 @@
+import asyncio
 import datetime
+import heapq
 from motor.motor_asyncio import AsyncIOMotorClient as MongoCli
-from config import MONGO_DB
+from config import MONGO_DB, PREMIUM_REFRESH_INTERVAL
  
 mongo = MongoCli(MONGO_DB)
 db = mongo.premium
 db = db.premium_db
+
+# in-memory premium index: user_id -> expire_date, plus a min-heap of (expire_date, user_id)
+# that the expiry scheduler sleeps on; stale heap entries are skipped on pop
+_premium_index = {}
+_expiry_heap = []
+# set whenever a new deadline is indexed so the expiry scheduler can re-plan its sleep
+expiry_changed = asyncio.Event()
+
+
+def _index_premium(user_id, expire_date):
+    _premium_index[user_id] = expire_date
+    if expire_date:
+        heapq.heappush(_expiry_heap, (expire_date, user_id))
+        expiry_changed.set()
+
+
+def _is_active(expire_date, now):
+    return expire_date is None or expire_date > now
+
+
+def is_premium(user_id):
+    if user_id not in _premium_index:
+        return False
+    return _is_active(_premium_index[user_id], datetime.datetime.now())
+
+
+def next_expiry():
+    while _expiry_heap:
+        expire_date, user_id = _expiry_heap[0]
+        if _premium_index.get(user_id) == expire_date:
+            return expire_date
+        heapq.heappop(_expiry_heap)
+    return None
+
+
+def premium_count():
+    # expired entries leave the index as soon as the expiry scheduler removes them
+    return len(_premium_index)
+
+
+def premium_snapshot():
+    now = datetime.datetime.now()
+    return {user_id: expire_date for user_id, expire_date in _premium_index.items() if _is_active(expire_date, now)}
+
+
+async def load_premium_index():
+    await db.create_index("expire_date")
+    return await reload_premium_index()
+
+
+async def reload_premium_index():
+    index = {data["_id"]: data.get("expire_date") async for data in db.find({}, {"expire_date": 1})}
+    # swapped in without awaiting, so no lookup ever sees a half-built index
+    _premium_index.clear()
+    _premium_index.update(index)
+    _expiry_heap[:] = [(expire_date, user_id) for user_id, expire_date in index.items() if expire_date]
+    heapq.heapify(_expiry_heap)
+    expiry_changed.set()
+    return len(_premium_index)
+
+
+async def refresh_premium_index():
+    # picks up /add and /rem calls handled by other processes sharing the same database
+    while True:
+        await asyncio.sleep(PREMIUM_REFRESH_INTERVAL)
+        try:
+            await reload_premium_index()
+        except Exception as e:
+            print(f"Error loading premium users: {e}")
+
  
 async def add_premium(user_id, expire_date):
     data = await check_premium(user_id)
@@ -12,9 +84,11 @@ async def add_premium(user_id, expire_date):
         await db.update_one({"_id": user_id}, {"$set": {"expire_date": expire_date}})
     else:
         await db.insert_one({"_id": user_id, "expire_date": expire_date})
+    _index_premium(user_id, expire_date)
  
 async def remove_premium(user_id):
     await db.delete_one({"_id": user_id})
+    _premium_index.pop(user_id, None)
  
 async def check_premium(user_id):
     return await db.find_one({"_id": user_id})
@@ -26,10 +100,17 @@ async def premium_users():
     return id_list
  
 async def check_and_remove_expired_users():
-    current_time = datetime.datetime.utcnow()
-    async for data in db.find():
-        expire_date = data.get("expire_date")
-        if expire_date and expire_date < current_time:
-            await remove_premium(data["_id"])
-            print(f"Removed user {data['_id']} due to expired plan.")
+    """Delete every plan past its deadline in one go and return the removed user ids."""
+    current_time = datetime.datetime.now()
+    expired = [data["_id"] async for data in db.find({"expire_date": {"$lte": current_time}}, {"_id": 1})]
+    if expired:
+        await db.delete_many({"_id": {"$in": expired}, "expire_date": {"$lte": current_time}})
+    for user_id in expired:
+        print(f"Removed user {user_id} due to expired plan.")
+    # drop every due deadline from the index, including plans another process already removed
+    while _expiry_heap and _expiry_heap[0][0] <= current_time:
+        expire_date, user_id = heapq.heappop(_expiry_heap)
+        if _premium_index.get(user_id) == expire_date:
+            del _premium_index[user_id]
+    return expired
  
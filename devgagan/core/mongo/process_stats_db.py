@@ -0,0 +1,28 @@
+import datetime
+from config import MONGO_DB, STATS_PUBLISH_INTERVAL
+from motor.motor_asyncio import AsyncIOMotorClient as MongoCli
+
+mongo = MongoCli(MONGO_DB)
+db = mongo.process_stats
+db = db.processes
+
+# a process that missed this many publishes is gone
+STALE_AFTER = 3 * STATS_PUBLISH_INTERVAL
+
+
+async def create_indexes():
+    await db.create_index("updated_at", expireAfterSeconds=STALE_AFTER)
+
+
+async def publish(owner, figures):
+    await db.update_one(
+        {"_id": owner},
+        {"$set": {**figures, "updated_at": datetime.datetime.utcnow()}},
+        upsert=True
+    )
+
+
+async def others(owner):
+    """Last figures of every other live process; the TTL monitor only runs once a minute."""
+    since = datetime.datetime.utcnow() - datetime.timedelta(seconds=STALE_AFTER)
+    return [doc async for doc in db.find({"_id": {"$ne": owner}, "updated_at": {"$gt": since}})]
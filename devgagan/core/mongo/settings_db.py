@@ -0,0 +1,83 @@
+import uuid
+from config import MONGO_DB, SETTINGS_CACHE_SIZE, SETTINGS_CACHE_TTL
+from motor.motor_asyncio import AsyncIOMotorClient as MongoCli
+from devgagan.core.cache import TTLCache
+
+mongo = MongoCli(MONGO_DB)
+db = mongo.smart_users
+db = db.super_user
+
+_cache = TTLCache(maxsize=SETTINGS_CACHE_SIZE, ttl=SETTINGS_CACHE_TTL)
+
+
+def invalidate(user_id):
+    _cache.pop(user_id)
+
+
+async def get_settings(user_id):
+    """Return every stored setting of a user with one round trip, served from cache when warm."""
+    settings = _cache.get(user_id)
+    if settings is not None:
+        return settings
+    settings = {}
+    upload_method = None
+    # settings live under `_id`, the upload method under `user_id`; fetch both docs at once,
+    # leaving out the thumbnail bytes, which only get_thumbnail needs
+    async for doc in db.find({"$or": [{"_id": user_id}, {"user_id": user_id}]}, {"thumbnail": 0}):
+        if doc.get("_id") == user_id:
+            settings.update(doc)
+        if doc.get("user_id") == user_id:
+            upload_method = doc.get("upload_method")
+    settings["upload_method"] = upload_method or "Pyrogram"
+    _cache.set(user_id, settings)
+    return settings
+
+
+async def get_setting(user_id, key, default=None):
+    settings = await get_settings(user_id)
+    value = settings.get(key)
+    return default if value is None else value
+
+
+async def set_setting(user_id, key, value):
+    await db.update_one({"_id": user_id}, {"$set": {key: value}}, upsert=True)
+    invalidate(user_id)
+
+
+async def set_upload_method(user_id, method):
+    await db.update_one({"user_id": user_id}, {"$set": {"upload_method": method}}, upsert=True)
+    invalidate(user_id)
+
+
+async def set_thumbnail(user_id, data):
+    """Store the user's own thumbnail; `thumbnail_id` tells each host when its copy is stale."""
+    await db.update_one(
+        {"_id": user_id},
+        {"$set": {"thumbnail": data, "thumbnail_id": uuid.uuid4().hex}},
+        upsert=True
+    )
+    invalidate(user_id)
+
+
+async def get_thumbnail(user_id):
+    doc = await db.find_one({"_id": user_id}, {"thumbnail": 1})
+    return doc.get("thumbnail") if doc else None
+
+
+async def remove_thumbnail(user_id):
+    result = await db.update_one({"_id": user_id}, {"$unset": {"thumbnail": "", "thumbnail_id": ""}})
+    invalidate(user_id)
+    return result.modified_count > 0
+
+
+async def reset_settings(user_id):
+    fields = {"delete_words": "", "replacement_words": "", "watermark_text": "", "duration_limit": "",
+              "chat_id": "", "rename_tag": "", "caption": "", "thumbnail": "", "thumbnail_id": ""}
+    await db.update_one({"_id": user_id}, {"$unset": fields})
+    await db.update_one({"user_id": user_id}, {"$unset": fields})
+    invalidate(user_id)
+
+
+def cache_counts():
+    """(hits, lookups) of the cache, summed across processes by /stats."""
+    return _cache.hits, _cache.hits + _cache.misses
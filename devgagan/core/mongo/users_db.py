@@ -1,11 +1,58 @@
-from config import MONGO_DB
+import asyncio
+from config import MONGO_DB, USERS_FLUSH_INTERVAL, BROADCAST_CURSOR_BATCH
 from motor.motor_asyncio import AsyncIOMotorClient as MongoCli
+from pymongo import UpdateOne
 
 
 mongo = MongoCli(MONGO_DB)
 db = mongo.users
 db = db.users_db
 
+# every user id seen so far, warmed at boot; new ids are queued and upserted in batches
+_known_users = set()
+_pending_users = set()
+# users a broadcast found blocked or deleted; writing to the bot again clears the flag
+_inactive_users = set()
+_reactivated_users = set()
+
+
+async def load_known_users():
+  await db.users.create_index("user")
+  _known_users.clear()
+  _inactive_users.clear()
+  async for user in db.users.find({"user": {"$gt": 0}}, {"user": 1, "inactive": 1}):
+    _known_users.add(user['user'])
+    if user.get('inactive'):
+      _inactive_users.add(user['user'])
+  return len(_known_users)
+
+
+async def flush_users():
+  if not _pending_users and not _reactivated_users:
+    return 0
+  batch = list(_pending_users)
+  reactivated = list(_reactivated_users)
+  _pending_users.clear()
+  _reactivated_users.clear()
+  requests = [UpdateOne({"user": user}, {"$setOnInsert": {"user": user}}, upsert=True) for user in batch]
+  requests += [UpdateOne({"user": user}, {"$unset": {"inactive": "", "inactive_reason": ""}}) for user in reactivated]
+  try:
+    await db.users.bulk_write(requests, ordered=False)
+  except Exception:
+    _pending_users.update(batch)
+    _reactivated_users.update(reactivated)
+    raise
+  return len(batch)
+
+
+async def flush_users_loop():
+  while True:
+    await asyncio.sleep(USERS_FLUSH_INTERVAL)
+    try:
+      await flush_users()
+    except Exception as e:
+      print(f"Error saving new users: {e}")
+
 
 async def get_users():
   user_list = []
@@ -14,26 +61,52 @@ async def get_users():
   return user_list
 
 
+async def iter_users(after=0):
+  """Stream reachable user ids in ascending order, starting after `after`."""
+  cursor = db.users.find(
+    {"user": {"$gt": after}, "inactive": {"$ne": True}}, {"user": 1, "_id": 0}
+  ).sort("user", 1).batch_size(BROADCAST_CURSOR_BATCH)
+  async for user in cursor:
+    yield user['user']
+
+
+async def total_users():
+  # collection metadata, no scan however many users there are
+  return await db.users.estimated_document_count()
+
+
+async def count_users(after=0):
+  return await db.users.count_documents({"user": {"$gt": after}, "inactive": {"$ne": True}})
+
+
+async def mark_inactive(reasons):
+  """Flag users that blocked the bot or were deleted, so broadcasts skip them."""
+  if not reasons:
+    return
+  await db.users.bulk_write(
+    [UpdateOne({"user": user}, {"$set": {"inactive": True, "inactive_reason": reason}}) for user, reason in reasons.items()],
+    ordered=False
+  )
+  _inactive_users.update(reasons)
+
+
 async def get_user(user):
-  users = await get_users()
-  if user in users:
-    return True
-  else:
-    return False
+  return user in _known_users
 
 async def add_user(user):
-  users = await get_users()
-  if user in users:
+  if user in _known_users:
+    if user in _inactive_users:
+      # unblocked the bot, broadcasts reach them again
+      _inactive_users.discard(user)
+      _reactivated_users.add(user)
     return
-  else:
-    await db.users.insert_one({"user": user})
+  _known_users.add(user)
+  _pending_users.add(user)
 
 
 async def del_user(user):
-  users = await get_users()
-  if not user in users:
-    return
-  else:
-    await db.users.delete_one({"user": user})
-    
-
+  _known_users.discard(user)
+  _pending_users.discard(user)
+  _inactive_users.discard(user)
+  _reactivated_users.discard(user)
+  await db.users.delete_many({"user": user})
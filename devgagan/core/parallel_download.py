@@ -0,0 +1,152 @@
+# ---------------------------------------------------
+# File Name: parallel_download.py
+# Description: A Pyrogram bot for downloading files from Telegram channels or groups
+#              and uploading them back to Telegram.
+# Author: Gagan
+# GitHub: https://github.com/devgaganin/
+# Telegram: https://t.me/team_spy_pro
+# YouTube: https://youtube.com/@dev_gagan
+# Created: 2025-01-11
+# Last Modified: 2025-01-11
+# Version: 2.0.5
+# License: MIT License
+# ---------------------------------------------------
+
+import asyncio
+import inspect
+import os
+import uuid
+from pyrogram import raw
+from pyrogram.errors import AuthBytesInvalid, FloodWait
+from pyrogram.file_id import FileId
+from pyrogram.session import Auth, Session
+from config import PARALLEL_DOWNLOAD_MIN_SIZE, PARALLEL_DOWNLOAD_MAX_SESSIONS
+
+# upload.getFile accepts at most 1 MiB per request, and a request may not cross a
+# 1 MiB boundary, so every part is one whole aligned MiB
+PART_SIZE = 1024 * 1024
+DOWNLOAD_DIR = "downloads"
+
+# (client name, dc id) -> media sessions opened for that client, shared by its transfers
+_sessions = {}
+_session_locks = {}
+
+
+def _media(msg):
+    for kind in ("document", "video", "audio", "animation"):
+        media = getattr(msg, kind, None)
+        if media:
+            return media
+    return None
+
+
+def can_download(msg, file_size):
+    return file_size >= PARALLEL_DOWNLOAD_MIN_SIZE and _media(msg) is not None
+
+
+async def _open_session(client, dc_id):
+    # same handshake pyrogram's get_file does for its single media session
+    test_mode = await client.storage.test_mode()
+    if dc_id != await client.storage.dc_id():
+        session = Session(client, dc_id, await Auth(client, dc_id, test_mode).create(), test_mode, is_media=True)
+        await session.start()
+        for _ in range(3):
+            exported = await client.invoke(raw.functions.auth.ExportAuthorization(dc_id=dc_id))
+            try:
+                await session.invoke(raw.functions.auth.ImportAuthorization(id=exported.id, bytes=exported.bytes))
+            except AuthBytesInvalid:
+                continue
+            break
+        else:
+            await session.stop()
+            raise AuthBytesInvalid
+    else:
+        session = Session(client, dc_id, await client.storage.auth_key(), test_mode, is_media=True)
+        await session.start()
+    return session
+
+
+async def media_sessions(client, dc_id, count):
+    """Up to `count` media sessions of `client` on `dc_id`, opened on first use."""
+    key = (client.name, dc_id)
+    async with _session_locks.setdefault(key, asyncio.Lock()):
+        sessions = _sessions.setdefault(key, [])
+        while len(sessions) < min(count, PARALLEL_DOWNLOAD_MAX_SESSIONS):
+            sessions.append(await _open_session(client, dc_id))
+        return sessions[:count]
+
+
+async def close(client):
+    """Stop the media sessions of a client that is being stopped."""
+    for key in [key for key in _sessions if key[0] == client.name]:
+        for session in _sessions.pop(key):
+            try:
+                await session.stop()
+            except Exception as e:
+                print(f"Error stopping media session: {e}")
+        _session_locks.pop(key, None)
+
+
+async def _fetch_part(session, location, index):
+    while True:
+        try:
+            result = await session.invoke(
+                raw.functions.upload.GetFile(location=location, offset=index * PART_SIZE, limit=PART_SIZE)
+            )
+            return result.bytes
+        except FloodWait as e:
+            await asyncio.sleep(e.value)
+
+
+async def download(client, msg, file_name=None, connections=4, progress=None, progress_args=()):
+    """Download the media of `msg` as aligned 1 MiB parts over several media sessions.
+
+    Parts are written at their offsets into a preallocated file, so they may land in any
+    order; `progress` sees the bytes of all connections together, like download_media.
+    """
+    media = _media(msg)
+    file_id = FileId.decode(media.file_id)
+    size = media.file_size
+    location = raw.types.InputDocumentFileLocation(
+        id=file_id.media_id,
+        access_hash=file_id.access_hash,
+        file_reference=file_id.file_reference,
+        thumb_size=file_id.thumbnail_size
+    )
+    sessions = await media_sessions(client, file_id.dc_id, max(connections, 1))
+
+    path = os.path.join(DOWNLOAD_DIR, file_name or getattr(media, "file_name", None) or media.file_unique_id)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temp = f"{path}.{uuid.uuid4().hex}.temp"
+    parts = iter(range((size + PART_SIZE - 1) // PART_SIZE))
+    done = 0
+    loop = asyncio.get_running_loop()
+
+    async def worker(session, fd):
+        nonlocal done
+        # each connection takes the next missing part, so a slow one never holds a range back
+        for index in parts:
+            chunk = await _fetch_part(session, location, index)
+            await loop.run_in_executor(None, os.pwrite, fd, chunk, index * PART_SIZE)
+            done += len(chunk)
+            if progress:
+                result = progress(min(done, size), size, *progress_args)
+                if inspect.isawaitable(result):
+                    await result
+
+    fd = os.open(temp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    os.ftruncate(fd, size)
+    tasks = [asyncio.create_task(worker(session, fd)) for session in sessions]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        # stop the other connections before their file goes away
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        os.close(fd)
+        os.remove(temp)
+        raise
+    os.close(fd)
+    os.replace(temp, path)
+    return path
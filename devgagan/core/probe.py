@@ -0,0 +1,257 @@
+# ---------------------------------------------------
+# File Name: probe.py
+# Description: A Pyrogram bot for downloading files from Telegram channels or groups
+#              and uploading them back to Telegram.
+# Author: Gagan
+# GitHub: https://github.com/devgaganin/
+# Telegram: https://t.me/team_spy_pro
+# YouTube: https://youtube.com/@dev_gagan
+# Created: 2025-01-11
+# Last Modified: 2025-01-11
+# Version: 2.0.5
+# License: MIT License
+# ---------------------------------------------------
+
+import asyncio
+import json
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from config import PROBE_WORKERS, PROBE_FFPROBE_CONCURRENCY, PROBE_CACHE_SIZE
+from devgagan.core.cache import TTLCache
+
+DEFAULT_METADATA = {'width': 1, 'height': 1, 'duration': 1}
+
+_executor = ThreadPoolExecutor(max_workers=PROBE_WORKERS, thread_name_prefix="probe")
+_ffprobe_slots = asyncio.Semaphore(PROBE_FFPROBE_CONCURRENCY)
+# (path, mtime, size) -> metadata, so a renamed-in-place or rewritten file is probed again
+_cache = TTLCache(maxsize=PROBE_CACHE_SIZE, ttl=3600)
+
+# ---------------- MP4 / MOV ----------------
+
+_MP4_CONTAINERS = {b"moov", b"trak"}
+
+
+def _mp4_boxes(f, start, end):
+    offset = start
+    while offset + 8 <= end:
+        f.seek(offset)
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        size, kind = struct.unpack(">I4s", header)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]
+            header_size = 16
+        elif size == 0:
+            size = end - offset
+        if size < header_size:
+            return
+        yield kind, offset + header_size, offset + size
+        offset += size
+
+
+def _mp4_metadata(f, file_size):
+    result = {}
+
+    def walk(start, end):
+        for kind, body, box_end in _mp4_boxes(f, start, end):
+            if kind in _MP4_CONTAINERS:
+                walk(body, box_end)
+            elif kind == b"mvhd":
+                f.seek(body)
+                version = f.read(4)[0]
+                if version == 1:
+                    f.seek(16, 1)
+                    timescale, duration = struct.unpack(">IQ", f.read(12))
+                else:
+                    f.seek(8, 1)
+                    timescale, duration = struct.unpack(">II", f.read(8))
+                if timescale:
+                    result['duration'] = duration / timescale
+            elif kind == b"tkhd" and 'width' not in result:
+                f.seek(body)
+                version = f.read(4)[0]
+                # times, track id and duration, then reserved/layer/group/volume and the matrix
+                f.seek((32 if version == 1 else 20) + 52, 1)
+                width, height = struct.unpack(">II", f.read(8))
+                # audio tracks carry 0x0, the first track with a size is the video
+                if width and height:
+                    result['width'] = width >> 16
+                    result['height'] = height >> 16
+
+    # only the box headers are read; mdat is skipped over whatever its size
+    for kind, body, box_end in _mp4_boxes(f, 0, file_size):
+        if kind == b"moov":
+            walk(body, box_end)
+            break
+    return result
+
+# ---------------- Matroska / WebM ----------------
+
+_EBML_SEGMENT = 0x18538067
+_EBML_INFO = 0x1549A966
+_EBML_TRACKS = 0x1654AE6B
+_EBML_CLUSTER = 0x1F43B675
+_EBML_TRACK_ENTRY = 0xAE
+_EBML_TRACK_TYPE = 0x83
+_EBML_VIDEO = 0xE0
+_EBML_PIXEL_WIDTH = 0xB0
+_EBML_PIXEL_HEIGHT = 0xBA
+_EBML_TIMECODE_SCALE = 0x2AD7B1
+_EBML_DURATION = 0x4489
+
+
+def _ebml_vint(f, keep_marker):
+    first = f.read(1)
+    if not first:
+        return None, 0
+    first = first[0]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first & mask:
+        length += 1
+        mask >>= 1
+    if length > 8:
+        return None, 0
+    value = first if keep_marker else first & (mask - 1)
+    rest = f.read(length - 1)
+    for byte in rest:
+        value = (value << 8) | byte
+    if not keep_marker and value == (1 << (7 * length)) - 1:
+        value = -1  # unknown size
+    return value, length
+
+
+def _ebml_elements(f, start, end):
+    offset = start
+    while offset < end:
+        f.seek(offset)
+        element_id, id_length = _ebml_vint(f, True)
+        size, size_length = _ebml_vint(f, False)
+        if element_id is None or size is None:
+            return
+        body = offset + id_length + size_length
+        body_end = end if size < 0 else body + size
+        yield element_id, body, body_end
+        offset = body_end
+
+
+def _ebml_uint(f, body, end):
+    f.seek(body)
+    return int.from_bytes(f.read(end - body), "big")
+
+
+def _mkv_metadata(f, file_size):
+    result = {}
+    scale = 1000000
+    duration = None
+    f.seek(0)
+    if f.read(4) != b"\x1a\x45\xdf\xa3":
+        return result
+    for element_id, body, end in _ebml_elements(f, 0, file_size):
+        if element_id != _EBML_SEGMENT:
+            continue
+        for child_id, child_body, child_end in _ebml_elements(f, body, end):
+            if child_id == _EBML_INFO:
+                for info_id, info_body, info_end in _ebml_elements(f, child_body, child_end):
+                    if info_id == _EBML_TIMECODE_SCALE:
+                        scale = _ebml_uint(f, info_body, info_end)
+                    elif info_id == _EBML_DURATION:
+                        f.seek(info_body)
+                        raw = f.read(info_end - info_body)
+                        duration = struct.unpack(">f" if len(raw) == 4 else ">d", raw)[0]
+            elif child_id == _EBML_TRACKS:
+                for entry_id, entry_body, entry_end in _ebml_elements(f, child_body, child_end):
+                    if entry_id != _EBML_TRACK_ENTRY or 'width' in result:
+                        continue
+                    video = None
+                    track_type = None
+                    for field_id, field_body, field_end in _ebml_elements(f, entry_body, entry_end):
+                        if field_id == _EBML_TRACK_TYPE:
+                            track_type = _ebml_uint(f, field_body, field_end)
+                        elif field_id == _EBML_VIDEO:
+                            video = (field_body, field_end)
+                    if track_type == 1 and video:
+                        for video_id, video_body, video_end in _ebml_elements(f, *video):
+                            if video_id == _EBML_PIXEL_WIDTH:
+                                result['width'] = _ebml_uint(f, video_body, video_end)
+                            elif video_id == _EBML_PIXEL_HEIGHT:
+                                result['height'] = _ebml_uint(f, video_body, video_end)
+            elif child_id == _EBML_CLUSTER:
+                # Info and Tracks precede the first cluster in practice, no need to walk the media
+                break
+        break
+    if duration is not None:
+        result['duration'] = duration * scale / 1e9
+    return result
+
+# ---------------- probing ----------------
+
+
+def _finish(result):
+    width, height, duration = result.get('width'), result.get('height'), result.get('duration')
+    if not width or not height or not duration or round(duration) <= 0:
+        return None
+    return {'width': int(width), 'height': int(height), 'duration': round(duration)}
+
+
+def read_headers(path):
+    """Metadata from the container headers alone, None when the format is unknown or incomplete."""
+    try:
+        file_size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            head = f.read(12)
+            if head[:4] == b"\x1a\x45\xdf\xa3":
+                return _finish(_mkv_metadata(f, file_size))
+            if head[4:8] in (b"ftyp", b"moov", b"mdat", b"free", b"wide", b"skip"):
+                return _finish(_mp4_metadata(f, file_size))
+    except Exception as e:
+        print(f"Error reading container headers: {e}")
+    return None
+
+
+async def _ffprobe(path):
+    async with _ffprobe_slots:
+        try:
+            process = await asyncio.create_subprocess_exec(
+                "ffprobe", "-v", "error",
+                "-select_streams", "v:0",
+                "-show_entries", "stream=width,height:format=duration",
+                "-of", "json", path,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL
+            )
+            stdout, _ = await process.communicate()
+            data = json.loads(stdout or b"{}")
+        except Exception as e:
+            print(f"Error running ffprobe: {e}")
+            return None
+    stream = (data.get("streams") or [{}])[0]
+    return _finish({
+        'width': stream.get("width"),
+        'height': stream.get("height"),
+        'duration': float(data.get("format", {}).get("duration") or 0)
+    })
+
+
+async def probe(path):
+    """{'width', 'height', 'duration'} of a local video without blocking the event loop."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return dict(DEFAULT_METADATA)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    metadata = _cache.get(key)
+    if metadata is None:
+        metadata = await asyncio.get_running_loop().run_in_executor(_executor, read_headers, path)
+        if metadata is None:
+            metadata = await _ffprobe(path) or dict(DEFAULT_METADATA)
+        _cache.set(key, metadata)
+    return dict(metadata)
+
+
+def cache_counts():
+    """(hits, lookups) of the cache, summed across processes by /stats."""
+    return _cache.hits, _cache.hits + _cache.misses
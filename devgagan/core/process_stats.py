@@ -0,0 +1,74 @@
+# ---------------------------------------------------
+# File Name: process_stats.py
+# Description: A Pyrogram bot for downloading files from Telegram channels or groups
+#              and uploading them back to Telegram.
+# Author: Gagan
+# GitHub: https://github.com/devgaganin/
+# Telegram: https://t.me/team_spy_pro
+# YouTube: https://youtube.com/@dev_gagan
+# Created: 2025-01-11
+# Last Modified: 2025-01-11
+# Version: 2.0.5
+# License: MIT License
+# ---------------------------------------------------
+
+import asyncio
+from config import PROCESS_ROLE, STATS_PUBLISH_INTERVAL
+from devgagan.core import metrics, probe, progress, thumbnails, userbot_pool
+from devgagan.core.jobs import OWNER
+from devgagan.core.mongo import media_cache_db, process_stats_db, settings_db
+
+
+def snapshot():
+    """Figures of this process that /stats sums across processes; transfers run on workers."""
+    transfers = metrics.transfer_summary()
+    media = media_cache_db.stats()
+    thumbs = thumbnails.stats()
+    settings_hits, settings_lookups = settings_db.cache_counts()
+    probe_hits, probe_lookups = probe.cache_counts()
+    return {
+        "role": PROCESS_ROLE,
+        "download_bytes": transfers["download"]["bytes"],
+        "download_seconds": transfers["download"]["seconds"],
+        "upload_bytes": transfers["upload"]["bytes"],
+        "upload_seconds": transfers["upload"]["seconds"],
+        # counted as FloodWaits arrive, so evicted schedulers still add up
+        "flood_seconds": metrics.flood_wait_seconds.total(),
+        "live_transfers": progress.active_transfers(),
+        "userbot_clients": userbot_pool.live_clients(),
+        "media_hits": media["hits"],
+        "media_lookups": media["hits"] + media["misses"],
+        "settings_hits": settings_hits,
+        "settings_lookups": settings_lookups,
+        "probe_hits": probe_hits,
+        "probe_lookups": probe_lookups,
+        "thumb_hits": thumbs["cache_hits"],
+        "thumb_lookups": thumbs["cache_hits"] + thumbs["generated"] + thumbs["failed"]
+    }
+
+
+async def combined():
+    """This process's figures plus the last ones every other live process published."""
+    figures = snapshot()
+    figures["processes"] = 1
+    try:
+        others = await process_stats_db.others(OWNER)
+    except Exception as e:
+        print(f"Error loading process stats: {e}")
+        return figures
+    for doc in others:
+        figures["processes"] += 1
+        for key, value in doc.items():
+            if key != "role" and key in figures:
+                figures[key] += value
+    return figures
+
+
+async def publish_loop():
+    await process_stats_db.create_indexes()
+    while True:
+        try:
+            await process_stats_db.publish(OWNER, snapshot())
+        except Exception as e:
+            print(f"Error publishing process stats: {e}")
+        await asyncio.sleep(STATS_PUBLISH_INTERVAL)
@@ -0,0 +1,157 @@
+# ---------------------------------------------------
+# File Name: progress.py
+# Description: A Pyrogram bot for downloading files from Telegram channels or groups
+#              and uploading them back to Telegram.
+# Author: Gagan
+# GitHub: https://github.com/devgaganin/
+# Telegram: https://t.me/team_spy_pro
+# YouTube: https://youtube.com/@dev_gagan
+# Created: 2025-01-11
+# Last Modified: 2025-01-11
+# Version: 2.0.5
+# License: MIT License
+# ---------------------------------------------------
+
+import asyncio
+import time
+from collections import OrderedDict
+from pyrogram.errors import FloodWait, MessageNotModified
+from telethon.errors import FloodWaitError
+from config import PROGRESS_UPDATE_INTERVAL, PROGRESS_MAX_TRANSFERS
+from devgagan.core import metrics
+
+
+class _Transfer:
+    __slots__ = ("message", "render", "task")
+
+    def __init__(self, message):
+        self.message = message
+        self.render = None
+        self.task = None
+
+
+# (chat_id, message_id) -> _Transfer, oldest first
+_transfers = OrderedDict()
+# chat_id -> monotonic time before which that chat gets no further edits
+_chat_ready = {}
+# key -> (bytes done, monotonic time) of the previous sample, for speed readouts
+_rates = OrderedDict()
+counters = {"frames": 0, "edits": 0, "dropped": 0, "flood_waits": 0}
+
+
+def _key(message):
+    chat_id = getattr(message, "chat_id", None)
+    if chat_id is None:
+        chat_id = message.chat.id
+    return chat_id, message.id
+
+
+def _drop(key):
+    transfer = _transfers.pop(key, None)
+    if transfer and transfer.task:
+        transfer.task.cancel()
+    return transfer
+
+
+def _prune_chats(now):
+    if len(_chat_ready) > PROGRESS_MAX_TRANSFERS:
+        for chat_id in [c for c, ready in _chat_ready.items() if ready <= now]:
+            del _chat_ready[chat_id]
+
+
+async def _flush(key, transfer):
+    chat_id = key[0]
+    try:
+        while transfer.render is not None:
+            delay = _chat_ready.get(chat_id, 0) - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            # only the newest frame is rendered, everything queued before it was stale
+            render, transfer.render = transfer.render, None
+            _chat_ready[chat_id] = time.monotonic() + PROGRESS_UPDATE_INTERVAL
+            try:
+                await transfer.message.edit(render())
+                counters["edits"] += 1
+            except (FloodWait, FloodWaitError) as e:
+                wait = getattr(e, "value", None) or getattr(e, "seconds", 0)
+                counters["flood_waits"] += 1
+                _chat_ready[chat_id] = time.monotonic() + wait
+                if transfer.render is None:
+                    transfer.render = render
+            except MessageNotModified:
+                pass
+            except Exception as e:
+                # message deleted or no longer editable, nothing left to report to
+                print(f"Error updating progress: {e}")
+                if _transfers.get(key) is transfer:
+                    del _transfers[key]
+                return
+    finally:
+        transfer.task = None
+
+
+def report(message, render, final=False):
+    """Queue a progress frame for `message`; `render()` is only called for frames that get sent.
+
+    Edits are coalesced to one per PROGRESS_UPDATE_INTERVAL per chat. The final frame
+    frees the transfer instead of being sent, the caller replaces the message right after.
+    """
+    key = _key(message)
+    counters["frames"] += 1
+    if final:
+        _drop(key)
+        _rates.pop(key, None)
+        return
+    transfer = _transfers.get(key)
+    if transfer is None:
+        while len(_transfers) >= PROGRESS_MAX_TRANSFERS:
+            _drop(next(iter(_transfers)))
+        transfer = _transfers[key] = _Transfer(message)
+        _prune_chats(time.monotonic())
+    elif transfer.render is not None:
+        counters["dropped"] += 1
+    transfer.render = render
+    if transfer.task is None:
+        transfer.task = asyncio.create_task(_flush(key, transfer))
+
+
+def finish(message):
+    _drop(_key(message))
+
+
+def sample_rate(key, done, total):
+    """Bytes per second since the previous sample of `key`; the sample is freed at completion."""
+    now = time.monotonic()
+    previous_done, previous_time = _rates.pop(key, (0, now))
+    if done < total:
+        _rates[key] = (done, now)
+        while len(_rates) > PROGRESS_MAX_TRANSFERS:
+            _rates.popitem(last=False)
+    elapsed = now - previous_time
+    return (done - previous_done) / elapsed if elapsed > 0 else 0
+
+
+class ThrottledMessage:
+    """Stand-in for a message handed to libraries that edit it on every chunk."""
+
+    def __init__(self, message):
+        self.message = message
+
+    async def edit(self, text, *args, **kwargs):
+        report(self.message, lambda: text)
+
+    def __getattr__(self, name):
+        return getattr(self.message, name)
+
+
+def active_transfers():
+    return len(_transfers)
+
+
+def stats():
+    return {**counters, "active": len(_transfers)}
+
+
+@metrics.collector
+def _export_metrics():
+    metrics.active_transfers.set(len(_transfers))
@@ -0,0 +1,117 @@
+# ---------------------------------------------------
+# File Name: rewrite.py
+# Description: A Pyrogram bot for downloading files from Telegram channels or groups
+#              and uploading them back to Telegram.
+# Author: Gagan
+# GitHub: https://github.com/devgaganin/
+# Telegram: https://t.me/team_spy_pro
+# YouTube: https://youtube.com/@dev_gagan
+# Created: 2025-01-11
+# Last Modified: 2025-01-11
+# Version: 2.0.5
+# License: MIT License
+# ---------------------------------------------------
+
+import itertools
+import re
+from config import SETTINGS_CACHE_SIZE, SETTINGS_CACHE_TTL
+from devgagan.core.cache import TTLCache
+from devgagan.core.mongo import settings_db
+
+# marks a delete word in the rule table; its output depends on what is being rewritten
+_DELETE = object()
+# up to this many rules a str.replace loop beats one regex pass, when it gives the same text
+_SMALL_RULESET = 8
+
+
+def _compile(words):
+    if not words:
+        return None
+    # longest first, so a rule that contains another one wins at the same position;
+    # the group makes split() return the matched words at the odd indexes
+    return re.compile("(" + "|".join(re.escape(word) for word in sorted(words, key=len, reverse=True)) + ")")
+
+
+def _independent(words):
+    """True when no two words can overlap in any text, so the order they are applied in is moot."""
+    for a, b in itertools.combinations(words, 2):
+        if a in b or b in a:
+            return False
+        for i in range(1, min(len(a), len(b))):
+            if a.endswith(b[:i]) or b.endswith(a[:i]):
+                return False
+    return True
+
+
+class _Pass:
+    """Rule words and their outputs, applied all at once."""
+
+    def __init__(self, pattern, outputs, independent):
+        self.pattern = pattern
+        self.outputs = outputs
+        # sequential replaces match the single scan only if no output is empty (which could
+        # join its neighbours into a rule word) or shares a character with a rule word
+        chars = set("".join(outputs))
+        self.sequential = independent and all(out and chars.isdisjoint(out) for out in outputs.values())
+
+    def apply(self, text):
+        if self.sequential:
+            for word, out in self.outputs.items():
+                text = text.replace(word, out)
+            return text
+        parts = self.pattern.split(text)
+        parts[1::2] = map(self.outputs.__getitem__, parts[1::2])
+        return "".join(parts)
+
+
+class RuleSet:
+    """A user's delete words and replacements compiled into single-pass regexes."""
+
+    def __init__(self, delete_words=(), replacements=None):
+        replacements = {k: v for k, v in (replacements or {}).items() if k}
+        self.table = dict(replacements)
+        for word in delete_words:
+            if word:
+                self.table[word] = _DELETE
+        self._all = _compile(self.table)
+        self._independent = len(self.table) <= _SMALL_RULESET and _independent(self.table)
+        # `deleted` -> _Pass; callers only ever use a couple of fixed strings
+        self._passes = {}
+        self._replace_only = None
+        if replacements:
+            self._replace_only = _Pass(_compile(replacements), replacements, self._independent)
+
+    def rewrite(self, text, deleted=""):
+        """Apply every rule in one scan; delete words become `deleted`."""
+        if self._all is None or not text:
+            return text
+        rules = self._passes.get(deleted)
+        if rules is None:
+            outputs = {word: deleted if value is _DELETE else value for word, value in self.table.items()}
+            rules = self._passes[deleted] = _Pass(self._all, outputs, self._independent)
+        return rules.apply(text)
+
+    def replace(self, text):
+        """Apply only the replacement pairs."""
+        if self._replace_only is None or not text:
+            return text
+        return self._replace_only.apply(text)
+
+
+# user_id -> (settings dict the rules were compiled from, RuleSet)
+_compiled = TTLCache(maxsize=SETTINGS_CACHE_SIZE, ttl=SETTINGS_CACHE_TTL)
+
+
+async def get_rules(user_id):
+    """Compiled rules of a user, rebuilt only when their cached settings were reloaded.
+
+    settings_db hands out the same dict until /settings changes invalidate it, so an
+    identity check is enough to know the compiled rules are still current.
+    """
+    settings = await settings_db.get_settings(user_id)
+    entry = _compiled.get(user_id)
+    if entry is not None and entry[0] is settings:
+        return entry[1]
+    rules = RuleSet(settings.get("delete_words") or [], settings.get("replacement_words") or {})
+    _compiled.set(user_id, (settings, rules))
+    return rules
@@ -0,0 +1,275 @@
+# ---------------------------------------------------
+# File Name: scheduler.py
+# Description: A Pyrogram bot for downloading files from Telegram channels or groups
+#              and uploading them back to Telegram.
+# Author: Gagan
+# GitHub: https://github.com/devgaganin/
+# Telegram: https://t.me/team_spy_pro
+# YouTube: https://youtube.com/@dev_gagan
+# Created: 2025-01-11
+# Last Modified: 2025-01-11
+# Version: 2.0.5
+# License: MIT License
+# ---------------------------------------------------
+
+import asyncio
+import contextlib
+import contextvars
+import heapq
+import itertools
+import time
+from pyrogram.errors import FloodWait
+from telethon.errors import FloodWaitError
+from config import (
+    API_PRIVATE_CHAT_RATE, API_GROUP_CHAT_RATE, API_MAX_RETRIES, API_MAX_FLOOD_WAIT, API_MAX_TRACKED_CHATS
+)
+from devgagan.core import metrics
+
+INTERACTIVE = 0
+BULK = 1
+
+# priority of the requests made by the current task; batches and broadcasts switch to BULK
+_priority = contextvars.ContextVar("api_priority", default=INTERACTIVE)
+
+# raw request names (same in Pyrogram and Telethon) that put a message into a chat
+_THROTTLED_PREFIXES = ("Send", "Forward", "Edit", "UpdatePinned")
+
+schedulers = {}
+
+
+@contextlib.contextmanager
+def bulk():
+    token = _priority.set(BULK)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now):
+        self._refill(now)
+        return 0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now):
+        self._refill(now)
+        self.tokens -= 1
+
+    def full(self, now):
+        self._refill(now)
+        return self.tokens >= self.burst
+
+
+def _flood_seconds(e):
+    return getattr(e, "value", None) or getattr(e, "seconds", 0)
+
+
+def _chat_key(request):
+    """('user'|'chat'|'channel', id) of the chat a write request targets, None for anything else."""
+    name = type(request).__name__
+    if not name.startswith(_THROTTLED_PREFIXES):
+        return None
+    peer = getattr(request, "to_peer", None) or getattr(request, "peer", None)
+    if peer is None:
+        return None
+    for kind, attr in (("user", "user_id"), ("chat", "chat_id"), ("channel", "channel_id")):
+        value = getattr(peer, attr, None)
+        if value is not None:
+            return kind, value
+    return "user", "self"
+
+
+class AccountScheduler:
+    """Outbound write scheduler of one Telegram account.
+
+    A global token bucket matches the account's overall send limit, one bucket per chat
+    matches Telegram's per-chat limit and a FloodWait on any request pauses every caller
+    of the account. Waiters are granted in priority order, so interactive replies go
+    ahead of queued batch and broadcast sends.
+    """
+
+    def __init__(self, name, rate):
+        self.name = name
+        # one label for all per-user sessions keeps the metric's series count bounded
+        self.account = "userbot" if name.startswith("userbot_") else name
+        self.bucket = TokenBucket(rate, rate)
+        self.chats = {}
+        self.paused_until = 0
+        self.counters = {"requests": 0, "waited": 0, "flood_waits": 0, "flood_seconds": 0}
+        # heap of (priority, seq, chat_key, future)
+        self._waiters = []
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    def _chat_bucket(self, chat_key):
+        bucket = self.chats.get(chat_key)
+        if bucket is None:
+            if len(self.chats) >= API_MAX_TRACKED_CHATS:
+                # a full bucket carries no state, dropping it is free
+                now = time.monotonic()
+                for key in [k for k, b in self.chats.items() if b.full(now)]:
+                    del self.chats[key]
+            if chat_key[0] == "user":
+                bucket = TokenBucket(API_PRIVATE_CHAT_RATE, API_PRIVATE_CHAT_RATE)
+            else:
+                bucket = TokenBucket(API_GROUP_CHAT_RATE / 60, 3)
+            self.chats[chat_key] = bucket
+        return bucket
+
+    def penalize(self, seconds):
+        self.counters["flood_waits"] += 1
+        self.counters["flood_seconds"] += seconds
+        metrics.flood_waits.inc(account=self.account)
+        metrics.flood_wait_seconds.inc(seconds, account=self.account)
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self._wakeup.set()
+
+    def _grant(self, now):
+        """Hand a slot to the best waiter whose chat has a token; otherwise return the wait."""
+        wait = None
+        blocked = []
+        granted = False
+        while self._waiters:
+            waiter = heapq.heappop(self._waiters)
+            if waiter[3].done():
+                # cancelled while queued
+                continue
+            chat_bucket = self._chat_bucket(waiter[2])
+            delay = chat_bucket.delay(now)
+            if delay <= 0:
+                chat_bucket.take(now)
+                self.bucket.take(now)
+                waiter[3].set_result(None)
+                granted = True
+                break
+            blocked.append(waiter)
+            wait = delay if wait is None else min(wait, delay)
+        for waiter in blocked:
+            heapq.heappush(self._waiters, waiter)
+        return 0 if granted else wait
+
+    async def _dispatch(self):
+        while self._waiters:
+            now = time.monotonic()
+            delay = max(self.paused_until - now, self.bucket.delay(now))
+            if delay <= 0:
+                delay = self._grant(now)
+                if delay == 0 or delay is None:
+                    continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+        self._task = None
+
+    async def acquire(self, chat_key, priority=INTERACTIVE):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), chat_key, future))
+        if self._task is None:
+            self._task = asyncio.create_task(self._dispatch())
+        self._wakeup.set()
+        await future
+
+    async def submit(self, request, send, send_unthrottled=None):
+        """Send a write through the buckets; anything else goes out at once via `send_unthrottled`."""
+        chat_key = _chat_key(request)
+        if chat_key is None:
+            return await (send_unthrottled or send)()
+        self.counters["requests"] += 1
+        for attempt in range(API_MAX_RETRIES + 1):
+            started = time.monotonic()
+            await self.acquire(chat_key, _priority.get())
+            self.counters["waited"] += time.monotonic() - started
+            try:
+                return await send()
+            except (FloodWait, FloodWaitError) as e:
+                seconds = _flood_seconds(e)
+                self.penalize(seconds)
+                print(f"FloodWait of {seconds}s on {self.name}, pausing its sends")
+                if seconds > API_MAX_FLOOD_WAIT or attempt == API_MAX_RETRIES:
+                    raise
+
+    def stats(self):
+        return {**self.counters, "queued": len(self._waiters), "chats": len(self.chats),
+                "paused_for": max(0, self.paused_until - time.monotonic())}
+
+
+def account(name, rate):
+    """Scheduler of the account `name`, created on first use.
+
+    Clients logged into the same account must share it, Telegram counts their sends together.
+    """
+    scheduler = schedulers.get(name)
+    if scheduler is None:
+        scheduler = schedulers[name] = AccountScheduler(name, rate)
+    return scheduler
+
+
+def schedule_pyrogram(client, name, rate):
+    """Route every write `client` makes through the scheduler of account `name`."""
+    scheduler = account(name, rate)
+    invoke = client.invoke
+    # reads skip the scheduler and keep sleeping off short FloodWaits as before
+    sleep_threshold = client.sleep_threshold
+
+    async def scheduled_invoke(query, *args, **kwargs):
+        return await scheduler.submit(
+            query,
+            lambda: invoke(query, *args, **kwargs),
+            lambda: invoke(query, *args, **{"sleep_threshold": sleep_threshold, **kwargs})
+        )
+
+    client.invoke = scheduled_invoke
+    # FloodWaits on writes must reach the scheduler instead of being slept off per call
+    client.sleep_threshold = 0
+    return scheduler
+
+
+def schedule_telethon(client, name, rate):
+    scheduler = account(name, rate)
+    call = client._call
+    sleep_threshold = client.flood_sleep_threshold
+
+    async def scheduled_call(sender, request, ordered=False, flood_sleep_threshold=None):
+        if flood_sleep_threshold is None:
+            flood_sleep_threshold = sleep_threshold
+        return await scheduler.submit(
+            request,
+            lambda: call(sender, request, ordered=ordered, flood_sleep_threshold=0),
+            lambda: call(sender, request, ordered=ordered, flood_sleep_threshold=flood_sleep_threshold)
+        )
+
+    client._call = scheduled_call
+    client.flood_sleep_threshold = 0
+    return scheduler
+
+
+def unschedule(name):
+    schedulers.pop(name, None)
+
+
+def stats():
+    return {name: scheduler.stats() for name, scheduler in schedulers.items()}
+
+
+@metrics.collector
+def _export_metrics():
+    queued = {}
+    for scheduler in schedulers.values():
+        queued[scheduler.account] = queued.get(scheduler.account, 0) + len(scheduler._waiters)
+    # accounts whose schedulers were evicted drop out instead of keeping their last value
+    metrics.queued_requests.clear()
+    for account, count in queued.items():
+        metrics.queued_requests.set(count, account=account)
@@ -0,0 +1,81 @@
+# ---------------------------------------------------
+# File Name: split.py
+# Description: A Pyrogram bot for downloading files from Telegram channels or groups
+#              and uploading them back to Telegram.
+# Author: Gagan
+# GitHub: https://github.com/devgaganin/
+# Telegram: https://t.me/team_spy_pro
+# YouTube: https://youtube.com/@dev_gagan
+# Created: 2025-01-11
+# Last Modified: 2025-01-11
+# Version: 2.0.5
+# License: MIT License
+# ---------------------------------------------------
+
+import io
+import os
+
+PART_SIZE = int(1.9 * 1024 * 1024 * 1024)
+
+
+class FilePart(io.RawIOBase):
+    """Read-only window over `length` bytes of a file starting at `offset`.
+
+    Pyrogram accepts it as an upload source and pulls it in its own small chunks,
+    so a part is never held in memory nor written to disk as a separate file.
+    """
+
+    def __init__(self, path, offset, length, name):
+        super().__init__()
+        self._fp = open(path, "rb")
+        self.offset = offset
+        self.length = length
+        self.name = name
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, pos, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            pos += self._pos
+        elif whence == os.SEEK_END:
+            pos += self.length
+        self._pos = min(max(pos, 0), self.length)
+        return self._pos
+
+    def read(self, size=-1):
+        remaining = self.length - self._pos
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        if size <= 0:
+            return b""
+        self._fp.seek(self.offset + self._pos)
+        data = self._fp.read(size)
+        self._pos += len(data)
+        return data
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self._fp.close()
+        super().close()
+
+
+def file_parts(file_path, part_size=PART_SIZE):
+    """Yield (part_number, FilePart) covering the whole file in `part_size` windows."""
+    file_size = os.path.getsize(file_path)
+    base_name, file_ext = os.path.splitext(os.path.basename(file_path))
+    for part_number, offset in enumerate(range(0, file_size, part_size)):
+        part_name = f"{base_name}.part{str(part_number).zfill(3)}{file_ext}"
+        yield part_number, FilePart(file_path, offset, min(part_size, file_size - offset), part_name)
@@ -0,0 +1,129 @@
+# ---------------------------------------------------
+# File Name: stream.py
+# Description: A Pyrogram bot for downloading files from Telegram channels or groups
+#              and uploading them back to Telegram.
+# Author: Gagan
+# GitHub: https://github.com/devgaganin/
+# Telegram: https://t.me/team_spy_pro
+# YouTube: https://youtube.com/@dev_gagan
+# Created: 2025-01-11
+# Last Modified: 2025-01-11
+# Version: 2.0.5
+# License: MIT License
+# ---------------------------------------------------
+
+import asyncio
+import math
+from pyrogram import raw, types, utils
+from pyrogram.enums import ParseMode
+from config import STREAM_BUFFER_PARTS, STREAM_UPLOAD_WORKERS
+
+# Telegram wants every part but the last one to be exactly this size
+UPLOAD_PART_SIZE = 512 * 1024
+# below this the regular SaveFilePart path (with md5) is used, not worth streaming
+MIN_STREAM_SIZE = 10 * 1024 * 1024
+
+
+async def _pipe(userbot, msg, client, file_id, file_size, progress, progress_args):
+    """Feed userbot download chunks into SaveBigFilePart calls through a bounded queue."""
+    total_parts = math.ceil(file_size / UPLOAD_PART_SIZE)
+    queue = asyncio.Queue(maxsize=STREAM_BUFFER_PARTS)
+    uploaded = 0
+
+    async def produce():
+        buffer = bytearray()
+        part = 0
+        async for chunk in userbot.stream_media(msg):
+            buffer.extend(chunk)
+            while len(buffer) >= UPLOAD_PART_SIZE:
+                await queue.put((part, bytes(buffer[:UPLOAD_PART_SIZE])))
+                del buffer[:UPLOAD_PART_SIZE]
+                part += 1
+        if buffer:
+            await queue.put((part, bytes(buffer)))
+            part += 1
+        if part != total_parts:
+            raise ValueError(f"Streamed {part} parts, expected {total_parts}")
+        for _ in range(STREAM_UPLOAD_WORKERS):
+            await queue.put(None)
+
+    async def consume():
+        nonlocal uploaded
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            part, data = item
+            await client.invoke(
+                raw.functions.upload.SaveBigFilePart(
+                    file_id=file_id,
+                    file_part=part,
+                    file_total_parts=total_parts,
+                    bytes=data
+                )
+            )
+            uploaded += len(data)
+            if progress:
+                await progress(min(uploaded, file_size), file_size, *progress_args)
+
+    tasks = [asyncio.create_task(produce())]
+    tasks += [asyncio.create_task(consume()) for _ in range(STREAM_UPLOAD_WORKERS)]
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            if task.exception():
+                raise task.exception()
+    finally:
+        for task in tasks:
+            task.cancel()
+    return total_parts
+
+
+async def stream_upload(userbot, client, msg, chat_id, file_name, caption, topic_id=None, thumb=None,
+                        before_send=None, progress=None, progress_args=()):
+    """Re-upload the media of `msg` to `chat_id` while it is still being downloaded.
+
+    Only the final SendMedia touches the target chat; `before_send` runs right before it.
+    """
+    media = msg.video or msg.document
+    file_id = client.rnd_id()
+    total_parts = await _pipe(userbot, msg, client, file_id, media.file_size, progress, progress_args)
+
+    attributes = [raw.types.DocumentAttributeFilename(file_name=file_name)]
+    if msg.video:
+        attributes.append(
+            raw.types.DocumentAttributeVideo(
+                supports_streaming=True,
+                duration=msg.video.duration or 0,
+                w=msg.video.width or 1,
+                h=msg.video.height or 1
+            )
+        )
+    input_media = raw.types.InputMediaUploadedDocument(
+        mime_type=media.mime_type or ("video/mp4" if msg.video else "application/octet-stream"),
+        file=raw.types.InputFileBig(id=file_id, parts=total_parts, name=file_name),
+        thumb=await client.save_file(thumb) if thumb else None,
+        attributes=attributes
+    )
+
+    if before_send:
+        await before_send()
+    r = await client.invoke(
+        raw.functions.messages.SendMedia(
+            peer=await client.resolve_peer(chat_id),
+            media=input_media,
+            reply_to=raw.types.InputReplyToMessage(reply_to_msg_id=topic_id) if topic_id else None,
+            random_id=client.rnd_id(),
+            **await utils.parse_text_entities(client, caption or "", ParseMode.MARKDOWN, None)
+        )
+    )
+    users = {i.id: i for i in r.users}
+    chats = {i.id: i for i in r.chats}
+    for update in r.updates:
+        if isinstance(update, (raw.types.UpdateNewMessage, raw.types.UpdateNewChannelMessage)):
+            return await types.Message._parse(client, update.message, users, chats)
+
+
+def can_stream(msg, file_size, size_limit):
+    media = msg.video or msg.document
+    return bool(media and media.file_size) and MIN_STREAM_SIZE < file_size <= size_limit
@@ -0,0 +1,155 @@
+# ---------------------------------------------------
+# File Name: thumbnails.py
+# Description: A Pyrogram bot for downloading files from Telegram channels or groups
+#              and uploading them back to Telegram.
+# Author: Gagan
+# GitHub: https://github.com/devgaganin/
+# Telegram: https://t.me/team_spy_pro
+# YouTube: https://youtube.com/@dev_gagan
+# Created: 2025-01-11
+# Last Modified: 2025-01-11
+# Version: 2.0.5
+# License: MIT License
+# ---------------------------------------------------
+
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+from config import THUMB_WORKERS, THUMB_CACHE_SIZE, THUMB_DIR, THUMB_TIMEOUT
+from devgagan.core.mongo import settings_db
+
+# Telegram drops thumbnails larger than 320px on either side
+THUMB_SIZE = 320
+
+_slots = asyncio.Semaphore(THUMB_WORKERS)
+# source media id -> thumbnail path owned by the cache, least recently used first
+_cache = OrderedDict()
+# user id -> thumbnail_id of the custom thumbnail written to this host's disk
+_custom = {}
+counters = {"generated": 0, "failed": 0, "cache_hits": 0, "waiting": 0, "running": 0,
+            "total_wait": 0.0, "total_run": 0.0}
+
+
+def _remember(key, path):
+    _cache[key] = path
+    _cache.move_to_end(key)
+    while len(_cache) > THUMB_CACHE_SIZE:
+        _, evicted = _cache.popitem(last=False)
+        try:
+            os.remove(evicted)
+        except OSError:
+            pass
+
+
+def is_cached(path):
+    return path in _cache.values()
+
+
+def _write(path, data):
+    temp = f"{path}.{uuid.uuid4().hex}.temp"
+    with open(temp, "wb") as f:
+        f.write(data)
+    # an upload may be reading the previous copy
+    os.replace(temp, path)
+
+
+async def custom(user_id):
+    """Path of the user's own thumbnail, copied from Mongo the first time this host needs it."""
+    thumbnail_id = await settings_db.get_setting(user_id, "thumbnail_id")
+    if thumbnail_id is None:
+        return None
+    path = f"{user_id}.jpg"
+    if _custom.get(user_id) != thumbnail_id or not os.path.exists(path):
+        data = await settings_db.get_thumbnail(user_id)
+        if not data:
+            return None
+        await asyncio.to_thread(_write, path, data)
+        _custom[user_id] = thumbnail_id
+    return path
+
+
+async def remove_custom(user_id):
+    """Forget the user's own thumbnail, False when they had none."""
+    _custom.pop(user_id, None)
+    if os.path.exists(f"{user_id}.jpg"):
+        os.remove(f"{user_id}.jpg")
+    return await settings_db.remove_thumbnail(user_id)
+
+
+def discard(path, sender):
+    """Delete a thumbnail after its upload unless it is the user's own or still cached."""
+    if not path or not os.path.exists(path):
+        return
+    if os.path.basename(path) == f"{sender}.jpg" or is_cached(path):
+        return
+    os.remove(path)
+
+
+async def _run_ffmpeg(video, seconds, out):
+    # -ss before -i seeks to the nearest keyframe without decoding up to it,
+    # and the scale filter shrinks the frame in the same pass
+    process = await asyncio.create_subprocess_exec(
+        "ffmpeg", "-hide_banner", "-loglevel", "error",
+        "-ss", f"{seconds:.3f}", "-noaccurate_seek",
+        "-i", video,
+        "-frames:v", "1",
+        "-vf", f"scale={THUMB_SIZE}:{THUMB_SIZE}:force_original_aspect_ratio=decrease",
+        "-q:v", "3",
+        "-y", out,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.DEVNULL
+    )
+    try:
+        await asyncio.wait_for(process.wait(), THUMB_TIMEOUT)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        if os.path.exists(out):
+            os.remove(out)
+
+
+async def generate(video, duration, key=None):
+    """Grab a downscaled frame from the middle of `video`; cached per source media id when `key` is set."""
+    if key is not None:
+        path = _cache.get(key)
+        if path and os.path.exists(path):
+            _cache.move_to_end(key)
+            counters["cache_hits"] += 1
+            return path
+    os.makedirs(THUMB_DIR, exist_ok=True)
+    out = os.path.join(THUMB_DIR, f"{uuid.uuid4().hex}.jpg")
+    queued = time.monotonic()
+    counters["waiting"] += 1
+    async with _slots:
+        counters["waiting"] -= 1
+        counters["running"] += 1
+        started = time.monotonic()
+        counters["total_wait"] += started - queued
+        try:
+            await _run_ffmpeg(video, max(int(duration or 0), 0) / 2, out)
+        finally:
+            counters["running"] -= 1
+            counters["total_run"] += time.monotonic() - started
+    if not os.path.isfile(out):
+        counters["failed"] += 1
+        return None
+    counters["generated"] += 1
+    if key is not None:
+        _remember(key, out)
+    return out
+
+
+def stats():
+    done = counters["generated"] + counters["failed"]
+    return {
+        "queue_depth": counters["waiting"],
+        "running": counters["running"],
+        "generated": counters["generated"],
+        "failed": counters["failed"],
+        "cache_hits": counters["cache_hits"],
+        "cached": len(_cache),
+        "avg_wait": counters["total_wait"] / done if done else 0.0,
+        "avg_run": counters["total_run"] / done if done else 0.0
+    }
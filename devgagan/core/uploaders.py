@@ -0,0 +1,207 @@
+# ---------------------------------------------------
+# File Name: uploaders.py
+# Description: A Pyrogram bot for downloading files from Telegram channels or groups
+#              and uploading them back to Telegram.
+# Author: Gagan
+# GitHub: https://github.com/devgaganin/
+# Telegram: https://t.me/team_spy_pro
+# YouTube: https://youtube.com/@dev_gagan
+# Created: 2025-01-11
+# Last Modified: 2025-01-11
+# Version: 2.0.5
+# License: MIT License
+# ---------------------------------------------------
+
+import asyncio
+import inspect
+import os
+import random
+import time
+from pyrogram import Client, raw
+from pyrogram.errors import FloodWait
+from config import API_ID, API_HASH, API_USER_RATE, API_MAX_RETRIES, API_MAX_FLOOD_WAIT, UPLOADER_SESSIONS, UPLOAD_CONNECTIONS
+from devgagan.core import parallel_download, metrics
+from devgagan.core.scheduler import schedule_pyrogram, schedulers, unschedule
+
+# files above this must go through upload.saveBigFilePart, 512 KiB is its largest part
+BIG_FILE_SIZE = 10 * 1024 * 1024
+PART_SIZE = 512 * 1024
+# assumed speed of a session that has not finished an upload yet
+DEFAULT_THROUGHPUT = 5 * 1024 * 1024
+
+
+class Uploader:
+    def __init__(self, client, scheduler=None):
+        self.client = client
+        self.name = client.name
+        # pauses the whole account after a FloodWait on any of its other requests
+        self.scheduler = scheduler
+        self.active = 0
+        self.pending_bytes = 0
+        self.uploads = 0
+        self.uploaded_bytes = 0
+        self.floods = 0
+        self.flood_until = 0
+        # bytes per second, smoothed over the last uploads
+        self.throughput = DEFAULT_THROUGHPUT
+
+    def paused_for(self, now):
+        paused_until = max(self.flood_until, self.scheduler.paused_until if self.scheduler else 0)
+        return max(0, paused_until - now)
+
+    def finish_estimate(self, size, now):
+        """Seconds until a new file of `size` bytes would be uploaded by this session."""
+        return self.paused_for(now) + (self.pending_bytes + size) / self.throughput
+
+    def record(self, size, elapsed):
+        self.uploads += 1
+        self.uploaded_bytes += size
+        # very short uploads are dominated by latency and say little about bandwidth
+        if elapsed >= 1:
+            self.throughput = 0.7 * self.throughput + 0.3 * (size / elapsed)
+
+    def stats(self, now):
+        return {
+            "active": self.active,
+            "pending_bytes": self.pending_bytes,
+            "uploads": self.uploads,
+            "uploaded_bytes": self.uploaded_bytes,
+            "throughput": self.throughput,
+            "floods": self.floods,
+            "paused_for": self.paused_for(now)
+        }
+
+
+_pool = []
+
+
+def enable_parallel_save(client, connections=UPLOAD_CONNECTIONS):
+    """Make the client's uploads save big files over several media sessions at once.
+
+    Pyrogram's send_* methods upload through `client.save_file`, so replacing it on the
+    instance covers all of them, including their FilePartMissing retries.
+    """
+    save_file = client.save_file
+
+    async def parallel_save_file(path, file_id=None, file_part=0, progress=None, progress_args=()):
+        if file_id is not None or not isinstance(path, str) or os.path.getsize(path) <= BIG_FILE_SIZE:
+            return await save_file(path, file_id=file_id, file_part=file_part, progress=progress, progress_args=progress_args)
+        return await _save_big_file(client, path, connections, progress, progress_args)
+
+    client.save_file = parallel_save_file
+
+
+async def _save_part(session, request):
+    for attempt in range(API_MAX_RETRIES + 1):
+        try:
+            return await session.invoke(request)
+        except FloodWait as e:
+            # a long wait goes up to upload(), which moves the file to another session
+            if e.value > API_MAX_FLOOD_WAIT or attempt == API_MAX_RETRIES:
+                raise
+            await asyncio.sleep(e.value)
+
+
+async def _save_big_file(client, path, connections, progress, progress_args):
+    size = os.path.getsize(path)
+    total_parts = (size + PART_SIZE - 1) // PART_SIZE
+    file_id = random.randint(-2 ** 63, 2 ** 63 - 1)
+    sessions = await parallel_download.media_sessions(client, await client.storage.dc_id(), connections)
+    parts = iter(range(total_parts))
+    done = 0
+    loop = asyncio.get_running_loop()
+
+    async def worker(session, fd):
+        nonlocal done
+        for index in parts:
+            chunk = await loop.run_in_executor(None, os.pread, fd, PART_SIZE, index * PART_SIZE)
+            await _save_part(session, raw.functions.upload.SaveBigFilePart(
+                file_id=file_id, file_part=index, file_total_parts=total_parts, bytes=chunk
+            ))
+            done += len(chunk)
+            if progress:
+                result = progress(min(done, size), size, *progress_args)
+                if inspect.isawaitable(result):
+                    await result
+
+    fd = os.open(path, os.O_RDONLY)
+    tasks = [asyncio.create_task(worker(session, fd)) for session in sessions]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    finally:
+        os.close(fd)
+    return raw.types.InputFileBig(id=file_id, parts=total_parts, name=os.path.basename(path))
+
+
+async def start(pro=None):
+    """Start the premium uploader sessions; `pro` (the STRING session) joins the pool too."""
+    if pro is not None:
+        enable_parallel_save(pro)
+        _pool.append(Uploader(pro, schedulers.get(pro.name)))
+    for index, session in enumerate(UPLOADER_SESSIONS, start=1):
+        client = Client(f"uploader_{index}", api_id=API_ID, api_hash=API_HASH, session_string=session, no_updates=True)
+        scheduler = schedule_pyrogram(client, client.name, API_USER_RATE)
+        try:
+            await client.start()
+        except Exception as e:
+            print(f"Error starting uploader session {index}: {e}")
+            unschedule(client.name)
+            continue
+        enable_parallel_save(client)
+        _pool.append(Uploader(client, scheduler))
+    print(f"{len(_pool)} 4GB uploader session(s) ready.")
+
+
+def available():
+    return bool(_pool)
+
+
+def pick(size, exclude=()):
+    now = time.monotonic()
+    candidates = [uploader for uploader in _pool if uploader not in exclude]
+    if not candidates:
+        return None
+    return min(candidates, key=lambda uploader: uploader.finish_estimate(size, now))
+
+
+async def upload(send, size):
+    """Run `send(client)` on the session expected to finish soonest.
+
+    A session that hits a FloodWait is marked paused and the file moves to the next one.
+    """
+    tried = []
+    while True:
+        uploader = pick(size, tried)
+        if uploader is None:
+            raise RuntimeError("No 4GB uploader session available")
+        tried.append(uploader)
+        uploader.active += 1
+        uploader.pending_bytes += size
+        started = time.monotonic()
+        try:
+            result = await send(uploader.client)
+        except FloodWait as e:
+            uploader.floods += 1
+            uploader.flood_until = time.monotonic() + e.value
+            print(f"FloodWait of {e.value}s on {uploader.name}, moving the upload to another session")
+            if len(tried) == len(_pool):
+                raise
+            continue
+        finally:
+            uploader.active -= 1
+            uploader.pending_bytes -= size
+        elapsed = time.monotonic() - started
+        uploader.record(size, elapsed)
+        metrics.observe_stage("upload", elapsed)
+        metrics.record_transfer("upload", size, elapsed, uploader.name)
+        return result
+
+
+def stats():
+    now = time.monotonic()
+    return {uploader.name: uploader.stats(now) for uploader in _pool}
@@ -0,0 +1,204 @@
+# ---------------------------------------------------
+# File Name: userbot_pool.py
+# Description: A Pyrogram bot for downloading files from Telegram channels or groups
+#              and uploading them back to Telegram.
+# Author: Gagan
+# GitHub: https://github.com/devgaganin/
+# Telegram: https://t.me/team_spy_pro
+# YouTube: https://youtube.com/@dev_gagan
+# Created: 2025-01-11
+# Last Modified: 2025-01-11
+# Version: 2.0.5
+# License: MIT License
+# ---------------------------------------------------
+
+import asyncio
+import time
+from collections import OrderedDict
+from pyrogram import Client
+from pyrogram.errors import AuthKeyUnregistered, SessionExpired, SessionRevoked, UserDeactivated, UserDeactivatedBan
+from config import (
+    API_ID, API_HASH, API_USER_RATE, USERBOT_IDLE_TIMEOUT, USERBOT_POOL_SIZE,
+    USERBOT_EXPIRED_CACHE_SIZE, USERBOT_EXPIRED_TTL
+)
+from devgagan.core.cache import TTLCache
+from devgagan.core.scheduler import schedule_pyrogram, unschedule
+from devgagan.core import parallel_download, metrics
+from devgagan.core.mongo import db
+
+DEVICE_MODEL = 'iPhone 16 Pro'  # added gareebi text
+
+# errors that mean the session itself is dead; anything else may pass on the next try
+LOGIN_ERRORS = (AuthKeyUnregistered, SessionExpired, SessionRevoked, UserDeactivated, UserDeactivatedBan)
+
+
+class LoginExpired(Exception):
+    pass
+
+
+class PooledUserbot:
+    def __init__(self, client, session):
+        self.client = client
+        self.session = session
+        self.refs = 0
+        self.last_used = time.monotonic()
+
+
+# user_id -> PooledUserbot, least recently used first
+_pool = OrderedDict()
+# user_id -> entries taken out of the pool while jobs still use them, stopped on their last release
+_retired = {}
+# user_id -> session string that already failed to start, so it is not retried on every link
+_expired_sessions = TTLCache(maxsize=USERBOT_EXPIRED_CACHE_SIZE, ttl=USERBOT_EXPIRED_TTL)
+_locks = {}
+_released = asyncio.Condition()
+
+
+def live_clients():
+    return len(_pool)
+
+
+@metrics.collector
+def _export_metrics():
+    metrics.userbot_clients.set(len(_pool))
+
+
+async def _stop(entry):
+    unschedule(entry.client.name)
+    await parallel_download.close(entry.client)
+    try:
+        await entry.client.stop()
+    except Exception as e:
+        print(f"Error stopping userbot: {e}")
+
+
+def _forget_lock(user_id):
+    # an acquire that still waits on it notices the swap and takes the new lock
+    lock = _locks.get(user_id)
+    if lock is not None and not lock.locked():
+        del _locks[user_id]
+
+
+async def _retire(user_id, entry):
+    """Stop a client that left the pool, or once the last job using it releases it."""
+    if entry.refs > 0:
+        _retired.setdefault(user_id, []).append(entry)
+    else:
+        await _stop(entry)
+    if user_id not in _pool:
+        _forget_lock(user_id)
+
+
+async def _make_room():
+    # wait until the pool is below its cap, stopping the least recently used idle client
+    async with _released:
+        while len(_pool) >= USERBOT_POOL_SIZE:
+            idle = next((uid for uid, entry in _pool.items() if entry.refs == 0), None)
+            if idle is not None:
+                await _retire(idle, _pool.pop(idle))
+                continue
+            await _released.wait()
+
+
+async def _start(user_id, session):
+    entry = _pool.get(user_id)
+    if entry and entry.session != session:
+        # user logged in again with a new session
+        await _retire(user_id, _pool.pop(user_id))
+        entry = None
+    if entry is None:
+        await _make_room()
+        client = Client(
+            f"userbot_{user_id}",
+            api_id=API_ID,
+            api_hash=API_HASH,
+            device_model=DEVICE_MODEL,
+            session_string=session,
+            in_memory=True
+        )
+        schedule_pyrogram(client, client.name, API_USER_RATE)
+        try:
+            await client.start()
+        except LOGIN_ERRORS:
+            unschedule(client.name)
+            _expired_sessions.set(user_id, session)
+            raise LoginExpired()
+        except Exception:
+            unschedule(client.name)
+            raise
+        _expired_sessions.pop(user_id)
+        entry = PooledUserbot(client, session)
+        _pool[user_id] = entry
+    _pool.move_to_end(user_id)
+    entry.refs += 1
+    entry.last_used = time.monotonic()
+    return entry.client
+
+
+async def acquire(user_id, session):
+    """Return a started client for the session, reusing the pooled one when it is still live."""
+    if _expired_sessions.get(user_id) == session:
+        raise LoginExpired()
+    while True:
+        lock = _locks.setdefault(user_id, asyncio.Lock())
+        try:
+            async with lock:
+                if _locks.get(user_id) is not lock:
+                    # dropped while this call waited on it
+                    continue
+                return await _start(user_id, session)
+        finally:
+            if user_id not in _pool:
+                _forget_lock(user_id)
+
+
+async def release(user_id, client):
+    """Give back a client from acquire(); a retired one stops with its last user."""
+    entry = _pool.get(user_id)
+    if entry is None or entry.client is not client:
+        entry = next((e for e in _retired.get(user_id, ()) if e.client is client), None)
+    if entry is None or entry.refs == 0:
+        return
+    entry.refs -= 1
+    entry.last_used = time.monotonic()
+    if entry.refs == 0 and entry in _retired.get(user_id, ()):
+        _retired[user_id].remove(entry)
+        if not _retired[user_id]:
+            del _retired[user_id]
+        await _stop(entry)
+    async with _released:
+        _released.notify_all()
+
+
+async def discard(user_id):
+    """Log a user's client out of this process; a job still using it keeps it until done."""
+    _expired_sessions.pop(user_id)
+    entry = _pool.pop(user_id, None)
+    if entry:
+        await _retire(user_id, entry)
+        async with _released:
+            _released.notify_all()
+
+
+async def _drop_stale_sessions():
+    # /logout and new logins are handled by the ingress process, the database tells the rest
+    if not _pool:
+        return
+    sessions = await db.get_sessions(list(_pool))
+    for user_id, entry in list(_pool.items()):
+        if sessions.get(user_id) != entry.session and _pool.get(user_id) is entry:
+            await _retire(user_id, _pool.pop(user_id))
+
+
+async def evict_idle_userbots():
+    while True:
+        await asyncio.sleep(max(USERBOT_IDLE_TIMEOUT // 4, 1))
+        now = time.monotonic()
+        for user_id, entry in list(_pool.items()):
+            if entry.refs == 0 and now - entry.last_used >= USERBOT_IDLE_TIMEOUT:
+                _pool.pop(user_id, None)
+                await _retire(user_id, entry)
+        try:
+            await _drop_stale_sessions()
+        except Exception as e:
+            print(f"Error checking userbot sessions: {e}")
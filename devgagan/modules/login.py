@@ -19,6 +19,7 @@ import os
 import asyncio
 import string
 from devgagan.core.mongo import db
+from devgagan.core import userbot_pool
 from devgagan.core.func import subscribe, chk_user
 from config import API_ID as api_id, API_HASH as api_hash
 from pyrogram.errors import (
@@ -58,6 +59,7 @@ async def delete_session_files(user_id):
 async def clear_db(client, message):
     user_id = message.chat.id
     files_deleted = await delete_session_files(user_id)
+    await userbot_pool.discard(user_id)
     try:
         await db.remove_session(user_id)
     except Exception:
@@ -19,10 +19,13 @@ import string
 import asyncio
 from pyrogram import filters, Client
 from devgagan import app, userrbot
-from config import API_ID, API_HASH, FREEMIUM_LIMIT, PREMIUM_LIMIT, OWNER_ID, DEFAULT_SESSION
+from config import API_ID, API_HASH, FREEMIUM_LIMIT, PREMIUM_LIMIT, OWNER_ID, DEFAULT_SESSION, BATCH_WORKERS_FREE, BATCH_WORKERS_PREMIUM, JOB_MAX_ATTEMPTS
 from devgagan.core.get_func import get_msg
 from devgagan.core.func import *
-from devgagan.core.mongo import db
+from devgagan.core.mongo import db, settings_db
+from devgagan.core import userbot_pool
+from devgagan.core.batch import BatchEngine
+from devgagan.core import jobs
 from pyrogram.errors import FloodWait
 from datetime import datetime, timedelta
 from pyrogram.types import InlineKeyboardButton, InlineKeyboardMarkup
@@ -33,10 +36,6 @@ async def generate_random_name(length=8):
 
 
 
-users_loop = {}
-interval_set = {}
-batch_mode = {}
-
 async def process_and_upload_link(userbot, user_id, msg_id, link, retry_count, message):
     try:
         await get_msg(userbot, user_id, msg_id, link, retry_count, message)
@@ -44,7 +43,6 @@ async def process_and_upload_link(userbot, user_id, msg_id, link, retry_count, m
             await app.delete_messages(user_id, msg_id)
         except Exception:
             pass
-        await asyncio.sleep(15)
     finally:
         pass
 
@@ -53,23 +51,20 @@ async def check_interval(user_id, freecheck):
     if freecheck != 1 or await is_user_verified(user_id):  # Premium or owner users can always proceed
         return True, None
 
-    now = datetime.now()
+    now = datetime.utcnow()
 
-    # Check if the user is on cooldown
-    if user_id in interval_set:
-        cooldown_end = interval_set[user_id]
-        if now < cooldown_end:
-            remaining_time = (cooldown_end - now).seconds
-            return False, f"Please wait {remaining_time} seconds(s) before sending another link. Alternatively, purchase premium for instant access.\n\n> Hey 👋 You can use /token to use the bot free for 3 hours without any time limit."
-        else:
-            del interval_set[user_id]  # Cooldown expired, remove user from interval set
+    # Check if the user is on cooldown; the cooldown is shared by every process through the job store
+    cooldown_end = await jobs.store.get_cooldown(user_id)
+    if cooldown_end and now < cooldown_end:
+        remaining_time = (cooldown_end - now).seconds
+        return False, f"Please wait {remaining_time} seconds(s) before sending another link. Alternatively, purchase premium for instant access.\n\n> Hey 👋 You can use /token to use the bot free for 3 hours without any time limit."
 
     return True, None
 
 async def set_interval(user_id, interval_minutes=45):
-    now = datetime.now()
+    now = datetime.utcnow()
     # Set the cooldown interval for the user
-    interval_set[user_id] = now + timedelta(seconds=interval_minutes)
+    await jobs.store.set_cooldown(user_id, now + timedelta(seconds=interval_minutes))
     
 
 @app.on_message(
@@ -79,12 +74,12 @@ async def set_interval(user_id, interval_minutes=45):
 async def single_link(_, message):
     user_id = message.chat.id
 
-    # Check subscription and batch mode
-    if await subscribe(_, message) == 1 or user_id in batch_mode:
+    # Check subscription
+    if await subscribe(_, message) == 1:
         return
 
-    # Check if user is already in a loop
-    if users_loop.get(user_id, False):
+    # Check if user already has a queued or running job
+    if await jobs.active_job(user_id):
         await message.reply(
             "You already have an ongoing process. Please wait for it to finish or cancel it with /cancel."
         )
@@ -101,11 +96,32 @@ async def single_link(_, message):
         await message.reply(response_message)
         return
 
-    # Add user to the loop
-    users_loop[user_id] = True
-
     link = message.text if "tg://openmessage" in message.text else get_link(message.text)
     msg = await message.reply("Processing...")
+    await jobs.enqueue(
+        "single", user_id,
+        chat_id=message.chat.id,
+        request_msg_id=message.id,
+        status_msg_id=msg.id,
+        link=link
+    )
+
+
+async def fetch_job_messages(job, *msg_ids):
+    """Re-fetch the request messages a job refers to, it may run in a later process."""
+    messages = await app.get_messages(job["chat_id"], list(msg_ids))
+    status = messages[-1]
+    # the user may have deleted their request, every handler only needs its chat
+    return [status if m.empty else m for m in messages]
+
+
+@jobs.handler("single")
+async def run_single_job(job):
+    user_id = job.user_id
+    # /settings may have changed in the process that took the command
+    settings_db.invalidate(user_id)
+    link = job["link"]
+    message, msg = await fetch_job_messages(job, job["request_msg_id"], job["status_msg_id"])
     userbot = await initialize_userbot(user_id)
     try:
         if await is_normal_tg_link(link):
@@ -115,32 +131,23 @@ async def single_link(_, message):
             await process_special_links(userbot, user_id, msg, link)
             
     except FloodWait as fw:
-        await msg.edit_text(f'Try again after {fw.x} seconds due to floodwait from Telegram.')
+        await msg.edit_text(f'Try again after {fw.value} seconds due to floodwait from Telegram.')
     except Exception as e:
         await msg.edit_text(f"Link: `{link}`\n\n**Error:** {str(e)}")
     finally:
-        users_loop[user_id] = False
+        await userbot_pool.release(user_id, userbot)
         try:
             await msg.delete()
         except Exception:
             pass
 
 
-async def initialize_userbot(user_id): # this ensure the single startup .. even if logged in or not
+async def initialize_userbot(user_id): # reuses the pooled client .. even if logged in or not
     data = await db.get_data(user_id)
     if data and data.get("session"):
         try:
-            device = 'iPhone 16 Pro' # added gareebi text
-            userbot = Client(
-                "userbot",
-                api_id=API_ID,
-                api_hash=API_HASH,
-                device_model=device,
-                session_string=data.get("session")
-            )
-            await userbot.start()
-            return userbot
-        except Exception:
+            return await userbot_pool.acquire(user_id, data.get("session"))
+        except userbot_pool.LoginExpired:
             await app.send_message(user_id, "Login Expired re do login")
             return None
     else:
@@ -170,6 +177,9 @@ async def process_special_links(userbot, user_id, msg, link):
     await msg.edit_text("Invalid link...")
 
 
+BATCH_KEYBOARD = InlineKeyboardMarkup([[InlineKeyboardButton("Join Channel", url="https://t.me/ProToppers")]])
+
+
 @app.on_message(filters.command("batch") & filters.private)
 async def batch_link(_, message):
     join = await subscribe(_, message)
@@ -177,7 +187,7 @@ async def batch_link(_, message):
         return
     user_id = message.chat.id
     # Check if a batch process is already running
-    if users_loop.get(user_id, False):
+    if await jobs.active_job(user_id):
         await app.send_message(
             message.chat.id,
             "You already have a batch process running. Please wait for it to complete."
@@ -227,87 +237,115 @@ async def batch_link(_, message):
         await message.reply(response_message)
         return
         
-    join_button = InlineKeyboardButton("Join Channel", url="https://t.me/ProToppers")
-    keyboard = InlineKeyboardMarkup([[join_button]])
     pin_msg = await app.send_message(
         user_id,
         f"Batch process started ⚡\nProcessing: 0/{cl}\n\n**Powered by @ProToppers**",
-        reply_markup=keyboard
+        reply_markup=BATCH_KEYBOARD
     )
     await pin_msg.pin(both_sides=True)
 
-    users_loop[user_id] = True
+    await jobs.enqueue(
+        "batch", user_id,
+        chat_id=message.chat.id,
+        request_msg_id=message.id,
+        pin_msg_id=pin_msg.id,
+        base_link='/'.join(start_id.split('/')[:-1]),
+        start=cs,
+        count=cl,
+        workers=BATCH_WORKERS_FREE if freecheck == 1 else BATCH_WORKERS_PREMIUM
+    )
+
+
+def failed_summary(failed, limit=50):
+    """Message ids a batch could not deliver, for the user to retry by hand."""
+    if not failed:
+        return ""
+    shown = ", ".join(str(msg_id) for msg_id in failed[:limit])
+    more = f" and {len(failed) - limit} more" if len(failed) > limit else ""
+    return f"\n\n{len(failed)} message(s) could not be saved: `{shown}`{more}"
+
+
+@jobs.handler("batch")
+async def run_batch_job(job):
+    user_id = job.user_id
+    # /settings may have changed in the process that took the command
+    settings_db.invalidate(user_id)
+    cs, cl = job["start"], job["count"]
+    # items before this were delivered by an earlier run of the job
+    resume_from = job.get("completed", 0)
+    message, pin_msg = await fetch_job_messages(job, job["request_msg_id"], job["pin_msg_id"])
+    userbot = None
     try:
-        normal_links_handled = False
         userbot = await initialize_userbot(user_id)
-        # Handle normal links first
-        for i in range(cs, cs + cl):
-            if user_id in users_loop and users_loop[user_id]:
-                url = f"{'/'.join(start_id.split('/')[:-1])}/{i}"
-                link = get_link(url)
-                # Process t.me links (normal) without userbot
-                if 't.me/' in link and not any(x in link for x in ['t.me/b/', 't.me/c/', 'tg://openmessage']):
-                    msg = await app.send_message(message.chat.id, f"Processing...")
-                    await process_and_upload_link(userbot, user_id, msg.id, link, 0, message)
-                    await pin_msg.edit_text(
-                        f"Batch process started ⚡\nProcessing: {i - cs + 1}/{cl}\n\n**__Powered by @ProToppers__**",
-                        reply_markup=keyboard
-                    )
-                    normal_links_handled = True
-        if normal_links_handled:
-            await set_interval(user_id, interval_minutes=300)
-            await pin_msg.edit_text(
-                f"Batch completed successfully for {cl} messages 🎉\n\n**__Powered by @ProToppers__**",
-                reply_markup=keyboard
-            )
-            await app.send_message(message.chat.id, "Batch completed successfully! 🎉")
+        links = [get_link(f"{job['base_link']}/{i}") for i in range(cs + resume_from, cs + cl)]
+        if not links:
             return
-            
-        # Handle special links with userbot
-        for i in range(cs, cs + cl):
+        # Process t.me links (normal) without userbot, special links need the userbot
+        normal_links = 't.me/' in links[0] and not any(x in links[0] for x in ['t.me/b/', 't.me/c/', 'tg://openmessage'])
+        if not normal_links:
             if not userbot:
                 await app.send_message(message.chat.id, "Login in bot first ...")
-                users_loop[user_id] = False
                 return
-            if user_id in users_loop and users_loop[user_id]:
-                url = f"{'/'.join(start_id.split('/')[:-1])}/{i}"
-                link = get_link(url)
-                if any(x in link for x in ['t.me/b/', 't.me/c/']):
-                    msg = await app.send_message(message.chat.id, f"Processing...")
-                    await process_and_upload_link(userbot, user_id, msg.id, link, 0, message)
-                    await pin_msg.edit_text(
-                        f"Batch process started ⚡\nProcessing: {i - cs + 1}/{cl}\n\n**__Powered by @ProToppers__**",
-                        reply_markup=keyboard
-                    )
+            links = [link for link in links if any(x in link for x in ['t.me/b/', 't.me/c/'])]
+
+        async def process(link):
+            msg = await app.send_message(message.chat.id, f"Processing...")
+            await process_and_upload_link(userbot, user_id, msg.id, link, 0, message)
+
+        engine = BatchEngine(workers=job["workers"])
+        last_edit = 0
+
+        async def report(done):
+            nonlocal last_edit
+            await job.progress(resume_from + engine.delivered, [cs + resume_from + i for i in engine.failed])
+            if time.time() - last_edit < 5:
+                return
+            last_edit = time.time()
+            try:
+                await pin_msg.edit_text(
+                    f"Batch process started ⚡\nProcessing: {resume_from + done}/{cl}\n\n**__Powered by @ProToppers__**",
+                    reply_markup=BATCH_KEYBOARD
+                )
+            except Exception:
+                pass
+
+        await engine.run(links, process, lambda: job.active, on_done=report)
+        if not job.active:
+            return
 
         await set_interval(user_id, interval_minutes=300)
         await pin_msg.edit_text(
             f"Batch completed successfully for {cl} messages 🎉\n\n**__Powered by @ProToppers__**",
-            reply_markup=keyboard
+            reply_markup=BATCH_KEYBOARD
         )
-        await app.send_message(message.chat.id, "Batch completed successfully! 🎉")
+        # failures of earlier runs of a resumed job plus this run's
+        failed = sorted(set(job.get("failed", [])) | {cs + resume_from + i for i in engine.failed})
+        await app.send_message(message.chat.id, "Batch completed successfully! 🎉" + failed_summary(failed))
 
     except Exception as e:
         await app.send_message(message.chat.id, f"Error: {e}")
     finally:
-        users_loop.pop(user_id, None)
+        await userbot_pool.release(user_id, userbot)
+
+@jobs.exhausted("single")
+@jobs.exhausted("batch")
+async def report_exhausted_job(job):
+    await app.send_message(
+        job["chat_id"],
+        f"Your task was stopped after {JOB_MAX_ATTEMPTS} failed attempts. Please send the link again."
+        + failed_summary(sorted(job.get("failed", [])))
+    )
 
 @app.on_message(filters.command("cancel"))
 async def stop_batch(_, message):
     user_id = message.chat.id
 
     # Check if there is an active batch process for the user
-    if user_id in users_loop and users_loop[user_id]:
-        users_loop[user_id] = False  # Set the loop status to False
+    if await jobs.cancel(user_id):
         await app.send_message(
             message.chat.id, 
             "Batch processing has been stopped successfully. You can start a new batch now if you want."
         )
-    elif user_id in users_loop and not users_loop[user_id]:
-        await app.send_message(
-            message.chat.id, 
-            "The batch process was already stopped. No active batch to cancel."
-        )
     else:
         await app.send_message(
             message.chat.id, 
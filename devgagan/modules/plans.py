@@ -20,6 +20,7 @@ import asyncio
 from config import OWNER_ID
 from devgagan.core.func import get_seconds
 from devgagan.core.mongo import plans_db  
+from devgagan.core.expiry import run_expiry_check, resolve_names
 from pyrogram import filters 
 
 
@@ -181,48 +182,33 @@ async def transfer_premium(client, message):
 
 
 async def premium_remover():
-    all_users = await plans_db.premium_users()
-    removed_users = []
+    removed, removed_names = await run_expiry_check()
+    remaining = plans_db.premium_snapshot()
+    names = await resolve_names(remaining)
+    removed_users = [f"{removed_names.get(user_id, 'Unknown')} ({user_id})" for user_id in removed]
     not_removed_users = []
 
-    for user_id in all_users:
-        try:
-            user = await app.get_users(user_id)
-            chk_time = await plans_db.check_premium(user_id)
-
-            if chk_time and chk_time.get("expire_date"):
-                expiry_date = chk_time["expire_date"]
-
-                if expiry_date <= datetime.datetime.now():
-                    name = user.first_name
-                    await plans_db.remove_premium(user_id)
-                    await app.send_message(user_id, text=f"Hello {name}, your premium subscription has expired.")
-                    print(f"{name}, your premium subscription has expired. contact at @UncleChipssBot to get premium")
-                    removed_users.append(f"{name} ({user_id})")
-                else:
-                    name = user.first_name
-                    current_time = datetime.datetime.now()
-                    time_left = expiry_date - current_time
-
-                    days = time_left.days
-                    hours, remainder = divmod(time_left.seconds, 3600)
-                    minutes, seconds = divmod(remainder, 60)
-
-                    if days > 0:
-                        remaining_time = f"{days} days, {hours} hours, {minutes} minutes, {seconds} seconds"
-                    elif hours > 0:
-                        remaining_time = f"{hours} hours, {minutes} minutes, {seconds} seconds"
-                    elif minutes > 0:
-                        remaining_time = f"{minutes} minutes, {seconds} seconds"
-                    else:
-                        remaining_time = f"{seconds} seconds"
-
-                    print(f"{name} : Remaining Time : {remaining_time}")
-                    not_removed_users.append(f"{name} ({user_id})")
-        except:
-            await plans_db.remove_premium(user_id)
-            print(f"Unknown users captured : {user_id} removed")
-            removed_users.append(f"Unknown ({user_id})")
+    current_time = datetime.datetime.now()
+    for user_id, expiry_date in remaining.items():
+        name = names.get(user_id, "Unknown")
+        if expiry_date:
+            time_left = expiry_date - current_time
+
+            days = time_left.days
+            hours, remainder = divmod(time_left.seconds, 3600)
+            minutes, seconds = divmod(remainder, 60)
+
+            if days > 0:
+                remaining_time = f"{days} days, {hours} hours, {minutes} minutes, {seconds} seconds"
+            elif hours > 0:
+                remaining_time = f"{hours} hours, {minutes} minutes, {seconds} seconds"
+            elif minutes > 0:
+                remaining_time = f"{minutes} minutes, {seconds} seconds"
+            else:
+                remaining_time = f"{seconds} seconds"
+
+            print(f"{name} : Remaining Time : {remaining_time}")
+        not_removed_users.append(f"{name} ({user_id})")
 
     return removed_users, not_removed_users
 
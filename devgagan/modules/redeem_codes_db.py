@@ -36,27 +36,27 @@ class RedeemCodesDB:
         
         return codes
     
-    def redeem_code(self, code: str, user_id: int) -> Tuple[bool, str]:
-        """Redeem a code for premium access"""
+    def redeem_code(self, code: str, user_id: int) -> Tuple[bool, str, Optional[datetime]]:
+        """Redeem a code for premium access, returning the new premium end on success"""
         
         # Check if user already has active premium
         user = self.users.find_one({"user_id": user_id})
         if user and user.get("is_premium") and user.get("premium_until"):
             if datetime.now() < user["premium_until"]:
-                return False, "You already have premium. You can't redeem another code while premium is active."
+                return False, "You already have premium. You can't redeem another code while premium is active.", None
         
         # Check if code exists and is valid
         code_data = self.redeem_codes.find_one({"code": code})
         
         if not code_data:
-            return False, "❌ Invalid redemption code!"
+            return False, "❌ Invalid redemption code!", None
         
         if code_data["is_used"]:
-            return False, "❌ This code has already been redeemed!"
+            return False, "❌ This code has already been redeemed!", None
         
         # Check if code has expired
         if datetime.now() > code_data["expires_at"]:
-            return False, "❌ This redemption code has expired!"
+            return False, "❌ This redemption code has expired!", None
         
         # Mark code as used
         self.redeem_codes.update_one(
@@ -87,7 +87,7 @@ class RedeemCodesDB:
         )
         
         duration_text = self.format_duration(code_data["premium_duration_days"])
-        return True, f"🎉 **Congratulations!**\n✅ Code successfully redeemed!\n⏱️ **Premium Duration:** {duration_text}\n📅 **Expires On:** {new_end.strftime('%d-%m-%Y %I:%M:%S %p')}\n\nEnjoy your premium access! Use `/status` to check your subscription details."
+        return True, f"🎉 **Congratulations!**\n✅ Code successfully redeemed!\n⏱️ **Premium Duration:** {duration_text}\n📅 **Expires On:** {new_end.strftime('%d-%m-%Y %I:%M:%S %p')}\n\nEnjoy your premium access! Use `/status` to check your subscription details.", new_end
     
     def format_duration(self, days: float) -> str:
         """Format duration in days to human readable format"""
@@ -5,6 +5,7 @@ import asyncio
 
 from config import OWNER_ID, MONGO_DB
 from devgagan.modules.redeem_codes_db import RedeemCodesDB
+from devgagan.core.mongo import plans_db
 
 # Initialize database
 redeem_db = RedeemCodesDB(MONGO_DB, "restricted_bot")
@@ -86,9 +87,11 @@ async def redeem_command(client: Client, message: Message):
     user_id = message.from_user.id
     
     try:
-        success, response_message = redeem_db.redeem_code(code, user_id)
+        success, response_message, premium_until = redeem_db.redeem_code(code, user_id)
         
         if success:
+            # Mirror the redeemed plan into the premium index used by chk_user
+            await plans_db.add_premium(user_id, premium_until)
             await message.reply_text(f"🎉 **Congratulations, {message.from_user.mention}!**\n{response_message}")
         else:
             await message.reply_text(response_message)
@@ -17,11 +17,13 @@
 import time
 import sys
 import motor
+import devgagan
 from devgagan import app
 from pyrogram import filters
 from config import OWNER_ID
-from devgagan.core.mongo.users_db import get_users, add_user, get_user
-from devgagan.core.mongo.plans_db import premium_users
+from devgagan.core.mongo.users_db import total_users, add_user
+from devgagan.core.mongo.plans_db import premium_count
+from devgagan.core import jobs, process_stats
 
 
 
@@ -31,9 +33,8 @@ start_time = time.time()
 async def chat_watcher_func(_, message):
     try:
         if message.from_user:
-            us_in_db = await get_user(message.from_user.id)
-            if not us_in_db:
-                await add_user(message.from_user.id)
+            # also clears the inactive flag of a user who unblocked the bot
+            await add_user(message.from_user.id)
     except:
         pass
 
@@ -60,22 +61,45 @@ def time_formatter():
         return "0 s"
 
 
+def mb(nbytes):
+    return nbytes / (1024 * 1024)
+
+
+def ratio(part, whole):
+    return part / whole if whole else 0.0
+
+
 @app.on_message(filters.command("stats") & filters.user(OWNER_ID))
 async def stats(client, message):
     start = time.time()
-    users = len(await get_users())
-    premium = await premium_users()
+    users = await total_users()
+    running = await jobs.store.count_state("running")
+    queued = await jobs.store.count_state("queued")
     ping = round((time.time() - start) * 1000)
+    # transfers run on the workers, so their figures come from every live process
+    live = await process_stats.combined()
     await message.reply_text(f"""
-**Stats of** {(await client.get_me()).mention} :
+**Stats of** [{devgagan.BOT_NAME}](tg://user?id={devgagan.BOT_ID}) :
 
 🏓 **Ping Pong**: {ping}ms
 
 📊 **Total Users** : `{users}`
-📈 **Premium Users** : `{len(premium)}`
+📈 **Premium Users** : `{premium_count()}`
 ⚙️ **Bot Uptime** : `{time_formatter()}`
+
+🧵 **Active Jobs** : `{running}`
+📥 **Queue Depth** : `{queued}`
+🖥 **Bot Processes** : `{live["processes"]}`
+🔄 **Live Transfers** : `{live["live_transfers"]}`
+🤖 **Userbot Clients** : `{live["userbot_clients"]}`
+
+📦 **Last Hour** : `{mb(live["download_bytes"]):.1f} MB` down, `{mb(live["upload_bytes"]):.1f} MB` up
+⬇️ **Avg Download** : `{mb(ratio(live["download_bytes"], live["download_seconds"])):.2f} MB/s`
+⬆️ **Avg Upload** : `{mb(ratio(live["upload_bytes"], live["upload_seconds"])):.2f} MB/s`
+⏳ **FloodWait Absorbed** : `{live["flood_seconds"]}s`
+
+🗂 **Cache Hits** : media `{ratio(live["media_hits"], live["media_lookups"]):.0%}`, settings `{ratio(live["settings_hits"], live["settings_lookups"]):.0%}`, probe `{ratio(live["probe_hits"], live["probe_lookups"]):.0%}`, thumbs `{ratio(live["thumb_hits"], live["thumb_lookups"]):.0%}`
     
 🎨 **Python Version**: `{sys.version.split()[0]}`
 📑 **Mongo Version**: `{motor.version}`
 """)
-  
@@ -22,20 +22,20 @@ import random
 import string
 import requests
 import logging
-import cv2
 from devgagan import sex as client
 from pyrogram import Client,filters
 from telethon import events
 from telethon.sync import TelegramClient
 from telethon.tl.types import DocumentAttributeVideo
-from devgagan.core.func import screenshot, video_metadata, progress_bar
+from devgagan.core.func import screenshot, video_metadata, progress_bar, render_transfer
+from devgagan.core.progress import ThrottledMessage, finish
+from devgagan.core.split import file_parts
 from telethon.tl.functions.messages import EditMessageRequest
 from devgagantools import fast_upload
 from concurrent.futures import ThreadPoolExecutor
 import aiohttp 
 from devgagan import app
 import logging
-import aiofiles
 from mutagen.id3 import ID3, TIT2, TPE1, COMM, APIC
 from mutagen.mp3 import MP3
  
@@ -146,12 +146,13 @@ async def process_audio(client, event, url, cookies_env_var=None):
             prog = await client.send_message(chat_id, "**__Starting Upload...__**")
             uploaded = await fast_upload(
                 client, download_path, 
-                reply=prog, 
+                reply=ThrottledMessage(prog), 
                 name=None,
-                progress_bar_function=lambda done, total: progress_callback(done, total, chat_id)
+                progress_bar_function=lambda done, total: progress_callback(done, total, (chat_id, prog.id))
             )
             await client.send_file(chat_id, uploaded, caption=f"**{title}**\n\n**__Powered by @ProToppers__**")
             if prog:
+                finish(prog)
                 await prog.delete()
         else:
             await event.reply("**__Audio file not found after extraction!__**")
@@ -249,69 +250,8 @@ async def handler(event):
  
  
  
-user_progress = {}
- 
-def progress_callback(done, total, user_id):
-     
-    if user_id not in user_progress:
-        user_progress[user_id] = {
-            'previous_done': 0,
-            'previous_time': time.time()
-        }
- 
-     
-    user_data = user_progress[user_id]
- 
-     
-    percent = (done / total) * 100
- 
-     
-    completed_blocks = int(percent // 10)
-    remaining_blocks = 10 - completed_blocks
-    progress_bar = "█" * completed_blocks + "▒" * remaining_blocks
- 
-     
-    done_mb = done / (1024 * 1024)   
-    total_mb = total / (1024 * 1024)
- 
-     
-    speed = done - user_data['previous_done']
-    elapsed_time = time.time() - user_data['previous_time']
- 
-    if elapsed_time > 0:
-        speed_bps = speed / elapsed_time   
-        speed_mbps = (speed_bps * 8) / (1024 * 1024)   
-    else:
-        speed_mbps = 0
- 
-     
-    if speed_bps > 0:
-        remaining_time = (total - done) / speed_bps
-    else:
-        remaining_time = 0
- 
-     
-    remaining_time_min = remaining_time / 60
- 
-     
-    final = (
-        f"╭──────────────────╮\n"
-        f"│        **__Uploading...__**       \n"
-        f"├──────────\n"
-        f"│ {progress_bar}\n\n"
-        f"│ **__Progress:__** {percent:.2f}%\n"
-        f"│ **__Done:__** {done_mb:.2f} MB / {total_mb:.2f} MB\n"
-        f"│ **__Speed:__** {speed_mbps:.2f} Mbps\n"
-        f"│ **__Time Remaining:__** {remaining_time_min:.2f} min\n"
-        f"╰──────────────────╯\n\n"
-        f"**__Powered by @ProToppers__**"
-    )
- 
-     
-    user_data['previous_done'] = done
-    user_data['previous_time'] = time.time()
- 
-    return final
+def progress_callback(done, total, key):
+    return render_transfer(done, total, key, "**__Uploading...__**", "Time Remaining")
  
 async def process_video(client, event, url, cookies_env_var, check_duration_and_size=False):
     start_time = time.time()
@@ -356,7 +296,7 @@ async def process_video(client, event, url, cookies_env_var, check_duration_and_
          
         await asyncio.to_thread(download_video, url, ydl_opts)
         title = info_dict.get('title', 'Powered by Team SPY')
-        k = video_metadata(download_path)      
+        k = await video_metadata(download_path)      
         W = k['width']
         H = k['height']
         D = k['duration']
@@ -395,8 +335,8 @@ async def process_video(client, event, url, cookies_env_var, check_duration_and_
             prog = await client.send_message(chat_id, "**__Starting Upload...__**")
             uploaded = await fast_upload(
                 client, download_path,
-                reply=prog,
-                progress_bar_function=lambda done, total: progress_callback(done, total, chat_id)
+                reply=ThrottledMessage(prog),
+                progress_bar_function=lambda done, total: progress_callback(done, total, (chat_id, prog.id))
             )
             await client.send_file(
                 event.chat_id,
@@ -413,6 +353,7 @@ async def process_video(client, event, url, cookies_env_var, check_duration_and_
                 thumb=THUMB if THUMB else None
             )
             if prog:
+                finish(prog)
                 await prog.delete()
         else:
             await event.reply("**__File not found after download. Something went wrong!__**")
@@ -436,34 +377,17 @@ async def split_and_upload_file(app, sender, file_path, caption):
 
     file_size = os.path.getsize(file_path)
     start = await app.send_message(sender, f"ℹ️ File size: {file_size / (1024 * 1024):.2f} MB")
-    PART_SIZE = int(1.9 * 1024 * 1024 * 1024)  # NEW (fixed)
-
-    part_number = 0
-    async with aiofiles.open(file_path, mode="rb") as f:
-        while True:
-            chunk = await f.read(PART_SIZE)
-            if not chunk:
-                break
 
-            # Create part filename
-            base_name, file_ext = os.path.splitext(file_path)
-            part_file = f"{base_name}.part{str(part_number).zfill(3)}{file_ext}"
-
-            # Write part to file
-            async with aiofiles.open(part_file, mode="wb") as part_f:
-                await part_f.write(chunk)
-
-            # Uploading part
+    # Each part is streamed straight from its offset in the original file
+    for part_number, part in file_parts(file_path):
+        with part:
             edit = await app.send_message(sender, f"⬆️ Uploading part {part_number + 1}...")
             part_caption = f"{caption} \n\n**Part : {part_number + 1}**"
-            await app.send_document(sender, document=part_file, caption=part_caption,
+            await app.send_document(sender, document=part, file_name=part.name, caption=part_caption,
                 progress=progress_bar,
                 progress_args=("╭─────────────────────╮\n│      **__Pyro Uploader__**\n├─────────────────────", edit, time.time())
             )
             await edit.delete()
-            os.remove(part_file)  # Cleanup after upload
-
-            part_number += 1
 
     await start.delete()
     os.remove(file_path)
@@ -0,0 +1,75 @@
+# ---------------------------------------------------
+# File Name: test_html_caption.py
+# Description: Golden outputs of the caption converter in devgagan/core/html_caption.py.
+# Usage: python -m unittest discover tests  (or python -m pytest tests)
+# ---------------------------------------------------
+
+import os
+import sys
+import types
+import unittest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+# devgagan/__init__.py logs the bot clients in on import, the core modules don't need it
+_package = types.ModuleType("devgagan")
+_package.__path__ = [os.path.join(ROOT, "devgagan")]
+sys.modules.setdefault("devgagan", _package)
+
+from devgagan.core.html_caption import markdown_to_html  # noqa: E402
+
+# captions the old ten-pass re.sub version already rendered this way
+UNCHANGED = {
+    "plain text": "plain text",
+    "**bold** and __italic__": "<b>bold</b> and <i>italic</i>",
+    "*b* _i_ ~~s~~": "<b>b</b> <i>i</i> <s>s</s>",
+    "> quoted **line**\nnext": "<blockquote>quoted <b>line</b></blockquote>\nnext",
+    "file_name_x.mp4": "file<i>name</i>x.mp4",
+    "a * b": "a * b",
+    "": None,
+    "  ": "",
+    "line1\n\n**l2**": "line1\n\n<b>l2</b>",
+    "x ```y``` z": "x <pre>y</pre> z",
+    "[**bold link**](http://t.me)": '<a href="http://t.me"><b>bold link</b></a>',
+}
+
+# captions the old version got wrong, with the expected Telegram HTML
+FIXED = {
+    "```\ncode **x**\n```": "<pre>\ncode **x**\n</pre>",
+    "`a**b**`": "<code>a**b**</code>",
+    "[link](https://x.com/a_b_c)": '<a href="https://x.com/a_b_c">link</a>',
+    "**a __b** c__": "<b>a <i>b</i></b><i> c</i>",
+    "2 < 3 & 4 > 1": "2 &lt; 3 &amp; 4 &gt; 1",
+    "||spoiler||": "<tg-spoiler>spoiler</tg-spoiler>",
+    "**unclosed": "**unclosed",
+}
+
+# corners of the one-match marker pairs, rendered as the character scan reads them
+PAIRS = {
+    "**a **b** c**": "<b>a </b>b<b> c</b>",
+    "*abc** x**": "<b>abc<b> x</b></b>",
+    "**abc***": "<b>abc</b>*",
+    "**x *y* z**": "<b>x <b>y</b> z</b>",
+    "> *q*\n> __r__": "<blockquote><b>q</b></blockquote>\n<blockquote><i>r</i></blockquote>",
+    "a```b```> c": "a<pre>b</pre>&gt; c",
+}
+
+
+class MarkdownToHtmlTest(unittest.TestCase):
+    def check(self, cases):
+        for caption, expected in cases.items():
+            with self.subTest(caption=caption):
+                self.assertEqual(markdown_to_html(caption), expected)
+
+    def test_unchanged(self):
+        self.check(UNCHANGED)
+
+    def test_fixed(self):
+        self.check(FIXED)
+
+    def test_pairs(self):
+        self.check(PAIRS)
+
+
+if __name__ == "__main__":
+    unittest.main()